@@ -2,6 +2,9 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django (raw-body complete uploads reach their view while
+they are still arriving); WebSocket connections (ws/transcription/<id>/) go
+to the streaming transcription consumer.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +12,21 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Served requests: startup warms up inference (see TRANSCRIPTION_SERVING)
+os.environ.setdefault('TRANSCRIPTION_SERVING', '1')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+# Imported after Django is set up, since the consumer uses the ORM
+from transcription.consumers import UploadASGIHandler, websocket_application  # noqa: E402
+
+django_application = UploadASGIHandler()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -77,10 +77,75 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# SQLite (the default) suits a single node; it runs in WAL mode so readers
+# never block the writer, and writers wait for the lock instead of failing
+# with "database is locked". Set DB_ENGINE=postgresql for several server
+# processes or hosts.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'transcription'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Keep connections open between requests, and check them before reuse
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # psycopg 3 connection pool shared by the threads of this process
+    # (replaces persistent connections, which Django requires to be off)
+    if int(os.environ.get('DB_POOL_MAX_SIZE', '0')) > 0:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE')),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+else:
+    SQLITE_PRAGMAS = [
+        # Write-ahead log: readers see a snapshot while one writer appends
+        'PRAGMA journal_mode=WAL',
+        # Durable at checkpoints; commits no longer fsync in WAL mode
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={int(float(os.environ.get('DB_TIMEOUT', '20')) * 1000)}",
+    ] if os.environ.get('DB_SQLITE_WAL', '1') == '1' else []
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Seconds a writer waits for the lock
+                'timeout': float(os.environ.get('DB_TIMEOUT', '20')),
+                # Take the write lock when a transaction starts, so a
+                # read-then-write transaction never fails half way on upgrade
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(SQLITE_PRAGMAS),
+            },
+        }
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Per-process memory by default; point DJANGO_CACHE_BACKEND at a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache or the file/database
+# caches) when running several server processes, so cached transcription
+# status and long-polls see changes made by every process.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'transcription'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', '10000')),
+        },
     }
 }
 
@@ -158,6 +223,73 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 TEMP_DIR = os.path.join(BASE_DIR, 'temp')
 os.makedirs(TEMP_DIR, exist_ok=True)
 
+# Whether this process serves requests. backend/asgi.py and backend/wsgi.py
+# set it, and runserver counts as serving; only then does startup preload
+# models, start the inference workers, verify the DynamoDB tables and
+# install the chunk flush thread and SIGTERM handler. Management commands
+# and scripts calling django.setup() do none of that.
+TRANSCRIPTION_SERVING = os.environ.get('TRANSCRIPTION_SERVING', '0') == '1'
+
+# Whisper models
+# Directory for downloaded model weights (None uses Whisper's default cache)
+MODEL_DIR = os.environ.get('WHISPER_MODEL_DIR') or None
+# Models loaded at startup so no request pays the load cost
+WHISPER_PRELOAD_MODELS = [
+    name.strip() for name in os.environ.get('WHISPER_PRELOAD_MODELS', 'tiny,base').split(',') if name.strip()
+]
+# Load preloaded models in a background thread instead of blocking startup
+WHISPER_PRELOAD_IN_BACKGROUND = os.environ.get('WHISPER_PRELOAD_IN_BACKGROUND', '1') == '1'
+# Parameter memory budget for loaded models; least recently used models are evicted past it (0 = unlimited)
+WHISPER_MODEL_MEMORY_BUDGET_MB = int(os.environ.get('WHISPER_MODEL_MEMORY_BUDGET_MB', '0'))
+
+# Inference worker pool. "process" gives each worker its own model copies,
+# "thread" shares this process's registry. Requests beyond workers + queue
+# depth are rejected with 503 and a Retry-After header.
+WHISPER_INFERENCE_MODE = os.environ.get('WHISPER_INFERENCE_MODE', 'process')
+WHISPER_INFERENCE_WORKERS = int(os.environ.get('WHISPER_INFERENCE_WORKERS', '2'))
+WHISPER_INFERENCE_QUEUE_DEPTH = int(os.environ.get('WHISPER_INFERENCE_QUEUE_DEPTH', '16'))
+# Micro-batching of short clips (e.g. streaming chunks) across requests:
+# up to WHISPER_BATCH_MAX_SIZE clips collected for at most WHISPER_BATCH_MAX_WAIT_MS
+WHISPER_BATCH_MAX_SIZE = int(os.environ.get('WHISPER_BATCH_MAX_SIZE', '8'))
+WHISPER_BATCH_MAX_WAIT_MS = float(os.environ.get('WHISPER_BATCH_MAX_WAIT_MS', '10'))
+# Seconds a request waits for its transcription before giving up
+WHISPER_INFERENCE_TIMEOUT = float(os.environ.get('WHISPER_INFERENCE_TIMEOUT', '120'))
+# Voice activity detection: only speech regions of a waveform are sent to Whisper
+WHISPER_VAD = os.environ.get('WHISPER_VAD', '1') == '1'
+# Transcription results cached by audio content, model and options:
+# "memory" (per-process LRU), "django" (the TRANSCRIPTION_CACHE_ALIAS cache,
+# e.g. a file or database cache shared by all processes) or "none"
+TRANSCRIPTION_CACHE_BACKEND = os.environ.get('TRANSCRIPTION_CACHE_BACKEND', 'memory')
+TRANSCRIPTION_CACHE_ALIAS = os.environ.get('TRANSCRIPTION_CACHE_ALIAS', 'default')
+TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_ENTRIES', '512'))
+TRANSCRIPTION_CACHE_TTL = float(os.environ.get('TRANSCRIPTION_CACHE_TTL', '3600'))
+# Cached get-transcription responses, dropped whenever the recording changes
+TRANSCRIPTION_STATUS_CACHE_ALIAS = os.environ.get('TRANSCRIPTION_STATUS_CACHE_ALIAS', 'default')
+TRANSCRIPTION_STATUS_CACHE_TTL = int(os.environ.get('TRANSCRIPTION_STATUS_CACHE_TTL', '300'))
+# Longest a get-transcription long-poll (?wait=N) is held open, in seconds
+TRANSCRIPTION_LONG_POLL_MAX = float(os.environ.get('TRANSCRIPTION_LONG_POLL_MAX', '30'))
+# Candidate and referer reads from DynamoDB are cached for this many seconds
+# (0 disables), and dropped whenever this process writes to the table
+DYNAMODB_CACHE_ALIAS = os.environ.get('DYNAMODB_CACHE_ALIAS', 'default')
+DYNAMODB_CACHE_TTL = float(os.environ.get('DYNAMODB_CACHE_TTL', '60'))
+
+# Streaming transcription: each recording's audio is re-transcribed in passes
+# at least STREAMING_MIN_STEP_SECONDS of new audio apart, over a buffer trimmed
+# to committed text once it passes STREAMING_BUFFER_TRIM_SECONDS
+STREAMING_MODEL = os.environ.get('STREAMING_MODEL', 'tiny')
+STREAMING_MIN_STEP_SECONDS = float(os.environ.get('STREAMING_MIN_STEP_SECONDS', '1.0'))
+STREAMING_BUFFER_TRIM_SECONDS = float(os.environ.get('STREAMING_BUFFER_TRIM_SECONDS', '15'))
+# Seconds of inactivity before an unfinalized session is discarded
+STREAMING_SESSION_TTL = float(os.environ.get('STREAMING_SESSION_TTL', '300'))
+# Streamed chunk rows are written in batches: once this many rows changed, or
+# the oldest change is this many seconds old (checked as chunks arrive and by
+# a background thread), and on finalize, status reads and shutdown
+TRANSCRIPTION_CHUNK_FLUSH_SIZE = int(os.environ.get('TRANSCRIPTION_CHUNK_FLUSH_SIZE', '10'))
+TRANSCRIPTION_CHUNK_FLUSH_SECONDS = float(os.environ.get('TRANSCRIPTION_CHUNK_FLUSH_SECONDS', '5'))
+
+# Return canned transcriptions instead of running Whisper (for testing)
+USE_MOCK_TRANSCRIPTION = os.environ.get('USE_MOCK_TRANSCRIPTION', '0') == '1'
+
 # Add detailed logging configuration
 LOGGING = {
     'version': 1,
@@ -12,5 +12,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Served requests: startup warms up inference (see TRANSCRIPTION_SERVING)
+os.environ.setdefault('TRANSCRIPTION_SERVING', '1')
 
 application = get_wsgi_application()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python
+"""
+Benchmarks for the transcription engine.
+
+Each subcommand times one part of the pipeline in-process (no server needed)
+and prints a short comparison table. Run from the engine directory, e.g.:
+
+    python benchmark.py batching --audio ../Experiment/harvard.wav
+"""
+import argparse
+import os
+import time
+
+DEFAULT_AUDIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Experiment', 'harvard.wav')
+
+
+def print_rows(rows):
+    """Print (label, seconds, items) rows with throughput and speedup vs the first row"""
+    baseline = rows[0][1] / rows[0][2] if rows and rows[0][2] else None
+    print(f"{'path':<36} {'seconds':>10} {'items/s':>10} {'speedup':>8}")
+    for label, seconds, items in rows:
+        rate = items / seconds if seconds > 0 else float('inf')
+        per_item = seconds / items if items else 0
+        speedup = baseline / per_item if baseline and per_item else 1.0
+        print(f"{label:<36} {seconds:>10.3f} {rate:>10.2f} {speedup:>7.2f}x")
+
+
+def load_clips(audio_path, window_seconds, count):
+    """Cut an audio file into `count` clips of `window_seconds` (wrapping around)"""
+    import librosa
+    audio, _ = librosa.load(audio_path, sr=16000, mono=True)
+    size = int(window_seconds * 16000)
+    starts = list(range(0, max(len(audio) - size, 0) + 1, size)) or [0]
+    return [audio[starts[i % len(starts)]:starts[i % len(starts)] + size] for i in range(count)]
+
+
+def bench_batching(args):
+    """Single-clip transcription vs cross-request batched decoding"""
+    from transcription.inference import _run_batch
+    from transcription.model_registry import get_registry
+
+    clips = load_clips(args.audio, args.window, args.clips)
+    model = get_registry().get(args.model, 'cpu')
+    options = {'language': 'en', 'fp16': False}
+
+    # Warm up so the first timed call does not include lazy initialisation
+    _run_batch(args.model, clips[:1], options)
+
+    rows = []
+    start = time.perf_counter()
+    for clip in clips:
+        model.transcribe(clip, **options)
+    rows.append(('model.transcribe per clip', time.perf_counter() - start, len(clips)))
+
+    start = time.perf_counter()
+    for clip in clips:
+        _run_batch(args.model, [clip], options)
+    rows.append(('decode, batch size 1', time.perf_counter() - start, len(clips)))
+
+    for size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(clips), size):
+            _run_batch(args.model, clips[i:i + size], options)
+        rows.append((f'decode, batch size {size}', time.perf_counter() - start, len(clips)))
+
+    print(f"{len(clips)} clips of {args.window}s from {os.path.basename(args.audio)}, model '{args.model}'")
+    print_rows(rows)
+
+
+def bench_features(args):
+    """Decode + fluency features: separate decodes and passes vs one shared AudioBuffer"""
+    import librosa
+    from transcription.audio_buffer import AudioBuffer
+    from transcription.fluency_analyzer import FluencyAnalyzer
+
+    analyzer = FluencyAnalyzer()
+
+    def before():
+        # analyze_audio used to decode at 22.05 kHz for librosa and again at 16 kHz for Whisper
+        audio, sr = librosa.load(args.audio)
+        librosa.load(args.audio, sr=16000)
+        onset_env = librosa.onset.onset_strength(y=audio, sr=sr)
+        librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr)
+        librosa.feature.rms(y=audio)
+
+    def after():
+        audio = AudioBuffer.from_source(args.audio)
+        analyzer.analyze(audio)
+        audio.samples  # handed to Whisper as-is
+
+    before()
+    after()
+    rows = []
+    for label, fn in (('decode twice + separate passes', before), ('AudioBuffer (decode once, memoized)', after)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        rows.append((label, time.perf_counter() - start, args.iterations))
+
+    print(f"{args.iterations} iterations on {os.path.basename(args.audio)}")
+    print_rows(rows)
+
+
+def bench_fluency_batch(args):
+    """FluencyAnalyzer.analyze per recording vs analyze_batch over padded batches"""
+    import numpy as np
+    from transcription.audio_buffer import AudioBuffer
+    from transcription.fluency_analyzer import FluencyAnalyzer
+
+    # Synthetic speech-like signals: noise bursts with pauses, of varying length
+    rng = np.random.default_rng(0)
+    signals = []
+    for _ in range(args.recordings):
+        length = int(rng.uniform(args.min_seconds, args.max_seconds) * 16000)
+        envelope = (np.sin(np.arange(length) / rng.uniform(800, 3000)) > -0.3).astype(np.float32)
+        signals.append((0.2 * rng.standard_normal(length) * envelope).astype(np.float32))
+
+    analyzer = FluencyAnalyzer()
+    # Warm up librosa's lazy imports so they are not timed
+    analyzer.analyze(AudioBuffer(signals[0]))
+    analyzer.analyze_batch(signals[:2])
+
+    rows = []
+    start = time.perf_counter()
+    looped = [analyzer.analyze(AudioBuffer(signal)) for signal in signals]
+    rows.append(('analyze() per recording', time.perf_counter() - start, len(signals)))
+
+    for size in args.batch_sizes:
+        start = time.perf_counter()
+        batched = analyzer.analyze_batch(signals, batch_size=size)
+        rows.append((f'analyze_batch, batch size {size}', time.perf_counter() - start, len(signals)))
+
+    mismatch = max(abs(a['overall_score'] - b) for a, b in zip(looped, batched['overall_score']))
+    print(f"{len(signals)} recordings of {args.min_seconds}-{args.max_seconds}s "
+          f"(max score difference {mismatch:.2g})")
+    print_rows(rows)
+
+
+def bench_vad(args):
+    """Whisper on the full waveform vs on the speech regions found by VAD"""
+    import numpy as np
+    from transcription.audio_buffer import AudioBuffer
+    from transcription.model_registry import get_registry
+    from transcription.vad import speech_only
+
+    speech = AudioBuffer.from_source(args.audio).samples
+    silence = np.zeros(int(args.silence * 16000), dtype=np.float32)
+    # Speech with long pauses, as in a read-aloud recording with hesitation
+    audio = np.concatenate([silence, speech, silence, speech, silence])
+    model = get_registry().get(args.model, 'cpu')
+    options = {'language': 'en', 'fp16': False}
+    model.transcribe(speech[:16000], **options)
+
+    def full():
+        return model.transcribe(audio, **options)
+
+    def with_vad():
+        clip, timeline = speech_only(audio)
+        result = model.transcribe(clip, **options)
+        return timeline.remap(result) if timeline is not None else result
+
+    rows = []
+    for label, fn in (('full waveform', full), ('speech regions only (VAD)', with_vad)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        rows.append((label, time.perf_counter() - start, args.iterations))
+
+    clip, _ = speech_only(audio)
+    print(f"{len(audio) / 16000:.1f}s of audio ({len(clip) / 16000:.1f}s speech), model '{args.model}'")
+    print_rows(rows)
+
+
+def setup_django():
+    """Configure Django against a throwaway test database"""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    import tempfile
+    from django.conf import settings
+    from django.db import connection
+    if connection.vendor == 'sqlite':
+        # A file rather than shared-cache memory, so concurrent writers wait instead of failing
+        test_settings = settings.DATABASES['default'].setdefault('TEST', {})
+        test_settings['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+    connection.creation.create_test_db(verbosity=0)
+
+
+def make_wav_frames(audio_path, frame_seconds, count):
+    """Cut an audio file into `count` standalone WAV frames"""
+    import io
+    import soundfile as sf
+    frames = []
+    for clip in load_clips(audio_path, frame_seconds, count):
+        buffer = io.BytesIO()
+        sf.write(buffer, clip, 16000, format='WAV', subtype='PCM_16')
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def bench_websocket(args):
+    """Concurrent streaming sessions: one WebSocket each vs one HTTP POST per chunk"""
+    import asyncio
+    import base64
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+
+    setup_django()
+    from asgiref.testing import ApplicationCommunicator
+    from django.test import Client
+    from backend.asgi import application
+    from transcription import streaming
+
+    if not args.whisper:
+        # Fixed-cost stand-in for Whisper so the comparison isolates transport and session overhead
+        def stub_transcribe(audio, **options):
+            time.sleep(args.asr_latency)
+            duration = len(audio) / 16000
+            words = [{'start': i * 0.5, 'end': i * 0.5 + 0.4, 'word': f' w{i}'} for i in range(int(duration * 2))]
+            return {'text': '', 'language': 'en', 'segments': [{'start': 0.0, 'end': duration, 'text': '', 'words': words}]}
+        streaming.transcribe = stub_transcribe
+
+    frames = make_wav_frames(args.audio, 1.0, args.frames)
+
+    async def websocket_session(index):
+        communicator = ApplicationCommunicator(
+            application, {'type': 'websocket', 'path': f'/ws/transcription/bench-ws-{index}/'}
+        )
+        await communicator.send_input({'type': 'websocket.connect'})
+        await communicator.receive_output(timeout=30)
+        for frame in frames:
+            await communicator.send_input({'type': 'websocket.receive', 'bytes': frame})
+            await asyncio.sleep(0)
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'finalize'})})
+        while True:
+            message = await communicator.receive_output(timeout=60)
+            if message['type'] == 'websocket.close':
+                break
+        await communicator.wait(timeout=30)
+
+    async def run_websockets():
+        await asyncio.gather(*(websocket_session(i) for i in range(args.sessions)))
+
+    def http_session(index):
+        client = Client(HTTP_HOST='localhost')
+        for sequence, frame in enumerate(frames, start=1):
+            client.post('/api/transcription/stream/', json.dumps({
+                'audio': base64.b64encode(frame).decode(),
+                'recording_id': f'bench-http-{index}',
+                'sequence_number': sequence,
+                'file_extension': '.wav',
+            }), content_type='application/json')
+        client.post(f'/api/transcription/finalize/bench-http-{index}/')
+
+    items = args.sessions * args.frames
+    rows = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        list(pool.map(http_session, range(args.sessions)))
+    rows.append(('HTTP POST per chunk (base64 JSON)', time.perf_counter() - start, items))
+
+    start = time.perf_counter()
+    asyncio.run(run_websockets())
+    rows.append(('WebSocket binary frames', time.perf_counter() - start, items))
+
+    frame_bytes = sum(len(frame) for frame in frames)
+    print(f"{args.sessions} concurrent sessions x {args.frames} one-second frames "
+          f"({frame_bytes} bytes binary vs {len(base64.b64encode(b''.join(frames)))} bytes base64 per session)")
+    print_rows(rows)
+
+
+def bench_database(args):
+    """Parallel chunk writers against the configured database, and SQLite without WAL"""
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import OperationalError
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, connections
+    from transcription.models import AudioRecording
+    from transcription.streaming import claim_chunk, close_session, persist_committed
+
+    def writer(prefix, index):
+        """One streaming session: claim each chunk, then commit its text"""
+        errors = 0
+        try:
+            recording, _ = AudioRecording.objects.get_or_create(user_identifier=f'bench-db-{prefix}-{index}')
+            for sequence in range(1, args.chunks + 1):
+                try:
+                    claim_chunk(recording, sequence, f'{prefix}-{index}-{sequence}'.encode())
+                    persist_committed(recording, sequence, f'w{sequence}', words=[[0.0, 0.4, f' w{sequence}']])
+                except OperationalError:
+                    errors += 1
+        finally:
+            close_session(f'bench-db-{prefix}-{index}')
+            connections.close_all()
+        return errors
+
+    def run(label, options):
+        settings.DATABASES['default']['OPTIONS'] = options
+        connections.close_all()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.writers) as pool:
+            errors = sum(pool.map(writer, [len(rows)] * args.writers, range(args.writers)))
+        elapsed = time.perf_counter() - start
+        # Throughput counts stored chunks; "database is locked" failures are reported separately
+        return (f"{label} ({errors} locked)", elapsed, args.writers * args.chunks - errors)
+
+    configured = dict(settings.DATABASES['default'].get('OPTIONS', {}))
+    rows = []
+    if connection.vendor == 'sqlite':
+        # Rollback journal with a short lock wait, as before WAL was configured
+        rows.append(run('sqlite rollback journal', {'timeout': 5}))
+        rows.append(run('sqlite WAL', configured))
+    else:
+        rows.append(run(connection.vendor, configured))
+    print(f"{args.writers} writers x {args.chunks} chunks ({connection.vendor})")
+    print_rows(rows)
+
+
+def bench_dynamodb(args):
+    """save_candidate API calls and time with per-call vs shared client, and batched writes"""
+    import boto3
+    import django
+    from unittest import mock
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
+    from transcription import dynamodb_utils
+    from transcription.dynamodb_fake import FakeDynamoDBClient
+
+    candidates = [{'id': f'bench-{i}', 'name': f'Candidate {i}', 'experience': i % 5, 'fluencyScore': 80}
+                  for i in range(args.candidates)]
+    rows = []
+
+    # As before: a new client and a describe_table on every save
+    fake = FakeDynamoDBClient(latency=args.latency)
+
+    def new_client():
+        boto3.session.Session().client('dynamodb', region_name='us-east-1')
+        dynamodb_utils._verified_tables.clear()
+        return fake
+
+    with mock.patch.object(dynamodb_utils, 'get_dynamodb_client', new_client):
+        start = time.perf_counter()
+        for candidate in candidates:
+            dynamodb_utils.save_candidate(dict(candidate))
+        calls = sum(fake.calls.values()) / len(candidates)
+        rows.append((f'client per call ({calls:.1f} calls/save)', time.perf_counter() - start, len(candidates)))
+
+    fake = FakeDynamoDBClient(latency=args.latency)
+    with mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=fake):
+        dynamodb_utils._verified_tables.clear()
+        start = time.perf_counter()
+        for candidate in candidates:
+            dynamodb_utils.save_candidate(dict(candidate))
+        calls = sum(fake.calls.values()) / len(candidates)
+        rows.append((f'shared client ({calls:.2f} calls/save)', time.perf_counter() - start, len(candidates)))
+
+        fake.calls.clear()
+        start = time.perf_counter()
+        dynamodb_utils.save_candidates_batch([dict(candidate) for candidate in candidates])
+        calls = sum(fake.calls.values()) / len(candidates)
+        rows.append((f'batch writes ({calls:.2f} calls/save)', time.perf_counter() - start, len(candidates)))
+
+    print(f"{args.candidates} candidates, {args.latency * 1000:.0f} ms per DynamoDB call (in-memory fake)")
+    print_rows(rows)
+
+
+def legacy_candidate_to_item(candidate_data):
+    """Field-by-field marshalling save_candidate used before the codec (kept for comparison)"""
+    item = {
+        'id': {'S': candidate_data['id']},
+        'name': {'S': candidate_data.get('name', '')},
+        'email': {'S': candidate_data.get('email', '')},
+        'education': {'S': candidate_data.get('education', '')},
+        'experience': {'N': str(candidate_data.get('experience', 0))},
+        'timestamp': {'N': str(candidate_data.get('timestamp', 0))}
+    }
+    for field in ('fluencyScore', 'interpersonalScore', 'interestsScore', 'careerGoalsScore',
+                  'pythonScore', 'javaScore', 'awsScore', 'cppScore'):
+        if field in candidate_data:
+            item[field] = {'N': str(candidate_data[field])}
+    if candidate_data.get('responses'):
+        item['responses'] = {'M': {}}
+        for field in ('interests', 'careerGoals', 'transcription'):
+            if field in candidate_data['responses']:
+                item['responses']['M'][field] = {'S': candidate_data['responses'][field]}
+    return item
+
+
+def legacy_candidate_from_item(item):
+    """Field-by-field unmarshalling get_all_candidates used before the codec (truncates scores)"""
+    candidate = {
+        'id': item.get('id', {}).get('S', ''),
+        'name': item.get('name', {}).get('S', ''),
+        'email': item.get('email', {}).get('S', ''),
+        'education': item.get('education', {}).get('S', ''),
+        'experience': int(item.get('experience', {}).get('N', '0')),
+        'timestamp': int(item.get('timestamp', {}).get('N', '0'))
+    }
+    for field in ('fluencyScore', 'interpersonalScore', 'interestsScore', 'careerGoalsScore',
+                  'pythonScore', 'javaScore', 'awsScore', 'cppScore'):
+        if field in item:
+            candidate[field] = int(item[field]['N'])
+    if 'responses' in item:
+        candidate['responses'] = {}
+        for field in ('interests', 'careerGoals', 'transcription'):
+            if field in item['responses']['M']:
+                candidate['responses'][field] = item['responses']['M'][field]['S']
+    return candidate
+
+
+def bench_codec(args):
+    """Candidate item encoding and decoding: hand-written vs schema-driven codec"""
+    import gc
+    from transcription.dynamodb_codec import CANDIDATE_CODEC
+
+    candidates = [{
+        'id': f'candidate-{i}', 'name': f'Candidate {i}', 'email': f'c{i}@example.com',
+        'education': 'BS Computer Science', 'experience': i % 10, 'timestamp': 1700000000000 + i,
+        'fluencyScore': 80, 'interpersonalScore': 75, 'interestsScore': 90, 'careerGoalsScore': 85,
+        'pythonScore': 88, 'javaScore': 70, 'awsScore': 65, 'cppScore': 60,
+        'responses': {'interests': 'distributed systems', 'careerGoals': 'backend engineer'},
+    } for i in range(args.items)]
+    # Integer scores, so the legacy decoder's int() truncation does not change the result
+    items = [legacy_candidate_to_item(candidate) for candidate in candidates]
+    assert CANDIDATE_CODEC.encode_many(candidates) == items
+    assert CANDIDATE_CODEC.decode_many(items) == [legacy_candidate_from_item(item) for item in items]
+
+    rows = []
+    for label, run in (
+        ('encode: hand-written', lambda: [legacy_candidate_to_item(c) for c in candidates]),
+        ('encode: codec', lambda: CANDIDATE_CODEC.encode_many(candidates)),
+        ('decode: hand-written', lambda: [legacy_candidate_from_item(item) for item in items]),
+        ('decode: codec', lambda: CANDIDATE_CODEC.decode_many(items)),
+    ):
+        timings = []
+        for _ in range(3):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        rows.append((label, min(timings), args.items))
+    print(f"{args.items} candidate items (best of 3)")
+    print_rows(rows[:2])
+    print_rows(rows[2:])
+
+
+def main():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description='Benchmark the transcription engine')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batching = subparsers.add_parser('batching', help='Single vs micro-batched Whisper decoding')
+    batching.add_argument('--audio', default=DEFAULT_AUDIO, help='WAV file to cut clips from')
+    batching.add_argument('--model', default='tiny', help='Whisper model name (default: tiny)')
+    batching.add_argument('--window', type=float, default=3.0, help='Clip length in seconds (default: 3)')
+    batching.add_argument('--clips', type=int, default=32, help='Number of clips (default: 32)')
+    batching.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 16],
+                          help='Batch sizes to compare (default: 4 8 16)')
+    batching.set_defaults(func=bench_batching)
+
+    features = subparsers.add_parser('features', help='Decode and fluency feature extraction')
+    features.add_argument('--audio', default=DEFAULT_AUDIO, help='Audio file to analyze')
+    features.add_argument('--iterations', type=int, default=10, help='Repetitions (default: 10)')
+    features.set_defaults(func=bench_features)
+
+    fluency_batch = subparsers.add_parser('fluency-batch', help='Per-recording vs batched fluency scoring')
+    fluency_batch.add_argument('--recordings', type=int, default=200, help='Synthetic recordings (default: 200)')
+    fluency_batch.add_argument('--min-seconds', type=float, default=5.0, help='Shortest recording (default: 5)')
+    fluency_batch.add_argument('--max-seconds', type=float, default=60.0, help='Longest recording (default: 60)')
+    fluency_batch.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 32],
+                               help='Batch sizes to compare (default: 4 8 32)')
+    fluency_batch.set_defaults(func=bench_fluency_batch)
+
+    vad = subparsers.add_parser('vad', help='Transcription with and without voice activity detection')
+    vad.add_argument('--audio', default=DEFAULT_AUDIO, help='Speech recording to pad with silence')
+    vad.add_argument('--model', default='tiny', help='Whisper model name (default: tiny)')
+    vad.add_argument('--silence', type=float, default=5.0, help='Seconds of each silent stretch (default: 5)')
+    vad.add_argument('--iterations', type=int, default=3, help='Repetitions (default: 3)')
+    vad.set_defaults(func=bench_vad)
+
+    websocket = subparsers.add_parser('websocket', help='Concurrent WebSocket sessions vs HTTP chunk posts')
+    websocket.add_argument('--audio', default=DEFAULT_AUDIO, help='WAV file to cut frames from')
+    websocket.add_argument('--sessions', type=int, default=20, help='Concurrent sessions (default: 20)')
+    websocket.add_argument('--frames', type=int, default=10, help='One-second frames per session (default: 10)')
+    websocket.add_argument('--asr-latency', type=float, default=0.05,
+                           help='Seconds per pass for the stand-in transcriber (default: 0.05)')
+    websocket.add_argument('--whisper', action='store_true', help='Transcribe with the real Whisper model')
+    websocket.set_defaults(func=bench_websocket)
+
+    database = subparsers.add_parser('database', help='Concurrent chunk writers against the database')
+    database.add_argument('--writers', type=int, default=16, help='Parallel writers (default: 16)')
+    database.add_argument('--chunks', type=int, default=50, help='Chunks per writer (default: 50)')
+    database.set_defaults(func=bench_database)
+
+    dynamodb = subparsers.add_parser('dynamodb', help='Candidate writes: client per call, shared client, batches')
+    dynamodb.add_argument('--candidates', type=int, default=500, help='Candidates to save (default: 500)')
+    dynamodb.add_argument('--latency', type=float, default=0.005,
+                          help='Seconds per call for the stand-in DynamoDB (default: 0.005)')
+    dynamodb.set_defaults(func=bench_dynamodb)
+
+    codec = subparsers.add_parser('codec', help='DynamoDB item encoding/decoding: hand-written vs codec')
+    codec.add_argument('--items', type=int, default=100000, help='Candidate items (default: 100000)')
+    codec.set_defaults(func=bench_codec)
+
+    args = parser.parse_args()
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
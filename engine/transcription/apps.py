@@ -1,6 +1,70 @@
+import atexit
+import logging
+import os
+import sys
+import threading
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class TranscriptionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'transcription'
+
+    @staticmethod
+    def is_serving():
+        """
+        Whether this process serves requests, and so needs the startup work.
+
+        True under an ASGI/WSGI server (TRANSCRIPTION_SERVING) and in the
+        runserver process that serves, not the autoreloader's watcher.
+        """
+        from django.conf import settings
+        if getattr(settings, 'TRANSCRIPTION_SERVING', False):
+            return True
+        if sys.argv[1:2] != ['runserver']:
+            return False
+        return '--noreload' in sys.argv or os.environ.get('RUN_MAIN') == 'true'
+
+    def ready(self):
+        from django.conf import settings
+        from .model_registry import get_registry
+
+        registry = get_registry()
+        budget_mb = getattr(settings, 'WHISPER_MODEL_MEMORY_BUDGET_MB', 0)
+        registry.configure(
+            memory_budget_bytes=budget_mb * 1024 * 1024 if budget_mb else None,
+            download_root=getattr(settings, 'MODEL_DIR', None),
+        )
+
+        if not self.is_serving():
+            return
+
+        # Streamed chunks are written behind; don't lose them on shutdown
+        from .chunk_buffer import install_shutdown_flush, start_background_flush
+        install_shutdown_flush()
+        start_background_flush()
+
+        # Describe (or create) the DynamoDB tables once instead of per request
+        from .dynamodb_utils import save_memory_snapshots, verify_tables
+        verify_tables()
+        # Keep the in-memory tables' data, if DYNAMODB_MEMORY_SNAPSHOT_DIR is set
+        atexit.register(save_memory_snapshots)
+
+        models = getattr(settings, 'WHISPER_PRELOAD_MODELS', [])
+        if not models:
+            return
+
+        logger.info(f"Preloading Whisper models: {', '.join(models)}")
+        if getattr(settings, 'WHISPER_INFERENCE_MODE', 'process') == 'process':
+            # Worker processes load the models in their initializer
+            from .inference import get_executor
+            get_executor().warm_up()
+        elif getattr(settings, 'WHISPER_PRELOAD_IN_BACKGROUND', True):
+            threading.Thread(
+                target=registry.preload, args=(models,), name='whisper-preload', daemon=True
+            ).start()
+        else:
+            registry.preload(models)
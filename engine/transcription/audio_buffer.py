@@ -0,0 +1,142 @@
+from functools import cached_property
+from typing import Any, Iterable, List
+
+import librosa
+import numpy as np
+import scipy.fft
+
+from .audio_decoding import SAMPLE_RATE, decode_audio
+from . import vad
+
+# Frame parameters shared by every spectral feature (librosa defaults)
+N_FFT = 2048
+HOP_LENGTH = 512
+
+
+def batch_power(signals: np.ndarray) -> np.ndarray:
+    """
+    Power STFT of equal-length signals, shape (batch, frames, 1 + N_FFT // 2).
+
+    Same framing as librosa.stft (centred, zero-padded Hann frames), but
+    every frame of the batch goes through a single multi-threaded real FFT;
+    librosa.stft on a 2-D input is many times slower than on each row.
+    """
+    padded = np.pad(signals, ((0, 0), (N_FFT // 2, N_FFT // 2)))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, N_FFT, axis=-1)[:, ::HOP_LENGTH]
+    window = librosa.filters.get_window("hann", N_FFT, fftbins=True).astype(np.float32)
+    spectrum = scipy.fft.rfft(frames * window, axis=-1, workers=-1)
+    return spectrum.real ** 2 + spectrum.imag ** 2
+
+
+class AudioBuffer:
+    """
+    A recording decoded once at 16 kHz, shared by Whisper and the fluency metrics.
+
+    Derived features are computed on first access and memoized, so the STFT
+    behind RMS energy and the onset envelope is only ever taken once.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = SAMPLE_RATE):
+        self.samples = np.ascontiguousarray(samples, dtype=np.float32)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_source(cls, source: Any) -> "AudioBuffer":
+        """Decode bytes, a path or a file-like object (see decode_audio)."""
+        if isinstance(source, cls):
+            return source
+        if isinstance(source, np.ndarray):
+            return cls(source)
+        return cls(decode_audio(source))
+
+    @classmethod
+    def batch(cls, signals: Iterable[np.ndarray], sample_rate: int = SAMPLE_RATE,
+              batch_size: int = 4) -> List["AudioBuffer"]:
+        """
+        Wrap many recordings, computing their features together.
+
+        Signals are sorted by length and zero-padded into batches of up to
+        batch_size, and each batch goes through one STFT, mel projection and
+        onset-strength pass. Zero padding only adds frames after a signal's
+        own, so each buffer gets the rms, onset_envelope and onsets it would
+        compute alone. The spectrograms are not kept; a batch's framed audio
+        takes about four times its padded samples, so keep batch_size small
+        for long recordings.
+
+        Returns:
+            One AudioBuffer per signal, in the order given
+        """
+        buffers = [cls(signal, sample_rate) for signal in signals]
+        mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=N_FFT)
+        order = sorted(range(len(buffers)), key=lambda i: len(buffers[i]))
+        for start in range(0, len(order), max(1, batch_size)):
+            group = [buffers[i] for i in order[start:start + batch_size]]
+            padded = np.zeros((len(group), max(len(b) for b in group)), dtype=np.float32)
+            for row, buffer in zip(padded, group):
+                row[:len(buffer)] = buffer.samples
+            power = batch_power(padded)
+            # librosa.feature.rms from a spectrogram: DC and Nyquist bins count half
+            weighted = power.sum(axis=-1) - 0.5 * (power[..., 0] + power[..., -1])
+            rms = np.sqrt(2.0 * weighted / N_FFT ** 2)
+            mel = np.matmul(power, mel_basis.T).transpose(0, 2, 1)
+            del power
+            # power_to_db, with its 80 dB floor taken per signal rather than per batch
+            log_mel = 10.0 * np.log10(np.maximum(mel, 1e-10))
+            log_mel = np.maximum(log_mel, log_mel.max(axis=(1, 2), keepdims=True) - 80.0)
+            envelope = librosa.onset.onset_strength(S=log_mel, sr=sample_rate, hop_length=HOP_LENGTH)
+            for buffer, buffer_rms, buffer_envelope in zip(group, rms, envelope):
+                frames = 1 + len(buffer) // HOP_LENGTH
+                buffer.__dict__['rms'] = buffer_rms[:frames]
+                buffer.__dict__['onset_envelope'] = buffer_envelope[:frames]
+        return buffers
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds."""
+        return len(self.samples) / self.sample_rate
+
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        """Magnitude STFT, shape (1 + N_FFT // 2, frames)."""
+        return np.abs(librosa.stft(self.samples, n_fft=N_FFT, hop_length=HOP_LENGTH))
+
+    @cached_property
+    def rms(self) -> np.ndarray:
+        """RMS energy per frame."""
+        return librosa.feature.rms(S=self.magnitude, frame_length=N_FFT, hop_length=HOP_LENGTH)[0]
+
+    @cached_property
+    def log_mel(self) -> np.ndarray:
+        """Log-power mel spectrogram (dB), from the shared STFT."""
+        mel = librosa.feature.melspectrogram(S=self.magnitude ** 2, sr=self.sample_rate)
+        return librosa.power_to_db(mel)
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        """Onset strength per frame, from the shared log-mel spectrogram."""
+        return librosa.onset.onset_strength(S=self.log_mel, sr=self.sample_rate, hop_length=HOP_LENGTH)
+
+    @cached_property
+    def onsets(self) -> np.ndarray:
+        """Frame indices of detected onsets."""
+        return librosa.onset.onset_detect(
+            onset_envelope=self.onset_envelope, sr=self.sample_rate, hop_length=HOP_LENGTH
+        )
+
+    @cached_property
+    def speech_intervals(self) -> np.ndarray:
+        """Speech regions as [start, end) sample offsets, from the shared RMS."""
+        return vad.speech_intervals_from_rms(self.rms, len(self), self.sample_rate, hop_length=HOP_LENGTH)
+
+    @property
+    def speech_ratio(self) -> float:
+        """Fraction of the recording that is speech."""
+        return vad.speech_ratio(self.speech_intervals, len(self))
+
+    @property
+    def pauses(self) -> dict:
+        """Pause count and lengths between speech regions."""
+        return vad.pause_stats(self.speech_intervals, len(self), self.sample_rate)
@@ -0,0 +1,430 @@
+import io
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+# WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_EXTENSIBLE
+_WAV_PCM = 0x0001
+_WAV_FLOAT = 0x0003
+_WAV_EXTENSIBLE = 0xFFFE
+
+
+class AudioDecodeError(Exception):
+    """Raised when audio cannot be decoded by any available method."""
+
+
+def _to_mono(samples: np.ndarray, channels: int) -> np.ndarray:
+    if channels <= 1:
+        return samples
+    return samples.reshape(-1, channels).mean(axis=1)
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Resample a mono waveform with a polyphase filter."""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio.astype(np.float32, copy=False)
+    from math import gcd
+    from scipy.signal import resample_poly
+    divisor = gcd(orig_sr, target_sr)
+    resampled = resample_poly(audio, target_sr // divisor, orig_sr // divisor)
+    return resampled.astype(np.float32, copy=False)
+
+
+def _parse_wav_header(data: bytes) -> Optional[Tuple[Tuple[int, int, int, int], int, int]]:
+    """
+    Walk the RIFF chunks up to the start of the sample data.
+
+    Returns:
+        ((format tag, channels, sample rate, bits), data offset, data size),
+        or None if this is not a WAV file or the header is incomplete
+    """
+    if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack_from('<I', data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b'fmt ':
+            if body + 16 > len(data):
+                return None
+            fmt_tag, channels, sample_rate, _, _, bits = struct.unpack_from('<HHIIHH', data, body)
+            if fmt_tag == _WAV_EXTENSIBLE and chunk_size >= 40:
+                if body + 26 > len(data):
+                    return None
+                fmt_tag = struct.unpack_from('<H', data, body + 24)[0]
+            fmt = (fmt_tag, channels, sample_rate, bits)
+        elif chunk_id == b'data' and fmt is not None:
+            return fmt, body, chunk_size
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def parse_wav(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """
+    Decode an uncompressed RIFF/WAVE file straight from memory.
+
+    Args:
+        data: Complete WAV file contents
+
+    Returns:
+        (mono float32 samples, sample rate), or None if this is not a WAV
+        encoding we can read without a codec
+    """
+    header = _parse_wav_header(data)
+    if header is None:
+        return None
+    fmt, body, chunk_size = header
+    # Streaming writers leave the size as 0 or 0xFFFFFFFF; take what is there
+    end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(body + chunk_size, len(data))
+    samples = _pcm_to_float(data[body:end], *fmt)
+    if samples is None:
+        return None
+    return _to_mono(samples, fmt[1]), fmt[2]
+
+
+def _pcm_to_float(raw: bytes, fmt_tag: int, channels: int, sample_rate: int, bits: int) -> Optional[np.ndarray]:
+    width = bits // 8
+    usable = len(raw) - len(raw) % max(width * channels, 1)
+    raw = raw[:usable]
+    if fmt_tag == _WAV_PCM:
+        if bits == 16:
+            return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        if bits == 8:
+            return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        if bits == 32:
+            return (np.frombuffer(raw, dtype='<i4') / 2147483648.0).astype(np.float32)
+        if bits == 24:
+            triplets = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            values = triplets[:, 0] | (triplets[:, 1] << 8) | (triplets[:, 2] << 16)
+            values = np.where(values & 0x800000, values - 0x1000000, values)
+            return values.astype(np.float32) / 8388608.0
+    elif fmt_tag == _WAV_FLOAT:
+        if bits == 32:
+            return np.frombuffer(raw, dtype='<f4').astype(np.float32)
+        if bits == 64:
+            return np.frombuffer(raw, dtype='<f8').astype(np.float32)
+    return None
+
+
+def _ffmpeg_command(input_spec: str, sample_rate: int) -> list:
+    return [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-threads', '0',
+        '-i', input_spec,
+        '-f', 's16le', '-ac', '1', '-ar', str(sample_rate),
+        'pipe:1',
+    ]
+
+
+def decode_with_ffmpeg(data: Optional[bytes] = None, path: Optional[str] = None,
+                       sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode any container/codec ffmpeg understands via pipes, without temp files.
+
+    Args:
+        data: Encoded audio bytes, piped through stdin
+        path: Or a path ffmpeg reads directly (needed for seekable formats
+            such as MP4 with the index at the end)
+        sample_rate: Output sample rate
+
+    Returns:
+        Mono float32 samples
+    """
+    command = _ffmpeg_command(path if path is not None else 'pipe:0', sample_rate)
+    try:
+        completed = subprocess.run(command, input=data, capture_output=True, check=True)
+    except FileNotFoundError as e:
+        raise AudioDecodeError("ffmpeg is not installed") from e
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode(errors='replace').strip() if e.stderr else ''
+        raise AudioDecodeError(f"ffmpeg failed to decode audio: {stderr}") from e
+    return np.frombuffer(completed.stdout, dtype='<i2').astype(np.float32) / 32768.0
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for a compressed stream that arrives in pieces.
+
+    MediaRecorder's WebM/Ogg chunks are not standalone files: only the first
+    one carries the container header. One long-lived ffmpeg process reads
+    every piece on stdin and writes PCM to stdout, where a reader thread
+    collects it until read() hands it out.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._pcm = bytearray()
+        self._cond = threading.Condition()
+        self._finished = False
+        command = [
+            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            '-fflags', 'nobuffer', '-probesize', '32768', '-analyzeduration', '0',
+            '-i', 'pipe:0',
+            '-f', 's16le', '-ac', '1', '-ar', str(sample_rate), '-flush_packets', '1',
+            'pipe:1',
+        ]
+        try:
+            self._process = subprocess.Popen(
+                command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError as e:
+            raise AudioDecodeError("ffmpeg is not installed") from e
+        self._reader = threading.Thread(target=self._read_output, name="ffmpeg-stream-reader", daemon=True)
+        self._reader.start()
+
+    def _read_output(self) -> None:
+        while True:
+            data = self._process.stdout.read1(65536)
+            if not data:
+                break
+            with self._cond:
+                self._pcm.extend(data)
+                self._cond.notify_all()
+        with self._cond:
+            self._finished = True
+            self._cond.notify_all()
+
+    def feed(self, data: bytes) -> None:
+        """Write the next piece of the encoded stream."""
+        try:
+            self._process.stdin.write(data)
+            self._process.stdin.flush()
+        except (BrokenPipeError, ValueError) as e:
+            raise AudioDecodeError("ffmpeg stream decoder has exited") from e
+
+    def read(self, wait: float = 0.0) -> np.ndarray:
+        """
+        Return the samples decoded since the last call.
+
+        Args:
+            wait: Seconds to wait for output when none is ready yet (ffmpeg
+                decodes asynchronously to feed())
+        """
+        with self._cond:
+            if wait > 0 and len(self._pcm) < 2 and not self._finished:
+                self._cond.wait(wait)
+            usable = len(self._pcm) - len(self._pcm) % 2
+            raw = bytes(self._pcm[:usable])
+            del self._pcm[:usable]
+        return np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+
+    def close(self) -> np.ndarray:
+        """End the stream and return whatever was still being decoded."""
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        self._reader.join(timeout=5)
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        return self.read()
+
+
+class BufferedStreamDecoder:
+    """
+    Fallback for StreamDecoder when ffmpeg is unavailable.
+
+    Keeps the encoded stream and decodes it again as a whole on each read,
+    returning only the samples past those already handed out.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._data = bytearray()
+        self._emitted = 0
+
+    def feed(self, data: bytes) -> None:
+        self._data.extend(data)
+
+    def read(self, wait: float = 0.0) -> np.ndarray:
+        samples = decode_audio(bytes(self._data), self.sample_rate)
+        new = samples[self._emitted:]
+        self._emitted = max(self._emitted, len(samples))
+        return new
+
+    def close(self) -> np.ndarray:
+        return self.read() if self._data else np.zeros(0, dtype=np.float32)
+
+
+class WavStreamDecoder:
+    """
+    Incremental decoder for a PCM WAV file that arrives in pieces.
+
+    Parses the header once, then converts each piece's whole frames as it is
+    fed, so neither ffmpeg nor the complete file is needed.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._pending = bytearray()
+        self._fmt = None
+        self._remaining = None   # data bytes left, None when the size is unknown
+        self._resampler = None
+        self._samples = []
+
+    def feed(self, data: bytes) -> None:
+        self._pending.extend(data)
+        if self._fmt is None:
+            header = _parse_wav_header(bytes(self._pending))
+            if header is None:
+                return
+            self._fmt, body, chunk_size = header
+            if self._fmt[0] not in (_WAV_PCM, _WAV_FLOAT):
+                raise AudioDecodeError(f"Unsupported WAV encoding: {self._fmt[0]:#x}")
+            self._remaining = None if chunk_size in (0, 0xFFFFFFFF) else chunk_size
+            del self._pending[:body]
+            if self._fmt[2] != self.sample_rate:
+                # Piecewise resampling needs filter state carried across pieces
+                import soxr
+                self._resampler = soxr.ResampleStream(self._fmt[2], self.sample_rate, 1, dtype='float32')
+
+        fmt_tag, channels, source_rate, bits = self._fmt
+        frame_size = max(bits // 8 * channels, 1)
+        usable = len(self._pending) - len(self._pending) % frame_size
+        if self._remaining is not None:
+            usable = min(usable, self._remaining)
+            self._remaining -= usable
+        if usable <= 0:
+            return
+        samples = _pcm_to_float(bytes(self._pending[:usable]), *self._fmt)
+        del self._pending[:usable]
+        if samples is None:
+            raise AudioDecodeError("Unsupported WAV sample format")
+        self._append(_to_mono(samples, channels).astype(np.float32, copy=False))
+
+    def _append(self, samples: np.ndarray, last: bool = False) -> None:
+        if self._resampler is not None:
+            samples = self._resampler.resample_chunk(samples, last=last)
+        self._samples.append(samples)
+
+    def read(self, wait: float = 0.0) -> np.ndarray:
+        if not self._samples:
+            return np.zeros(0, dtype=np.float32)
+        samples = np.concatenate(self._samples)
+        self._samples = []
+        return samples
+
+    def close(self) -> np.ndarray:
+        if self._resampler is not None:
+            self._append(np.zeros(0, dtype=np.float32), last=True)
+        return self.read()
+
+
+def open_stream_decoder(sample_rate: int = SAMPLE_RATE, header: bytes = b''):
+    """
+    Pick an incremental decoder for a stream.
+
+    Args:
+        sample_rate: Output sample rate
+        header: The first bytes of the stream; a WAV header selects the
+            in-process WAV decoder
+
+    Returns:
+        A WavStreamDecoder, a StreamDecoder (ffmpeg), or a
+        BufferedStreamDecoder if ffmpeg is missing
+    """
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return WavStreamDecoder(sample_rate)
+    if shutil.which('ffmpeg'):
+        return StreamDecoder(sample_rate)
+    logger.warning("ffmpeg not found; streaming audio will be re-decoded from the start on every chunk")
+    return BufferedStreamDecoder(sample_rate)
+
+
+def _decode_in_process(data: bytes, sample_rate: int) -> np.ndarray:
+    import soundfile as sf
+    samples, source_rate = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+    return resample(samples.mean(axis=1), source_rate, sample_rate)
+
+
+def _read_source(source: Any) -> Tuple[Optional[bytes], Optional[str]]:
+    """Return (bytes, path) for a decode source; exactly one is set."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source), None
+    if isinstance(source, (str, os.PathLike)):
+        return None, os.fspath(source)
+    # Django's TemporaryUploadedFile is already on disk
+    temporary_path = getattr(source, 'temporary_file_path', None)
+    if callable(temporary_path):
+        return None, temporary_path()
+    if hasattr(source, 'seek'):
+        try:
+            source.seek(0)
+        except Exception:
+            pass
+    if hasattr(source, 'chunks'):
+        return b''.join(source.chunks()), None
+    if hasattr(source, 'read'):
+        return source.read(), None
+    raise TypeError(f"Cannot decode audio from {type(source).__name__}")
+
+
+def decode_audio(source: Any, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode audio into a mono float32 waveform at `sample_rate`.
+
+    WAV/PCM input is parsed directly with NumPy. Everything else is piped
+    through ffmpeg (stdin to stdout) and, if ffmpeg is unavailable, decoded
+    in-process with soundfile. Nothing is written to disk.
+
+    Args:
+        source: Encoded audio as bytes, a file path, or a file-like object
+            (including Django uploaded files)
+        sample_rate: Output sample rate (Whisper expects 16 kHz)
+
+    Returns:
+        Mono float32 NumPy array
+
+    Raises:
+        AudioDecodeError: if no decoder could read the audio
+    """
+    data, path = _read_source(source)
+
+    if path is not None:
+        if not os.path.exists(path):
+            raise AudioDecodeError(f"File not found: {path}")
+        if os.path.getsize(path) == 0:
+            raise AudioDecodeError("Audio file is empty")
+        with open(path, 'rb') as f:
+            header = f.read(12)
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            with open(path, 'rb') as f:
+                data = f.read()
+    elif not data:
+        raise AudioDecodeError("Audio data is empty")
+
+    if data is not None:
+        parsed = parse_wav(data)
+        if parsed is not None:
+            samples, source_rate = parsed
+            return resample(samples, source_rate, sample_rate)
+
+    errors = []
+    try:
+        return decode_with_ffmpeg(data=data if path is None else None, path=path, sample_rate=sample_rate)
+    except AudioDecodeError as e:
+        errors.append(str(e))
+
+    try:
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        return _decode_in_process(data, sample_rate)
+    except Exception as e:
+        errors.append(f"soundfile failed to decode audio: {e}")
+
+    raise AudioDecodeError("; ".join(errors))
@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingItem:
+    __slots__ = ("key", "payload", "future", "enqueued_at")
+
+    def __init__(self, key: Hashable, payload: Any):
+        self.key = key
+        self.payload = payload
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Collects small jobs from concurrent requests into batches.
+
+    Items sharing a key (model name plus decode options) that arrive within
+    max_wait_ms of the oldest pending item are dispatched together, up to
+    max_batch_size at a time, through submit_batch(key, payloads). That call
+    must return a Future resolving to one result per payload, in order; each
+    result is routed back to the Future its caller is waiting on.
+    """
+
+    def __init__(self, submit_batch: Callable[[Hashable, List[Any]], Future],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 max_pending: Optional[int] = None):
+        self.submit_batch = submit_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_pending = max_pending
+        self._pending: Deque[_PendingItem] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._batches = 0
+        self._items = 0
+        self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+        self._thread.start()
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def submit(self, key: Hashable, payload: Any) -> Future:
+        """Queue a payload and return a Future for its individual result."""
+        item = _PendingItem(key, payload)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Batcher is shut down")
+            if self.max_pending is not None and len(self._pending) >= self.max_pending:
+                raise OverflowError("Batcher queue is full")
+            self._pending.append(item)
+            self._cond.notify()
+        return item.future
+
+    def _take_batch(self) -> Optional[List[_PendingItem]]:
+        """
+        Wait for the next batch; None once shut down with nothing pending.
+
+        Items whose caller cancelled them while queued are dropped (the batch
+        may end up empty), and the rest are marked running so they can no
+        longer be cancelled while Whisper works on them.
+        """
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            key = self._pending[0].key
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while not self._closed:
+                matching = sum(1 for item in self._pending if item.key == key)
+                remaining = deadline - time.monotonic()
+                if matching >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, rest = [], deque()
+            for item in self._pending:
+                if item.key == key and len(batch) < self.max_batch_size:
+                    if item.future.set_running_or_notify_cancel():
+                        batch.append(item)
+                else:
+                    rest.append(item)
+            self._pending = rest
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if batch:
+                self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_PendingItem]) -> None:
+        self._batches += 1
+        self._items += len(batch)
+        try:
+            batch_future = self.submit_batch(batch[0].key, [item.payload for item in batch])
+        except Exception as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return
+
+        def route(f: Future) -> None:
+            error = f.exception()
+            if error is not None:
+                for item in batch:
+                    item.future.set_exception(error)
+                return
+            for item, result in zip(batch, f.result()):
+                item.future.set_result(result)
+
+        batch_future.add_done_callback(route)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
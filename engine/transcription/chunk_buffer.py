@@ -0,0 +1,282 @@
+import atexit
+import logging
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHUNK_FIELDS = ('text', 'words', 'is_final', 'content_hash')
+
+
+class ChunkWriteBuffer:
+    """
+    Write-behind store for one recording's TranscriptionChunk rows.
+
+    A streaming session touches its chunk rows several times per second
+    (claiming each chunk's audio hash, appending committed text). The buffer
+    keeps the rows in memory and writes the changed ones with a single
+    bulk upsert on (recording, sequence_number) once max_pending rows changed
+    or the oldest change is max_age seconds old, and whenever it is flushed
+    explicitly (finalize, shutdown). Status reads use rows() rather than
+    flushing, so polling a live recording does not defeat the batching.
+
+    Rows are written whole, so the buffer loads the recording's existing
+    rows when it is created and is the only writer of streamed chunks while
+    it exists. Like sessions, it lives in this process's memory.
+    """
+
+    def __init__(self, recording, max_pending: int = 10, max_age: float = 5.0):
+        from .models import TranscriptionChunk
+        self.recording = recording
+        self.max_pending = max(1, max_pending)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._dirty: set = set()
+        self._oldest_change: Optional[float] = None
+        self.flushes = 0
+        self._rows: Dict[int, Dict[str, Any]] = {
+            row.pop('sequence_number'): row
+            for row in TranscriptionChunk.objects.filter(recording=recording).values('sequence_number', *CHUNK_FIELDS)
+        }
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def rows(self) -> Dict[int, Dict[str, Any]]:
+        """Copy of every row by sequence number, including unwritten changes."""
+        with self._lock:
+            return {sequence_number: dict(row) for sequence_number, row in self._rows.items()}
+
+    def _row(self, sequence_number: int) -> Dict[str, Any]:
+        return self._rows.setdefault(
+            sequence_number, {'text': '', 'words': [], 'is_final': False, 'content_hash': ''}
+        )
+
+    def _changed_locked(self, sequence_number: int) -> None:
+        self._dirty.add(sequence_number)
+        if self._oldest_change is None:
+            self._oldest_change = time.monotonic()
+
+    def claim(self, sequence_number: int, content_hash: str) -> bool:
+        """
+        Record the hash of the audio received under a sequence number.
+
+        Returns:
+            False if this exact audio was already received, True otherwise
+        """
+        with self._lock:
+            row = self._row(sequence_number)
+            if row['content_hash'] == content_hash:
+                return False
+            row['content_hash'] = content_hash
+            self._changed_locked(sequence_number)
+            return True
+
+    def release(self, sequence_number: int, content_hash: str) -> None:
+        """Forget a claim whose audio could not be used, so a retry is processed."""
+        with self._lock:
+            row = self._rows.get(sequence_number)
+            if row is not None and row['content_hash'] == content_hash:
+                row['content_hash'] = ''
+                self._changed_locked(sequence_number)
+
+    def append(self, sequence_number: int, text: str, words: List[List[Any]], is_final: bool = False) -> bool:
+        """
+        Append committed text to a chunk, flushing if a threshold is reached.
+
+        Returns:
+            True if the buffer was written to the database
+        """
+        with self._lock:
+            row = self._row(sequence_number)
+            row['text'] = f"{row['text']} {text}".strip()
+            row['words'] = row['words'] + words
+            row['is_final'] = row['is_final'] or is_final
+            self._changed_locked(sequence_number)
+            due = (len(self._dirty) >= self.max_pending
+                   or time.monotonic() - self._oldest_change >= self.max_age)
+            if due:
+                self._flush_locked()
+            return due
+
+    def flush(self) -> int:
+        """Write every changed row; returns how many were written."""
+        with self._lock:
+            return self._flush_locked()
+
+    def flush_if_stale(self) -> int:
+        """Write the changed rows if the oldest change is max_age old."""
+        with self._lock:
+            if self._oldest_change is None or time.monotonic() - self._oldest_change < self.max_age:
+                return 0
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        from .models import TranscriptionChunk
+        if not self._dirty:
+            return 0
+        rows = [
+            TranscriptionChunk(recording=self.recording, sequence_number=sequence_number, **self._rows[sequence_number])
+            for sequence_number in sorted(self._dirty)
+        ]
+        TranscriptionChunk.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['recording', 'sequence_number'],
+            update_fields=list(CHUNK_FIELDS),
+        )
+        self._dirty.clear()
+        self._oldest_change = None
+        self.flushes += 1
+        return len(rows)
+
+
+_buffers: Dict[str, ChunkWriteBuffer] = {}
+_buffers_lock = threading.Lock()
+
+_flusher: Optional[threading.Thread] = None
+_stop_flusher = threading.Event()
+
+
+def get_write_buffer(recording) -> ChunkWriteBuffer:
+    """Return the write buffer for a recording, creating it if needed."""
+    from django.conf import settings
+    key = recording.user_identifier
+    with _buffers_lock:
+        buffer = _buffers.get(key)
+    if buffer is not None:
+        return buffer
+    # Load existing rows outside the registry lock
+    buffer = ChunkWriteBuffer(
+        recording,
+        max_pending=getattr(settings, 'TRANSCRIPTION_CHUNK_FLUSH_SIZE', 10),
+        max_age=getattr(settings, 'TRANSCRIPTION_CHUNK_FLUSH_SECONDS', 5.0),
+    )
+    with _buffers_lock:
+        return _buffers.setdefault(key, buffer)
+
+
+def flush_write_buffer(key: str, close: bool = False) -> int:
+    """
+    Write a recording's pending chunks, if it has a buffer in this process.
+
+    Args:
+        key: Client recording identifier
+        close: Also drop the buffer (the recording's session has ended)
+
+    Returns:
+        Number of rows written
+    """
+    with _buffers_lock:
+        buffer = _buffers.pop(key, None) if close else _buffers.get(key)
+    return buffer.flush() if buffer is not None else 0
+
+
+def buffered_rows(key: str) -> Dict[int, Dict[str, Any]]:
+    """
+    A recording's chunk rows as held by its write buffer in this process.
+
+    Args:
+        key: Client recording identifier
+
+    Returns:
+        Rows by sequence number, or {} if the recording has no buffer here
+    """
+    with _buffers_lock:
+        buffer = _buffers.get(key)
+    return buffer.rows() if buffer is not None else {}
+
+
+def flush_all_write_buffers() -> int:
+    """Write every buffer's pending chunks, e.g. before the process exits."""
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    written = 0
+    for buffer in buffers:
+        try:
+            written += buffer.flush()
+        except Exception as e:
+            logger.error(f"Could not flush chunks for {buffer.recording.user_identifier}: {str(e)}")
+    if written:
+        logger.info(f"Flushed {written} buffered transcription chunks")
+    return written
+
+
+def flush_stale_write_buffers() -> int:
+    """Write the pending chunks of buffers whose oldest change is max_age old."""
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    written = 0
+    for buffer in buffers:
+        try:
+            written += buffer.flush_if_stale()
+        except Exception as e:
+            logger.error(f"Could not flush chunks for {buffer.recording.user_identifier}: {str(e)}")
+    return written
+
+
+def _flush_loop(interval: float) -> None:
+    from django.db import close_old_connections
+    while not _stop_flusher.wait(interval):
+        try:
+            flush_stale_write_buffers()
+        finally:
+            close_old_connections()
+
+
+def start_background_flush(interval: Optional[float] = None) -> threading.Thread:
+    """
+    Flush buffers of recordings that stopped sending chunks.
+
+    append() only checks a buffer's age when the next chunk arrives; this
+    thread checks every buffer every `interval` seconds (half of
+    TRANSCRIPTION_CHUNK_FLUSH_SECONDS by default), so no change stays
+    unwritten much longer than that setting.
+    """
+    from django.conf import settings
+    global _flusher
+    if interval is None:
+        interval = max(getattr(settings, 'TRANSCRIPTION_CHUNK_FLUSH_SECONDS', 5.0) / 2, 0.05)
+    with _buffers_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _stop_flusher.clear()
+            _flusher = threading.Thread(target=_flush_loop, args=(interval,), name='chunk-flush', daemon=True)
+            _flusher.start()
+        return _flusher
+
+
+def stop_background_flush() -> None:
+    """Stop the thread started by start_background_flush()."""
+    global _flusher
+    _stop_flusher.set()
+    with _buffers_lock:
+        flusher, _flusher = _flusher, None
+    if flusher is not None:
+        flusher.join()
+
+
+def install_shutdown_flush() -> None:
+    """
+    Flush buffered chunks when the process exits or receives SIGTERM.
+
+    The flush itself runs from the exit hook. On SIGTERM the previous handler
+    (e.g. the server's graceful shutdown) runs, or the process exits with
+    SystemExit so the exit hook runs at all; the handler does not flush
+    itself, since it may interrupt the main thread while that holds a
+    buffer's lock. Signal handlers can only be set from the main thread;
+    elsewhere only the exit hook is installed.
+    """
+    atexit.register(flush_all_write_buffers)
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def on_sigterm(signum, frame):
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, on_sigterm)
@@ -0,0 +1,308 @@
+import asyncio
+import io
+import json
+import logging
+import queue
+import re
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import RequestAborted
+from django.core.handlers.asgi import ASGIHandler
+
+from .audio_decoding import AudioDecodeError
+from .inference import QueueFullError
+from .models import AudioRecording
+from .streaming import close_session, get_session, persist_committed
+
+logger = logging.getLogger(__name__)
+
+# ws/transcription/<recording_id>/
+TRANSCRIPTION_PATH = re.compile(r"^/?ws/transcription/(?P<recording_id>[^/]+)/?$")
+# Raw-body uploads to this path are streamed to the view as they arrive
+UPLOAD_PATH = re.compile(r"^/?api/transcription/upload-complete/?$")
+RAW_UPLOAD_CONTENT_TYPES = ('application/octet-stream', 'audio/')
+# Body pieces buffered between the event loop and the view's thread
+UPLOAD_QUEUE_PIECES = 8
+
+
+def _get_recording(recording_id: str) -> AudioRecording:
+    recording, created = AudioRecording.objects.get_or_create(user_identifier=recording_id)
+    if created:
+        logger.info(f"Created new recording for user_id: {recording_id}")
+    return recording
+
+
+def _finalize(recording: AudioRecording) -> Optional[Dict[str, Any]]:
+    from .views import finalize_recording
+    return finalize_recording(recording)
+
+
+class TranscriptionConsumer:
+    """
+    One WebSocket connection streaming a recording's audio.
+
+    The client sends raw binary audio frames (MediaRecorder chunks or WAV
+    files) with no base64 or JSON wrapping. After each transcription pass the
+    server pushes {"type": "partial", "transcript", "committed", "tentative"}.
+    Sending the text frame {"type": "finalize"} returns {"type": "final", ...}
+    with the finalize response and closes the socket; a socket closed without
+    it is finalized server-side.
+
+    Frames are decoded and transcribed in worker threads, so many connections
+    share one ASGI worker and only the transcription itself waits on Whisper.
+    """
+
+    def __init__(self, scope: Dict[str, Any], receive, send, recording_id: str):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.recording_id = recording_id
+        query = parse_qs(scope.get("query_string", b"").decode())
+        self.standalone_frames = query.get("format", [""])[0].lower() == "wav"
+        self.recording = None
+        self.session = None
+        self.sequence_number = 0
+        self._pass: Optional[asyncio.Task] = None
+        self._last_sent = None
+        self._finalized = False
+
+    async def run(self) -> None:
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        self.recording = await sync_to_async(_get_recording)(self.recording_id)
+        self.session = get_session(self.recording_id)
+        await self.send({"type": "websocket.accept"})
+
+        try:
+            while True:
+                message = await self.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    await self.on_audio(message["bytes"])
+                elif message.get("text"):
+                    if await self.on_text(message["text"]):
+                        break
+        finally:
+            if not self._finalized:
+                await self.finalize()
+
+    async def on_audio(self, data: bytes) -> None:
+        self.sequence_number += 1
+        standalone = self.standalone_frames or data[:4] == b'RIFF'
+        try:
+            await sync_to_async(self.session.add_chunk, thread_sensitive=False)(
+                data, self.sequence_number, standalone=standalone
+            )
+        except AudioDecodeError as e:
+            logger.error(f"Could not decode frame {self.sequence_number} for {self.recording_id}: {str(e)}")
+            return
+        # One pass at a time; frames that arrive meanwhile are picked up by the next one
+        if self._pass is None or self._pass.done():
+            self._pass = asyncio.ensure_future(self.run_pass())
+
+    async def run_pass(self) -> None:
+        try:
+            update = await sync_to_async(self.session.process, thread_sensitive=False)()
+        except QueueFullError as e:
+            await self.send_json({"type": "busy", "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            logger.error(f"Transcription pass failed for {self.recording_id}: {str(e)}")
+            return
+        if update["newly_committed"]:
+            await sync_to_async(persist_committed, thread_sensitive=False)(
+                self.recording, update["sequence_number"], update["newly_committed"],
+                words=update["newly_committed_words"]
+            )
+        if update["text"] != self._last_sent:
+            self._last_sent = update["text"]
+            await self.send_json({
+                "type": "partial",
+                "recording_id": self.recording_id,
+                "transcript": update["text"],
+                "committed": update["committed"],
+                "tentative": update["tentative"],
+                "sequence_number": update["sequence_number"],
+            })
+
+    async def on_text(self, text: str) -> bool:
+        """Handle a control message; returns True when the socket should close."""
+        try:
+            message = json.loads(text)
+        except json.JSONDecodeError:
+            await self.send_json({"type": "error", "error": "Invalid JSON control message"})
+            return False
+        if message.get("type") == "finalize":
+            result = await self.finalize()
+            await self.send_json({"type": "final", **(result or {"recording_id": self.recording_id, "transcript": ""})})
+            await self.send({"type": "websocket.close", "code": 1000})
+            return True
+        await self.send_json({"type": "error", "error": f"Unknown message type: {message.get('type')}"})
+        return False
+
+    async def finalize(self) -> Optional[Dict[str, Any]]:
+        self._finalized = True
+        if self._pass is not None:
+            await self._pass
+        try:
+            return await sync_to_async(_finalize, thread_sensitive=False)(self.recording)
+        except Exception as e:
+            logger.error(f"Error finalizing {self.recording_id}: {str(e)}")
+            close_session(self.recording_id)
+            return None
+
+    async def send_json(self, data: Dict[str, Any]) -> None:
+        try:
+            await self.send({"type": "websocket.send", "text": json.dumps(data)})
+        except Exception as e:
+            # The client may already have gone away
+            logger.debug(f"Could not send to {self.recording_id}: {str(e)}")
+
+
+async def websocket_application(scope, receive, send) -> None:
+    """ASGI entry point for WebSocket connections."""
+    match = TRANSCRIPTION_PATH.match(scope["path"])
+    if match is None:
+        message = await receive()
+        if message["type"] == "websocket.connect":
+            await send({"type": "websocket.close", "code": 4404})
+        return
+    await TranscriptionConsumer(scope, receive, send, match.group("recording_id")).run()
+
+
+def is_raw_upload(scope) -> bool:
+    """True for a POST of a raw audio body to the complete-upload endpoint."""
+    if scope["type"] != "http" or scope["method"] != "POST" or not UPLOAD_PATH.match(scope["path"]):
+        return False
+    content_type = dict(scope["headers"]).get(b"content-type", b"").decode("latin-1").lower()
+    return content_type.startswith(RAW_UPLOAD_CONTENT_TYPES)
+
+
+class UploadBody(io.RawIOBase):
+    """
+    Body of a raw upload, read by the view while the client is still sending it.
+
+    The event loop hands each http.request message over through a bounded
+    queue, so a client uploading faster than the audio can be decoded and
+    transcribed is slowed down rather than buffered. Once the client
+    disconnects, reading raises RequestAborted and aborted() is True.
+    """
+
+    _ABORTED = object()
+
+    def __init__(self, max_pieces: int = UPLOAD_QUEUE_PIECES):
+        super().__init__()
+        self._pieces: queue.Queue = queue.Queue(maxsize=max_pieces)
+        self._pending = b""
+        self._aborted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def aborted(self) -> bool:
+        return self._aborted
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            if self._aborted:
+                raise RequestAborted("Client disconnected during the upload")
+            piece = self._pieces.get()
+            if piece is None:
+                return 0
+            if piece is self._ABORTED:
+                raise RequestAborted("Client disconnected during the upload")
+            self._pending = piece
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    async def _put(self, piece) -> None:
+        # Nobody reads once the view has returned (and the body was closed)
+        while not self.closed:
+            try:
+                self._pieces.put_nowait(piece)
+                return
+            except queue.Full:
+                await asyncio.sleep(0.01)
+
+    async def receive_from(self, receive) -> None:
+        """
+        Feed the body from ASGI messages, then wait for the client to go away.
+
+        Raises:
+            RequestAborted: when the client disconnects
+        """
+        try:
+            message = await receive()
+            while message["type"] != "http.disconnect":
+                if message.get("body"):
+                    await self._put(message["body"])
+                if not message.get("more_body", False):
+                    await self._put(None)
+                    message = await receive()
+                    if message["type"] != "http.disconnect":
+                        raise AssertionError(f"Invalid ASGI message after request body: {message['type']}")
+                    break
+                message = await receive()
+            raise RequestAborted()
+        finally:
+            # Disconnected, or cancelled once the response was sent: a view
+            # still reading stops instead of waiting for more body
+            self._abort()
+
+    def _abort(self) -> None:
+        self._aborted = True
+        try:
+            self._pieces.put_nowait(self._ABORTED)
+        except queue.Full:
+            # The reader is not blocked and checks the flag first
+            pass
+
+
+class UploadASGIHandler(ASGIHandler):
+    """
+    Django's ASGI handler, streaming raw-body complete uploads to the view.
+
+    Django reads the whole body before calling a view. For raw uploads
+    (is_raw_upload) this hands the view an UploadBody instead, filled as
+    http.request messages arrive, so the upload is decoded and transcribed
+    while it is received. The request otherwise goes through Django as usual:
+    middleware (CORS, CSRF, sessions, auth), URL routing and the request
+    signals that close stale database connections. A client that disconnects
+    mid-upload aborts the view and nothing is saved.
+    """
+
+    async def handle(self, scope, receive, send):
+        if is_raw_upload(scope):
+            # Per-request state travels with receive: the handler is shared
+            receive_message = receive
+
+            async def receive():
+                return await receive_message()
+
+            receive.upload_body = UploadBody()
+        await super().handle(scope, receive, send)
+
+    async def read_body(self, receive):
+        body = getattr(receive, "upload_body", None)
+        if body is None:
+            return await super().read_body(receive)
+        return body
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None and isinstance(body_file, UploadBody):
+            request.upload_body = body_file
+        return request, error_response
+
+    async def listen_for_disconnect(self, receive):
+        body = getattr(receive, "upload_body", None)
+        if body is None:
+            return await super().listen_for_disconnect(receive)
+        # The body is still arriving while the view runs
+        await body.receive_from(receive)
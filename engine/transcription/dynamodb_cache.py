@@ -0,0 +1,164 @@
+import copy
+import functools
+import logging
+import threading
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+
+class _Flight:
+    """One in-progress load that concurrent readers of the same key wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _cache():
+    from django.core.cache import caches
+    from django.conf import settings
+    return caches[getattr(settings, 'DYNAMODB_CACHE_ALIAS', 'default')]
+
+
+def _ttl() -> float:
+    from django.conf import settings
+    return getattr(settings, 'DYNAMODB_CACHE_TTL', 60)
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _generation(cache, table: str) -> str:
+    """
+    Current version token of a table's cached entries.
+
+    Every cached key of the table embeds the token, so replacing it drops
+    the collection and all per-item entries at once. A read that raced a
+    write stores its result under the old token, where nothing looks.
+    """
+    key = f"dynamodb:{table}:generation"
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        token = cache.get(key)
+    return token
+
+
+def read_through(table: str, name: str, load: Callable[[], Any]) -> Any:
+    """
+    Return a cached read of a table, calling `load` on a miss.
+
+    Concurrent misses for the same entry in this process share one call to
+    `load` (single flight), so an expired collection is read from DynamoDB
+    once rather than by every waiting request. Errors raised by `load` are
+    not cached and reach every caller waiting for it.
+
+    Args:
+        table: DynamoDB table the entry is read from
+        name: Entry within the table, e.g. "all" or "id:<id>"
+        load: Reads the value from DynamoDB; may return None (not found)
+
+    Returns:
+        The value, freshly loaded or a copy of the cached one
+    """
+    ttl = _ttl()
+    if not ttl:
+        return load()
+    try:
+        cache = _cache()
+        key = f"dynamodb:{table}:{_generation(cache, table)}:{name}"
+        entry = cache.get(key)
+    except Exception as e:
+        logger.warning(f"DynamoDB cache lookup failed for {table} {name}: {str(e)}")
+        _count('errors')
+        return load()
+    if entry is not None:
+        _count('hits')
+        return entry['value']
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+    if not leader:
+        _count('coalesced')
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.value)
+
+    _count('misses')
+    try:
+        flight.value = load()
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+    try:
+        # Wrapped so that a cached None (not found) differs from a miss
+        cache.set(key, {'value': flight.value}, timeout=ttl)
+    except Exception as e:
+        logger.warning(f"DynamoDB cache store failed for {table} {name}: {str(e)}")
+        _count('errors')
+    return copy.deepcopy(flight.value)
+
+
+def invalidate(table: str) -> None:
+    """Drop every cached read of a table; call after each write to it."""
+    _count('invalidations')
+    try:
+        _cache().set(f"dynamodb:{table}:generation", uuid.uuid4().hex, timeout=None)
+    except Exception as e:
+        logger.warning(f"DynamoDB cache invalidation failed for {table}: {str(e)}")
+        _count('errors')
+
+
+def invalidates(table: str) -> Callable:
+    """Decorate a write function so the table's cache is dropped once it returns or fails."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidate(table)
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    """
+    Return counters of this process's cached DynamoDB reads.
+
+    hit_rate is the share of reads that did not go to DynamoDB: cache hits
+    plus reads that waited for another request's load (coalesced).
+    """
+    with _stats_lock:
+        hits, misses, coalesced = _stats['hits'], _stats['misses'], _stats['coalesced']
+        reads = hits + misses + coalesced
+        return {
+            'hits': hits,
+            'misses': misses,
+            'coalesced': coalesced,
+            'invalidations': _stats['invalidations'],
+            'errors': _stats['errors'],
+            'hit_rate': round((hits + coalesced) / reads, 3) if reads else 0.0,
+            'ttl': _ttl(),
+        }
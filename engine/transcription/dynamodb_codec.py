@@ -0,0 +1,157 @@
+import dataclasses
+import math
+import typing
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Numeric attributes: whole numbers come back as int, others as float
+Number = Union[int, float]
+
+
+def encode_number(value: Any) -> str:
+    """
+    Format a number for a DynamoDB N attribute without losing precision.
+
+    Floats go through Decimal(repr(value)), the shortest string that reads
+    back as the same float, rather than str() or int() truncation.
+    """
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"DynamoDB numbers must be finite, got {value!r}")
+        return str(Decimal(repr(value)))
+    # Decimal, or a numeric string from a JSON body
+    number = Decimal(value)
+    if not number.is_finite():
+        raise ValueError(f"DynamoDB numbers must be finite, got {value!r}")
+    return str(number)
+
+
+def decode_number(text: str) -> Number:
+    """Parse a DynamoDB N attribute: int when it is a whole number, else float."""
+    if "." in text or "e" in text or "E" in text:
+        number = Decimal(text)
+        if number == number.to_integral_value():
+            return int(number)
+        return float(number)
+    return int(text)
+
+
+class ItemCodec:
+    """
+    Converts between JSON-style dicts and DynamoDB items for one record type.
+
+    The schema is a dataclass: str fields are S attributes, int/float/Number
+    fields N attributes and dataclass fields nested M maps. Fields typed
+    Optional[...] are left out of the item when missing (and out of the
+    decoded dict when the item lacks them); the others are always written,
+    with the field default standing in for missing values.
+    """
+
+    def __init__(self, record_type: type):
+        self.record_type = record_type
+        self.fields = []
+        hints = typing.get_type_hints(record_type)
+        for field in dataclasses.fields(record_type):
+            hint = hints[field.name]
+            optional = type(None) in typing.get_args(hint)
+            if optional:
+                hint = next(arg for arg in typing.get_args(hint) if arg is not type(None))
+            default = None if field.default is dataclasses.MISSING else field.default
+            kind = self._kind(hint)
+            nested = ItemCodec(hint) if kind == "M" else None
+            self.fields.append((field.name, kind, optional, default, nested))
+        self.attributes = [name for name, *_ in self.fields]
+
+    @staticmethod
+    def _kind(hint: Any) -> str:
+        if dataclasses.is_dataclass(hint):
+            return "M"
+        if hint is str:
+            return "S"
+        if hint in (int, float, Number, Decimal):
+            return "N"
+        raise TypeError(f"No DynamoDB type for {hint!r}")
+
+    def encode(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode a dict into a DynamoDB item."""
+        item = {}
+        for name, kind, optional, default, nested in self.fields:
+            value = data.get(name)
+            if kind == "M":
+                if value:
+                    item[name] = {"M": nested.encode(value)}
+                continue
+            if value is None:
+                if optional:
+                    continue
+                value = default
+            item[name] = {kind: encode_number(value) if kind == "N" else value}
+        return item
+
+    def decode(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Decode a DynamoDB item into a dict."""
+        data = {}
+        for name, kind, optional, default, nested in self.fields:
+            value = item.get(name)
+            if value is None:
+                if not optional:
+                    data[name] = default
+            elif kind == "M":
+                data[name] = nested.decode(value["M"])
+            elif kind == "N":
+                data[name] = decode_number(value["N"])
+            else:
+                data[name] = value["S"]
+        return data
+
+    def encode_many(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Encode a list of dicts into DynamoDB items."""
+        return [self.encode(record) for record in records]
+
+    def decode_many(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Decode a list of DynamoDB items into dicts."""
+        return [self.decode(item) for item in items]
+
+
+@dataclasses.dataclass(slots=True)
+class Responses:
+    interests: Optional[str] = None
+    careerGoals: Optional[str] = None
+    transcription: Optional[str] = None
+
+
+@dataclasses.dataclass(slots=True)
+class Candidate:
+    id: str
+    name: str = ""
+    email: str = ""
+    education: str = ""
+    experience: Number = 0
+    timestamp: int = 0
+    fluencyScore: Optional[Number] = None
+    interpersonalScore: Optional[Number] = None
+    interestsScore: Optional[Number] = None
+    careerGoalsScore: Optional[Number] = None
+    pythonScore: Optional[Number] = None
+    javaScore: Optional[Number] = None
+    awsScore: Optional[Number] = None
+    cppScore: Optional[Number] = None
+    responses: Optional[Responses] = None
+
+
+@dataclasses.dataclass(slots=True)
+class Referer:
+    id: str
+    name: str = ""
+    role: str = ""
+    image: str = ""
+    about: str = ""
+    requirement: str = ""
+
+
+CANDIDATE_CODEC = ItemCodec(Candidate)
+REFERER_CODEC = ItemCodec(Referer)
@@ -0,0 +1,159 @@
+import bisect
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+
+class FakeDynamoDBClient:
+    """
+    In-memory stand-in for the DynamoDB client calls used by dynamodb_utils.
+
+    Scans behave like DynamoDB's: pages stop at 1 MB of item data (or Limit
+    items), items are split between parallel scan segments by a hash of
+    their key, and ProjectionExpression is applied.
+    """
+
+    PAGE_BYTES = 1024 * 1024
+
+    def __init__(self, latency=0.0, unprocessed_rate=0.0):
+        self.tables = {}
+        self.indexes = {}
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        # Seconds per call, and the share of batch writes left unprocessed
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.random = random.Random(0)
+
+    def count(self, operation):
+        with self.lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create_table(self, TableName, KeySchema, AttributeDefinitions, ProvisionedThroughput,
+                     GlobalSecondaryIndexes=()):
+        self.count('create_table')
+        self.tables[TableName] = {}
+        self.indexes[TableName] = {index['IndexName']: index['KeySchema'] for index in GlobalSecondaryIndexes}
+
+    def get_waiter(self, name):
+        return mock.Mock()
+
+    def describe_table(self, TableName):
+        self.count('describe_table')
+        if TableName not in self.tables:
+            raise ClientError({'Error': {'Code': 'ResourceNotFoundException'}}, 'DescribeTable')
+        indexes = [{'IndexName': name, 'KeySchema': schema} for name, schema in self.indexes.get(TableName, {}).items()]
+        return {'Table': {'TableName': TableName, 'TableStatus': 'ACTIVE', 'GlobalSecondaryIndexes': indexes}}
+
+    def update_table(self, TableName, AttributeDefinitions, GlobalSecondaryIndexUpdates):
+        self.count('update_table')
+        for update in GlobalSecondaryIndexUpdates:
+            index = update['Create']
+            self.indexes.setdefault(TableName, {})[index['IndexName']] = index['KeySchema']
+
+    @staticmethod
+    def matches(item, expression, names, values):
+        """Evaluate `#a op :b AND ...` conditions against an item."""
+        for condition in expression.split(' AND '):
+            name, operator, placeholder = condition.split()
+            attribute, expected = item.get(names[name]), values[placeholder]
+            if attribute is None:
+                return False
+            if 'N' in expected:
+                actual, expected = float(attribute['N']), float(expected['N'])
+            else:
+                actual, expected = attribute['S'], expected['S']
+            if not {'=': actual == expected, '>=': actual >= expected, '<=': actual <= expected,
+                    '>': actual > expected, '<': actual < expected}[operator]:
+                return False
+        return True
+
+    def query(self, TableName, IndexName, KeyConditionExpression, ExpressionAttributeNames,
+              ExpressionAttributeValues, ScanIndexForward=True, Limit=None, ExclusiveStartKey=None,
+              FilterExpression=None):
+        self.count('query')
+        schema = self.indexes[TableName][IndexName]
+        key_names = [key['AttributeName'] for key in schema] + ['id']
+
+        def position(item):
+            return tuple(float(item[name]['N']) if 'N' in item[name] else item[name]['S'] for name in key_names)
+
+        items = sorted((item for item in self.tables.get(TableName, {}).values()
+                        if all(name in item for name in key_names)
+                        and self.matches(item, KeyConditionExpression, ExpressionAttributeNames,
+                                         ExpressionAttributeValues)),
+                       key=position, reverse=not ScanIndexForward)
+        if ExclusiveStartKey:
+            start = position(ExclusiveStartKey)
+            items = [item for item in items if (position(item) < start) == (not ScanIndexForward)
+                     and position(item) != start]
+        evaluated = items[:Limit] if Limit else items
+        response = {'Items': [item for item in evaluated if not FilterExpression or self.matches(
+            item, FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues)]}
+        if Limit and len(items) > Limit:
+            response['LastEvaluatedKey'] = {name: evaluated[-1][name] for name in key_names}
+        return response
+
+    def put_item(self, TableName, Item):
+        self.count('put_item')
+        self.tables.setdefault(TableName, {})[Item['id']['S']] = Item
+
+    def get_item(self, TableName, Key):
+        self.count('get_item')
+        item = self.tables.get(TableName, {}).get(Key['id']['S'])
+        return {'Item': item} if item else {}
+
+    def delete_item(self, TableName, Key):
+        self.count('delete_item')
+        self.tables.setdefault(TableName, {}).pop(Key['id']['S'], None)
+
+    def batch_write_item(self, RequestItems):
+        self.count('batch_write_item')
+        unprocessed = {}
+        for table_name, requests in RequestItems.items():
+            assert len(requests) <= 25
+            table = self.tables.setdefault(table_name, {})
+            for request in requests:
+                with self.lock:
+                    throttled = self.random.random() < self.unprocessed_rate
+                if throttled:
+                    unprocessed.setdefault(table_name, []).append(request)
+                elif 'PutRequest' in request:
+                    item = request['PutRequest']['Item']
+                    table[item['id']['S']] = item
+                else:
+                    table.pop(request['DeleteRequest']['Key']['id']['S'], None)
+        return {'UnprocessedItems': unprocessed}
+
+    def scan(self, TableName, Segment=0, TotalSegments=1, Limit=None, ExclusiveStartKey=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None):
+        self.count('scan')
+        keys = sorted(key for key in self.tables.get(TableName, {})
+                      if zlib.crc32(key.encode()) % TotalSegments == Segment)
+        if ExclusiveStartKey:
+            keys = keys[bisect.bisect_right(keys, ExclusiveStartKey['id']['S']):]
+        attributes = None
+        if ProjectionExpression:
+            attributes = [ExpressionAttributeNames.get(name.strip(), name.strip())
+                          for name in ProjectionExpression.split(',')]
+        items, size = [], 0
+        for key in keys:
+            item = self.tables[TableName][key]
+            if attributes:
+                item = {name: value for name, value in item.items() if name in attributes}
+            items.append(item)
+            size += len(json.dumps(item))
+            if size >= self.PAGE_BYTES or len(items) == Limit:
+                break
+        response = {'Items': items, 'Count': len(items)}
+        if items and items[-1]['id']['S'] != keys[-1]:
+            response['LastEvaluatedKey'] = {'id': items[-1]['id']}
+        return response
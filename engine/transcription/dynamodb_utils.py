@@ -1,9 +1,19 @@
 import uuid
+import base64
+import hashlib
 import json
 import os
-from datetime import datetime
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import logging
-from botocore.exceptions import ClientError  # Added import for proper exception handling
+from botocore.exceptions import BotoCoreError, ClientError  # Added import for proper exception handling
+from .dynamodb_cache import invalidates, read_through
+from .dynamodb_codec import CANDIDATE_CODEC, REFERER_CODEC, encode_number
+from .memory_store import InMemoryStore
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,47 +26,165 @@ except ImportError:
     logger.warning("boto3 package not found. DynamoDB features will be disabled.")
     DYNAMODB_AVAILABLE = False
 
-# Mock data storage for use when DynamoDB is not available
-MOCK_CANDIDATES = []
-MOCK_REFERERS = []
+# Directory the in-memory tables (used when DynamoDB is not available) are
+# loaded from and saved to on exit, so their data survives restarts
+MEMORY_SNAPSHOT_DIR = os.environ.get('DYNAMODB_MEMORY_SNAPSHOT_DIR', '')
+
+# Connection pool size of the shared client; at least the number of threads
+# that call DynamoDB at once (request threads, scan segments, batch writers)
+MAX_POOL_CONNECTIONS = int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '50'))
+
+_client = None
+_client_lock = threading.Lock()
+_local_warning_logged = False
+
+# Tables known to exist, so each is described (or created) once per process
+_verified_tables = set()
+_tables_lock = threading.Lock()
 
 # For local development, connect to DynamoDB local
 def get_dynamodb_client():
+    """
+    Return the process-wide DynamoDB client, creating it on first use.
+    
+    boto3 clients are thread-safe, and building one costs tens of
+    milliseconds, so every caller shares one client and its connection pool.
+    """
+    global _client, _local_warning_logged
     if not DYNAMODB_AVAILABLE:
         return None
-        
-    try:
-        # Check if running locally with Docker or in production
-        if os.environ.get('AWS_EXECUTION_ENV') is None:
-            # For local environment, just use in-memory storage
+    
+    # Check if running locally with Docker or in production
+    if os.environ.get('AWS_EXECUTION_ENV') is None:
+        # For local environment, just use in-memory storage
+        if not _local_warning_logged:
             logger.warning("Running in local environment, using in-memory storage instead of DynamoDB")
-            return None
-        else:
-            # Production environment
-            return boto3.client('dynamodb')
-    except Exception as e:
-        logger.error(f"Error connecting to DynamoDB: {str(e)}")
+            _local_warning_logged = True
         return None
+    
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    # Production environment
+                    from botocore.config import Config
+                    _client = boto3.session.Session().client('dynamodb', config=Config(
+                        max_pool_connections=MAX_POOL_CONNECTIONS,
+                        tcp_keepalive=True,
+                        # Client-side rate limiting on throttling, on top of retries
+                        retries={'max_attempts': 10, 'mode': 'adaptive'}
+                    ))
+                except Exception as e:
+                    logger.error(f"Error connecting to DynamoDB: {str(e)}")
+                    return None
+    return _client
 
-def create_candidates_table_if_not_exists():
-    """Create the Candidates table if it doesn't exist"""
+# Global secondary indexes of the Candidates table: name -> (partition key,
+# sort key). The key attributes are derived from the candidate when it is
+# saved (see candidate_index_attributes) and left out when they would be
+# empty, so each index only holds the candidates it can answer for.
+CANDIDATE_INDEXES = {
+    # Newest candidates of a month ('YYYY-MM' of the timestamp)
+    'by-created': ('createdMonth', 'timestamp'),
+    # Strongest candidates by their best technical skill
+    'by-top-skill': ('topSkill', 'topSkillScore'),
+    # Lookup by lower-cased email
+    'by-email': ('emailKey', None),
+}
+INDEX_ATTRIBUTE_TYPES = {
+    'createdMonth': 'S',
+    'timestamp': 'N',
+    'topSkill': 'S',
+    'topSkillScore': 'N',
+    'emailKey': 'S'
+}
+
+def _index_definitions(indexes):
+    """Build GlobalSecondaryIndexes and their AttributeDefinitions for create_table."""
+    definitions = []
+    attributes = []
+    for index_name, (partition_key, sort_key) in indexes.items():
+        key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+        if sort_key:
+            key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+        for attribute in (partition_key, sort_key):
+            if attribute and attribute not in attributes:
+                attributes.append(attribute)
+        definitions.append({
+            'IndexName': index_name,
+            'KeySchema': key_schema,
+            'Projection': {'ProjectionType': 'ALL'},
+            'ProvisionedThroughput': {
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        })
+    return definitions, [
+        {'AttributeName': attribute, 'AttributeType': INDEX_ATTRIBUTE_TYPES[attribute]} for attribute in attributes
+    ]
+
+def _add_missing_indexes(client, table_name, table, indexes):
+    """
+    Start creating indexes an existing table lacks.
+    
+    DynamoDB builds one new index per UpdateTable call, so when several are
+    missing the rest are requested on later startups.
+    """
+    existing = {index['IndexName'] for index in table.get('GlobalSecondaryIndexes', [])}
+    definitions, attributes = _index_definitions(indexes)
+    for definition in definitions:
+        if definition['IndexName'] in existing:
+            continue
+        try:
+            client.update_table(
+                TableName=table_name,
+                AttributeDefinitions=attributes,
+                GlobalSecondaryIndexUpdates=[{'Create': definition}]
+            )
+            logger.info(f"Creating index {definition['IndexName']} on {table_name}")
+        except Exception as e:
+            logger.warning(f"Could not create index {definition['IndexName']} on {table_name}: {str(e)}")
+        return
+
+def create_table_if_not_exists(table_name, indexes=None):
+    """
+    Create a table keyed by a string id if it doesn't exist.
+    
+    The check runs once per process; later calls return immediately.
+    
+    Args:
+        table_name: Table to check or create
+        indexes: Global secondary indexes as {name: (partition key, sort
+            key or None)}; missing ones are added to an existing table
+    """
+    if table_name in _verified_tables:
+        return
     client = get_dynamodb_client()
     if not client:
         logger.warning("DynamoDB client not available. Skipping table creation.")
         return
     
-    # Check if table exists
-    try:
-        client.describe_table(TableName='Candidates')
-        logger.info("Candidates table already exists")
-        return
-    except Exception as e:
-        # Table doesn't exist or other error, create it
-        logger.info("Creating Candidates table")
+    with _tables_lock:
+        if table_name in _verified_tables:
+            return
         
+        # Check if table exists
         try:
-            response = client.create_table(
-                TableName='Candidates',
+            table = client.describe_table(TableName=table_name)['Table']
+            logger.info(f"{table_name} table already exists")
+            if indexes:
+                _add_missing_indexes(client, table_name, table, indexes)
+            _verified_tables.add(table_name)
+            return
+        except Exception as e:
+            # Table doesn't exist or other error, create it
+            logger.info(f"Creating {table_name} table")
+        
+        try:
+            definitions, attributes = _index_definitions(indexes or {})
+            extra = {'GlobalSecondaryIndexes': definitions} if definitions else {}
+            client.create_table(
+                TableName=table_name,
                 KeySchema=[
                     {
                         'AttributeName': 'id',
@@ -68,19 +196,313 @@ def create_candidates_table_if_not_exists():
                         'AttributeName': 'id',
                         'AttributeType': 'S'
                     }
-                ],
+                ] + attributes,
                 ProvisionedThroughput={
                     'ReadCapacityUnits': 5,
                     'WriteCapacityUnits': 5
-                }
+                },
+                **extra
             )
             
             # Wait for table creation
-            client.get_waiter('table_exists').wait(TableName='Candidates')
-            logger.info("Candidates table created successfully")
+            client.get_waiter('table_exists').wait(TableName=table_name)
+            logger.info(f"{table_name} table created successfully")
+            _verified_tables.add(table_name)
         except Exception as create_err:
             logger.error(f"Error creating DynamoDB table: {str(create_err)}")
 
+def create_candidates_table_if_not_exists():
+    """Create the Candidates table and its indexes if they don't exist"""
+    create_table_if_not_exists('Candidates', CANDIDATE_INDEXES)
+
+def create_referers_table_if_not_exists():
+    """Create the Referers table if it doesn't exist"""
+    create_table_if_not_exists('Referers')
+
+def verify_tables():
+    """Check (or create) every table once, at startup, when DynamoDB is in use."""
+    if get_dynamodb_client() is None:
+        return
+    create_candidates_table_if_not_exists()
+    create_referers_table_if_not_exists()
+
+# Parallel scan segments used to read a whole table
+SCAN_SEGMENTS = int(os.environ.get('DYNAMODB_SCAN_SEGMENTS', '4'))
+
+# Attributes the dashboard reads (everything get_all_candidates returns)
+CANDIDATE_FIELDS = CANDIDATE_CODEC.attributes
+REFERER_FIELDS = REFERER_CODEC.attributes
+
+def projection(attributes):
+    """
+    Build ProjectionExpression arguments for a list of attribute names.
+    
+    Names are always aliased, since several (name, role, timestamp) are
+    DynamoDB reserved words.
+    """
+    names = {f'#p{i}': attribute for i, attribute in enumerate(attributes)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+def _scan_segment(client, request, segment, total_segments):
+    """Yield the pages of one scan segment, following LastEvaluatedKey."""
+    request = dict(request)
+    if total_segments > 1:
+        request.update(Segment=segment, TotalSegments=total_segments)
+    while True:
+        response = client.scan(**request)
+        yield response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        request['ExclusiveStartKey'] = last_key
+
+def scan_items(client, table_name, attributes=None, segments=1, page_size=None):
+    """
+    Yield every item of a table, reading all pages of a (parallel) scan.
+    
+    A single Scan call stops at 1 MB of data; this follows LastEvaluatedKey
+    until the table is exhausted. With segments > 1 the table is split into
+    that many segments scanned concurrently on a thread pool, and items are
+    yielded as pages arrive, so callers can process them while later pages
+    are still being read.
+    
+    Args:
+        client: boto3 DynamoDB client
+        table_name: Table to scan
+        attributes: Attribute names to fetch (all when None)
+        segments: Number of parallel scan segments
+        page_size: Items per Scan call (Limit), or None for 1 MB pages
+        
+    Yields:
+        Items in DynamoDB attribute-value format, in no particular order
+    """
+    request = {'TableName': table_name}
+    if attributes:
+        request.update(projection(attributes))
+    if page_size:
+        request['Limit'] = page_size
+    
+    if segments <= 1:
+        for page in _scan_segment(client, request, 0, 1):
+            yield from page
+        return
+    
+    # Bounded so a slow consumer holds back the scanners instead of
+    # buffering the whole table
+    pages = queue.Queue(maxsize=segments * 2)
+    stop = threading.Event()
+    done = object()
+    
+    def offer(page):
+        """Queue a page unless the consumer has gone away."""
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def scan_segment(segment):
+        try:
+            for page in _scan_segment(client, request, segment, segments):
+                if not offer(page):
+                    return
+        except Exception as e:
+            offer(e)
+        finally:
+            offer(done)
+    
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix=f'scan-{table_name}') as pool:
+        for segment in range(segments):
+            pool.submit(scan_segment, segment)
+        try:
+            remaining = segments
+            while remaining:
+                page = pages.get()
+                if page is done:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            # Consumer stopped early or a segment failed: release the scanners
+            stop.set()
+
+# Technical skills candidates are ranked by, and their score attributes
+SKILL_FIELDS = {
+    'python': 'pythonScore',
+    'java': 'javaScore',
+    'aws': 'awsScore',
+    'cpp': 'cppScore'
+}
+# Largest page a query endpoint returns
+MAX_PAGE_SIZE = 100
+
+def candidate_index_attributes(candidate_data):
+    """
+    Derive the index key attributes of a candidate.
+    
+    Attributes that would be empty are left out (index keys may not be
+    empty strings), so the candidate is simply absent from that index.
+    """
+    attributes = {}
+    if candidate_data.get('timestamp'):
+        created = datetime.fromtimestamp(candidate_data['timestamp'] / 1000, tz=timezone.utc)
+        attributes['createdMonth'] = {'S': created.strftime('%Y-%m')}
+    scores = {
+        skill: candidate_data[field] for skill, field in SKILL_FIELDS.items()
+        if candidate_data.get(field) is not None
+    }
+    if scores:
+        top_skill = max(scores, key=lambda skill: float(scores[skill]))
+        attributes['topSkill'] = {'S': top_skill}
+        attributes['topSkillScore'] = {'N': encode_number(scores[top_skill])}
+    email = (candidate_data.get('email') or '').strip().lower()
+    if email:
+        attributes['emailKey'] = {'S': email}
+    return attributes
+
+def candidate_to_item(candidate_data):
+    """Convert candidate data to a Candidates item, with its index keys"""
+    item = CANDIDATE_CODEC.encode(candidate_data)
+    item.update(candidate_index_attributes(candidate_data))
+    return item
+
+def encode_cursor(position):
+    """Make an opaque, URL-safe pagination cursor from a key or offset."""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Reverse encode_cursor; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _index_values(candidate):
+    """Plain values of a candidate's index keys, for the in-memory fallback."""
+    values = {'timestamp': float(candidate.get('timestamp') or 0)}
+    for attribute, value in candidate_index_attributes(candidate).items():
+        values[attribute] = float(value['N']) if 'N' in value else value['S']
+    return values
+
+def _snapshot_path(table_name):
+    return os.path.join(MEMORY_SNAPSHOT_DIR, f'{table_name}.json') if MEMORY_SNAPSHOT_DIR else None
+
+# Tables used when DynamoDB is not available, with the same keys and indexes
+MEMORY_CANDIDATES = InMemoryStore(CANDIDATE_CODEC, CANDIDATE_INDEXES, _index_values, _snapshot_path('Candidates'))
+MEMORY_REFERERS = InMemoryStore(REFERER_CODEC, snapshot_path=_snapshot_path('Referers'))
+
+def save_memory_snapshots():
+    """Write the in-memory tables to DYNAMODB_MEMORY_SNAPSHOT_DIR, if it is set"""
+    for store in (MEMORY_CANDIDATES, MEMORY_REFERERS):
+        try:
+            store.save_snapshot()
+        except Exception as e:
+            logger.error(f"Could not save in-memory table to {store.snapshot_path}: {str(e)}")
+
+def query_candidates(index, key, min_score=None, min_experience=None, limit=20, cursor=None, descending=True):
+    """
+    Query one page of candidates from a secondary index.
+    
+    Reads at most `limit` items per call, so the cost depends on the page
+    size rather than the table size.
+    
+    Args:
+        index: Name in CANDIDATE_INDEXES
+        key: Partition key value (month, skill or email)
+        min_score: Lowest sort key value (e.g. skill score), if any
+        min_experience: Filter on years of experience, if any
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: Cursor returned with the previous page
+        descending: Highest sort key (newest, best score) first
+        
+    Returns:
+        (candidates, next cursor or None)
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    position = decode_cursor(cursor) if cursor else None
+    
+    client = get_dynamodb_client()
+    if not client:
+        # In-memory storage: the same index, paged by the last position read
+        logger.warning("Using in-memory storage to query candidate data")
+        _, sort_key = CANDIDATE_INDEXES[index]
+        candidates, last = MEMORY_CANDIDATES.query(
+            index, key, min_sort=float(min_score) if min_score is not None and sort_key else None,
+            descending=descending, limit=limit, after=position.get('after') if position else None,
+            predicate=None if min_experience is None
+            else lambda c: float(c.get('experience') or 0) >= float(min_experience)
+        )
+        return candidates, encode_cursor({'after': list(last)}) if last else None
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    partition_key, sort_key = CANDIDATE_INDEXES[index]
+    names = {'#pk': partition_key}
+    values = {':pk': {'S': key}}
+    condition = '#pk = :pk'
+    if min_score is not None and sort_key:
+        names['#sk'] = sort_key
+        values[':sk'] = {'N': encode_number(min_score)}
+        condition += ' AND #sk >= :sk'
+    request = {
+        'TableName': 'Candidates',
+        'IndexName': index,
+        'KeyConditionExpression': condition,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': not descending
+    }
+    if min_experience is not None:
+        names['#experience'] = 'experience'
+        values[':experience'] = {'N': encode_number(min_experience)}
+        request['FilterExpression'] = '#experience >= :experience'
+    if position:
+        request['ExclusiveStartKey'] = position['key']
+    
+    # A filter can leave a page short: keep reading, never past the limit
+    candidates = []
+    while True:
+        request['Limit'] = limit - len(candidates)
+        response = client.query(**request)
+        candidates.extend(CANDIDATE_CODEC.decode_many(response.get('Items', [])))
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key or len(candidates) >= limit:
+            break
+        request['ExclusiveStartKey'] = last_key
+    return candidates, encode_cursor({'key': last_key}) if last_key else None
+
+def backfill_candidate_indexes():
+    """
+    Rewrite candidates saved before the indexes existed with their index keys.
+    
+    Returns:
+        Number of candidates rewritten
+    """
+    client = get_dynamodb_client()
+    if not client:
+        return 0
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    requests = [
+        {'PutRequest': {'Item': candidate_to_item(CANDIDATE_CODEC.decode(item))}}
+        for item in scan_items(client, 'Candidates', segments=SCAN_SEGMENTS)
+        if not any(attribute in item for attribute in ('createdMonth', 'topSkill', 'emailKey'))
+    ]
+    failed = batch_write(client, 'Candidates', requests)
+    return len(requests) - len(failed)
+
+@invalidates('Candidates')
 def save_candidate(candidate_data):
     """Save candidate data to DynamoDB"""
     # Generate a unique ID if not provided
@@ -94,7 +516,7 @@ def save_candidate(candidate_data):
     if not client:
         # Use in-memory storage as fallback
         logger.warning("Using in-memory storage for candidate data")
-        MOCK_CANDIDATES.append(candidate_data.copy())
+        MEMORY_CANDIDATES.put(candidate_data)
         return candidate_data['id']
     
     # Ensure table exists
@@ -102,53 +524,7 @@ def save_candidate(candidate_data):
     
     try:
         # Convert to DynamoDB format
-        item = {
-            'id': {'S': candidate_data['id']},
-            'name': {'S': candidate_data.get('name', '')},
-            'email': {'S': candidate_data.get('email', '')},
-            'education': {'S': candidate_data.get('education', '')},
-            'experience': {'N': str(candidate_data.get('experience', 0))},
-            'timestamp': {'N': str(candidate_data.get('timestamp', int(datetime.now().timestamp() * 1000)))}
-        }
-        
-        # Add optional fields if they exist
-        if 'fluencyScore' in candidate_data:
-            item['fluencyScore'] = {'N': str(candidate_data['fluencyScore'])}
-        
-        if 'interpersonalScore' in candidate_data:
-            item['interpersonalScore'] = {'N': str(candidate_data['interpersonalScore'])}
-        
-        if 'interestsScore' in candidate_data:
-            item['interestsScore'] = {'N': str(candidate_data['interestsScore'])}
-        
-        if 'careerGoalsScore' in candidate_data:
-            item['careerGoalsScore'] = {'N': str(candidate_data['careerGoalsScore'])}
-        
-        if 'pythonScore' in candidate_data:
-            item['pythonScore'] = {'N': str(candidate_data['pythonScore'])}
-        
-        if 'javaScore' in candidate_data:
-            item['javaScore'] = {'N': str(candidate_data['javaScore'])}
-        
-        if 'awsScore' in candidate_data:
-            item['awsScore'] = {'N': str(candidate_data['awsScore'])}
-        
-        if 'cppScore' in candidate_data:
-            item['cppScore'] = {'N': str(candidate_data['cppScore'])}
-        
-        # Add responses as a map if they exist
-        if 'responses' in candidate_data and candidate_data['responses']:
-            item['responses'] = {'M': {}}
-            responses = candidate_data['responses']
-            
-            if 'interests' in responses:
-                item['responses']['M']['interests'] = {'S': responses['interests']}
-            
-            if 'careerGoals' in responses:
-                item['responses']['M']['careerGoals'] = {'S': responses['careerGoals']}
-            
-            if 'transcription' in responses:
-                item['responses']['M']['transcription'] = {'S': responses['transcription']}
+        item = candidate_to_item(candidate_data)
         
         # Save to DynamoDB
         client.put_item(
@@ -160,7 +536,7 @@ def save_candidate(candidate_data):
     except Exception as e:
         logger.error(f"Error saving to DynamoDB: {str(e)}")
         # Fallback to in-memory storage
-        MOCK_CANDIDATES.append(candidate_data.copy())
+        MEMORY_CANDIDATES.put(candidate_data)
         return candidate_data['id']
 
 def get_all_candidates():
@@ -169,82 +545,162 @@ def get_all_candidates():
     if not client:
         # Return in-memory data if DynamoDB is not available
         logger.warning("Using in-memory storage to retrieve candidate data")
-        return MOCK_CANDIDATES
+        return MEMORY_CANDIDATES.all()
     
     # Ensure table exists
     create_candidates_table_if_not_exists()
     
     try:
-        # Scan the table to get all items
-        response = client.scan(TableName='Candidates')
+        return read_through('Candidates', 'all', lambda: list(iter_candidates(client)))
+    except Exception as e:
+        logger.error(f"Error retrieving from DynamoDB: {str(e)}")
+        # Return in-memory data as fallback
+        return MEMORY_CANDIDATES.all()
+
+def iter_candidates(client=None, segments=None, fields=None):
+    """
+    Yield all candidates as regular JSON, streaming a parallel scan.
+    
+    Only the attributes the dashboard uses are fetched, or just `fields`
+    (see parse_candidate_fields) when given. Falls back to the in-memory
+    data when DynamoDB is not available.
+    """
+    client = client or get_dynamodb_client()
+    if not client:
+        for candidate in MEMORY_CANDIDATES.all():
+            yield select_fields(candidate, fields)
+        return
+    
+    for item in scan_items(client, 'Candidates', fields or CANDIDATE_FIELDS, segments or SCAN_SEGMENTS):
+        yield select_fields(CANDIDATE_CODEC.decode(item), fields)
+
+def stream_candidates(fields=None):
+    """
+    Like get_all_candidates, but yield candidates while the scan reads them.
+    
+    Meant for writing a large response out as it is produced; an error
+    part way through is raised to the caller instead of falling back.
+    Pages go straight from the scan to the caller and are never cached:
+    caching would hold the whole table in memory at once.
+    """
+    client = get_dynamodb_client()
+    if client:
+        # Ensure table exists
+        create_candidates_table_if_not_exists()
+    return iter_candidates(client, fields=fields)
+
+def parse_candidate_fields(fields):
+    """
+    Parse a comma-separated ?fields= list of candidate attributes.
+    
+    The id is always included so a row can be expanded later. Raises
+    ValueError for unknown attributes.
+    
+    Returns:
+        List of attribute names, or None for all of them
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CANDIDATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown candidate fields: {', '.join(unknown)}")
+    return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+def select_fields(record, fields):
+    """Keep only the given attributes of a record (all when fields is None)."""
+    if fields is None:
+        return record
+    return {name: record[name] for name in fields if name in record}
+
+def list_candidates(limit=20, cursor=None, fields=None):
+    """
+    Read one page of all candidates, in table order.
+    
+    Unlike get_all_candidates this reads at most `limit` items, and only
+    the requested attributes, so a list view can page through compact rows
+    and fetch the response texts of one candidate with get_candidate_by_id.
+    
+    Args:
+        limit: Page size (capped at MAX_PAGE_SIZE)
+        cursor: Cursor returned with the previous page
+        fields: Attributes to return, from parse_candidate_fields (all when None)
         
-        # Convert from DynamoDB format to regular JSON
+    Returns:
+        (candidates, next cursor or None)
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    position = decode_cursor(cursor) if cursor else None
+    
+    client = get_dynamodb_client()
+    if not client:
+        # In-memory storage: key order, paged by the last id read
+        logger.warning("Using in-memory storage to list candidate data")
+        candidates, last = MEMORY_CANDIDATES.scan(limit, after=position.get('after') if position else None)
+        return [select_fields(c, fields) for c in candidates], encode_cursor({'after': last}) if last else None
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    def load():
+        request = {'TableName': 'Candidates'}
+        request.update(projection(fields or CANDIDATE_FIELDS))
+        if position:
+            request['ExclusiveStartKey'] = position['key']
+        
+        # A page can end early at 1 MB: keep reading, never past the limit
         candidates = []
-        for item in response.get('Items', []):
-            candidate = {
-                'id': item.get('id', {}).get('S', ''),
-                'name': item.get('name', {}).get('S', ''),
-                'email': item.get('email', {}).get('S', ''),
-                'education': item.get('education', {}).get('S', ''),
-                'experience': int(item.get('experience', {}).get('N', '0')),
-                'timestamp': int(item.get('timestamp', {}).get('N', '0'))
+        while True:
+            request['Limit'] = limit - len(candidates)
+            response = client.scan(**request)
+            candidates.extend(select_fields(CANDIDATE_CODEC.decode(item), fields) for item in response.get('Items', []))
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key or len(candidates) >= limit:
+                break
+            request['ExclusiveStartKey'] = last_key
+        return candidates, encode_cursor({'key': last_key}) if last_key else None
+    
+    # Pages are at most MAX_PAGE_SIZE compact rows, small enough to cache
+    page = hashlib.blake2b(f"{limit}|{cursor or ''}|{','.join(fields or [])}".encode(), digest_size=10).hexdigest()
+    return read_through('Candidates', f'page:{page}', load)
+
+def get_candidate_by_id(candidate_id):
+    """Get a candidate, with its response texts, from DynamoDB by ID"""
+    client = get_dynamodb_client()
+    if not client:
+        # Use in-memory storage as fallback
+        logger.warning("Using in-memory storage to retrieve candidate data")
+        return MEMORY_CANDIDATES.get(candidate_id)
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    def load():
+        response = client.get_item(
+            TableName='Candidates',
+            Key={
+                'id': {'S': candidate_id}
             }
-            
-            # Add optional fields if they exist
-            if 'fluencyScore' in item:
-                candidate['fluencyScore'] = int(item['fluencyScore']['N'])
-            
-            if 'interpersonalScore' in item:
-                candidate['interpersonalScore'] = int(item['interpersonalScore']['N'])
-            
-            if 'interestsScore' in item:
-                candidate['interestsScore'] = int(item['interestsScore']['N'])
-            
-            if 'careerGoalsScore' in item:
-                candidate['careerGoalsScore'] = int(item['careerGoalsScore']['N'])
-            
-            if 'pythonScore' in item:
-                candidate['pythonScore'] = int(item['pythonScore']['N'])
-            
-            if 'javaScore' in item:
-                candidate['javaScore'] = int(item['javaScore']['N'])
-            
-            if 'awsScore' in item:
-                candidate['awsScore'] = int(item['awsScore']['N'])
-            
-            if 'cppScore' in item:
-                candidate['cppScore'] = int(item['cppScore']['N'])
-            
-            # Add responses if they exist
-            if 'responses' in item:
-                candidate['responses'] = {}
-                responses = item['responses']['M']
-                
-                if 'interests' in responses:
-                    candidate['responses']['interests'] = responses['interests']['S']
-                
-                if 'careerGoals' in responses:
-                    candidate['responses']['careerGoals'] = responses['careerGoals']['S']
-                
-                if 'transcription' in responses:
-                    candidate['responses']['transcription'] = responses['transcription']['S']
-            
-            candidates.append(candidate)
-        
-        return candidates
+        )
+        if 'Item' not in response:
+            return None
+        return CANDIDATE_CODEC.decode(response['Item'])
+    
+    try:
+        return read_through('Candidates', f'id:{candidate_id}', load)
     except Exception as e:
         logger.error(f"Error retrieving from DynamoDB: {str(e)}")
-        # Return in-memory data as fallback
-        return MOCK_CANDIDATES
+        # Try in-memory data as fallback
+        return MEMORY_CANDIDATES.get(candidate_id)
 
+@invalidates('Candidates')
 def delete_candidate(candidate_id):
     """Delete a candidate from DynamoDB by ID"""
     client = get_dynamodb_client()
     if not client:
         # Use in-memory storage as fallback
         logger.warning("Using in-memory storage to delete candidate data")
-        global MOCK_CANDIDATES
-        MOCK_CANDIDATES = [c for c in MOCK_CANDIDATES if c.get('id') != candidate_id]
+        MEMORY_CANDIDATES.delete(candidate_id)
         return True
     
     # Ensure table exists
@@ -272,49 +728,7 @@ def delete_candidate(candidate_id):
         logger.error(f"Error deleting from DynamoDB: {str(e)}")
         return False
 
-def create_referers_table_if_not_exists():
-    """Create the Referers table if it doesn't exist"""
-    client = get_dynamodb_client()
-    if not client:
-        logger.warning("DynamoDB client not available. Skipping table creation.")
-        return
-    
-    # Check if table exists
-    try:
-        client.describe_table(TableName='Referers')
-        logger.info("Referers table already exists")
-        return
-    except Exception as e:
-        # Table doesn't exist or other error, create it
-        logger.info("Creating Referers table")
-        
-        try:
-            response = client.create_table(
-                TableName='Referers',
-                KeySchema=[
-                    {
-                        'AttributeName': 'id',
-                        'KeyType': 'HASH'  # Partition key
-                    }
-                ],
-                AttributeDefinitions=[
-                    {
-                        'AttributeName': 'id',
-                        'AttributeType': 'S'
-                    }
-                ],
-                ProvisionedThroughput={
-                    'ReadCapacityUnits': 5,
-                    'WriteCapacityUnits': 5
-                }
-            )
-            
-            # Wait for table creation
-            client.get_waiter('table_exists').wait(TableName='Referers')
-            logger.info("Referers table created successfully")
-        except Exception as create_err:
-            logger.error(f"Error creating DynamoDB table: {str(create_err)}")
-
+@invalidates('Referers')
 def save_referer(referer_data):
     """Save referer data to DynamoDB"""
     # Generate a unique ID if not provided
@@ -325,7 +739,7 @@ def save_referer(referer_data):
     if not client:
         # Use in-memory storage as fallback
         logger.warning("Using in-memory storage for referer data")
-        MOCK_REFERERS.append(referer_data.copy())
+        MEMORY_REFERERS.put(referer_data)
         return referer_data['id']
     
     # Ensure table exists
@@ -333,14 +747,7 @@ def save_referer(referer_data):
     
     try:
         # Convert to DynamoDB format
-        item = {
-            'id': {'S': referer_data['id']},
-            'name': {'S': referer_data.get('name', '')},
-            'role': {'S': referer_data.get('role', '')},
-            'image': {'S': referer_data.get('image', '')},
-            'about': {'S': referer_data.get('about', '')},
-            'requirement': {'S': referer_data.get('requirement', '')}
-        }
+        item = REFERER_CODEC.encode(referer_data)
         
         # Save to DynamoDB
         client.put_item(
@@ -352,7 +759,7 @@ def save_referer(referer_data):
     except Exception as e:
         logger.error(f"Error saving to DynamoDB: {str(e)}")
         # Fallback to in-memory storage
-        MOCK_REFERERS.append(referer_data.copy())
+        MEMORY_REFERERS.put(referer_data)
         return referer_data['id']
 
 def get_all_referers():
@@ -361,34 +768,27 @@ def get_all_referers():
     if not client:
         # Return in-memory data if DynamoDB is not available
         logger.warning("Using in-memory storage to retrieve referer data")
-        return MOCK_REFERERS
+        return MEMORY_REFERERS.all()
     
     # Ensure table exists
     create_referers_table_if_not_exists()
     
     try:
-        # Scan the table to get all items
-        response = client.scan(TableName='Referers')
-        
-        # Convert from DynamoDB format to regular JSON
-        referers = []
-        for item in response.get('Items', []):
-            referer = {
-                'id': item.get('id', {}).get('S', ''),
-                'name': item.get('name', {}).get('S', ''),
-                'role': item.get('role', {}).get('S', ''),
-                'image': item.get('image', {}).get('S', ''),
-                'about': item.get('about', {}).get('S', ''),
-                'requirement': item.get('requirement', {}).get('S', '')
-            }
-            
-            referers.append(referer)
-        
-        return referers
+        return read_through('Referers', 'all', lambda: list(iter_referers(client)))
     except Exception as e:
         logger.error(f"Error retrieving from DynamoDB: {str(e)}")
         # Return in-memory data as fallback
-        return MOCK_REFERERS
+        return MEMORY_REFERERS.all()
+
+def iter_referers(client=None, segments=None):
+    """Yield all referers as regular JSON, streaming a parallel scan."""
+    client = client or get_dynamodb_client()
+    if not client:
+        yield from MEMORY_REFERERS.all()
+        return
+    
+    for item in scan_items(client, 'Referers', REFERER_FIELDS, segments or SCAN_SEGMENTS):
+        yield REFERER_CODEC.decode(item)
 
 def get_referer_by_id(referer_id):
     """Get a referer from DynamoDB by ID"""
@@ -396,15 +796,12 @@ def get_referer_by_id(referer_id):
     if not client:
         # Use in-memory storage as fallback
         logger.warning("Using in-memory storage to retrieve referer data")
-        for referer in MOCK_REFERERS:
-            if referer['id'] == referer_id:
-                return referer
-        return None
+        return MEMORY_REFERERS.get(referer_id)
     
     # Ensure table exists
     create_referers_table_if_not_exists()
     
-    try:
+    def load():
         # Get the item by ID
         response = client.get_item(
             TableName='Referers',
@@ -418,33 +815,24 @@ def get_referer_by_id(referer_id):
             return None
         
         # Convert from DynamoDB format to regular JSON
-        item = response['Item']
-        referer = {
-            'id': item.get('id', {}).get('S', ''),
-            'name': item.get('name', {}).get('S', ''),
-            'role': item.get('role', {}).get('S', ''),
-            'image': item.get('image', {}).get('S', ''),
-            'about': item.get('about', {}).get('S', ''),
-            'requirement': item.get('requirement', {}).get('S', '')
-        }
-        
-        return referer
+        return REFERER_CODEC.decode(response['Item'])
+    
+    try:
+        # Cached, so re-reading a referer (e.g. before an image upload) is free
+        return read_through('Referers', f'id:{referer_id}', load)
     except Exception as e:
         logger.error(f"Error retrieving from DynamoDB: {str(e)}")
         # Try in-memory data as fallback
-        for referer in MOCK_REFERERS:
-            if referer['id'] == referer_id:
-                return referer
-        return None
+        return MEMORY_REFERERS.get(referer_id)
 
+@invalidates('Referers')
 def delete_referer(referer_id):
     """Delete a referer from DynamoDB by ID"""
     client = get_dynamodb_client()
     if not client:
         # Use in-memory storage as fallback
         logger.warning("Using in-memory storage to delete referer data")
-        global MOCK_REFERERS
-        MOCK_REFERERS = [r for r in MOCK_REFERERS if r['id'] != referer_id]
+        MEMORY_REFERERS.delete(referer_id)
         return True
     
     # Ensure table exists
@@ -462,4 +850,165 @@ def delete_referer(referer_id):
         return True
     except Exception as e:
         logger.error(f"Error deleting from DynamoDB: {str(e)}")
-        return False 
\ No newline at end of file
+        return False 
+# BatchWriteItem accepts at most 25 put/delete requests
+BATCH_WRITE_SIZE = 25
+# Batches sent at once by the bulk save/delete functions
+BATCH_WRITE_CONCURRENCY = int(os.environ.get('DYNAMODB_BATCH_CONCURRENCY', '4'))
+# Attempts for a batch whose items keep coming back unprocessed, and the
+# first retry's maximum delay in seconds (doubling on each retry)
+BATCH_WRITE_MAX_ATTEMPTS = 8
+BATCH_WRITE_BACKOFF = 0.05
+
+def _request_id(request):
+    """Id of the record a put/delete request writes."""
+    if 'PutRequest' in request:
+        return request['PutRequest']['Item']['id']['S']
+    return request['DeleteRequest']['Key']['id']['S']
+
+def _write_batch(client, table_name, requests):
+    """
+    Send one BatchWriteItem, retrying unprocessed items with backoff.
+    
+    DynamoDB returns items it could not write (throttling, partition limits)
+    as UnprocessedItems; those are resent after an exponentially growing,
+    jittered delay. A failed call fails the batch's remaining requests
+    rather than raising, so the other batches' outcomes are still reported.
+    
+    Returns:
+        {'id', 'error'} for each request not written
+    """
+    for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, min(BATCH_WRITE_BACKOFF * 2 ** (attempt - 1), 5.0)))
+        try:
+            response = client.batch_write_item(RequestItems={table_name: requests})
+        except (ClientError, BotoCoreError) as e:
+            logger.error(f"BatchWriteItem to {table_name} failed: {str(e)}")
+            return [{'id': _request_id(request), 'error': str(e)} for request in requests]
+        requests = response.get('UnprocessedItems', {}).get(table_name, [])
+        if not requests:
+            return []
+    error = f'Still unprocessed after {BATCH_WRITE_MAX_ATTEMPTS} attempts'
+    return [{'id': _request_id(request), 'error': error} for request in requests]
+
+def batch_write(client, table_name, requests, concurrency=None):
+    """
+    Write many put/delete requests with concurrent BatchWriteItem calls.
+    
+    Args:
+        client: boto3 DynamoDB client
+        table_name: Table to write to
+        requests: {'PutRequest': ...} / {'DeleteRequest': ...} entries, at
+            most one per key
+        concurrency: Batches in flight at once
+        
+    Returns:
+        {'id', 'error'} for each request that could not be written
+    """
+    batches = [requests[i:i + BATCH_WRITE_SIZE] for i in range(0, len(requests), BATCH_WRITE_SIZE)]
+    if not batches:
+        return []
+    workers = min(concurrency or BATCH_WRITE_CONCURRENCY, len(batches))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'batch-{table_name}') as pool:
+        results = pool.map(lambda batch: _write_batch(client, table_name, batch), batches)
+        failed = [failure for failures in results for failure in failures]
+    if failed:
+        logger.error(f"{len(failed)} of {len(requests)} writes to {table_name} were not processed")
+    return failed
+
+def _unique_by_id(records):
+    """Keep the last record for each id (a batch may not repeat a key)."""
+    return list({record['id']: record for record in records}.values())
+
+@invalidates('Candidates')
+def save_candidates_batch(candidates):
+    """
+    Save many candidates to DynamoDB with batched writes.
+    
+    Returns:
+        (ids of the saved candidates in input order, {'id', 'error'} for
+        each candidate that could not be saved)
+    """
+    for candidate_data in candidates:
+        if 'id' not in candidate_data:
+            candidate_data['id'] = str(uuid.uuid4())
+        if not candidate_data.get('timestamp'):
+            candidate_data['timestamp'] = int(datetime.now().timestamp() * 1000)
+    ids = [candidate_data['id'] for candidate_data in candidates]
+    
+    client = get_dynamodb_client()
+    if not client:
+        # Use in-memory storage as fallback
+        logger.warning("Using in-memory storage for candidate data")
+        MEMORY_CANDIDATES.put_many(candidates)
+        return ids, []
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    requests = [{'PutRequest': {'Item': candidate_to_item(candidate_data)}} for candidate_data in _unique_by_id(candidates)]
+    failures = batch_write(client, 'Candidates', requests)
+    failed = {failure['id'] for failure in failures}
+    return [candidate_id for candidate_id in ids if candidate_id not in failed], failures
+
+@invalidates('Candidates')
+def delete_candidates_batch(candidate_ids):
+    """Delete many candidates from DynamoDB by ID; returns {'id', 'error'} for each one not deleted"""
+    client = get_dynamodb_client()
+    if not client:
+        # Use in-memory storage as fallback
+        logger.warning("Using in-memory storage to delete candidate data")
+        MEMORY_CANDIDATES.delete_many(candidate_ids)
+        return []
+    
+    # Ensure table exists
+    create_candidates_table_if_not_exists()
+    
+    requests = [{'DeleteRequest': {'Key': {'id': {'S': candidate_id}}}} for candidate_id in dict.fromkeys(candidate_ids)]
+    return batch_write(client, 'Candidates', requests)
+
+@invalidates('Referers')
+def save_referers_batch(referers):
+    """
+    Save many referers to DynamoDB with batched writes.
+    
+    Returns:
+        (ids of the saved referers in input order, {'id', 'error'} for
+        each referer that could not be saved)
+    """
+    for referer_data in referers:
+        if 'id' not in referer_data:
+            referer_data['id'] = str(uuid.uuid4())
+    ids = [referer_data['id'] for referer_data in referers]
+    
+    client = get_dynamodb_client()
+    if not client:
+        # Use in-memory storage as fallback
+        logger.warning("Using in-memory storage for referer data")
+        MEMORY_REFERERS.put_many(referers)
+        return ids, []
+    
+    # Ensure table exists
+    create_referers_table_if_not_exists()
+    
+    requests = [{'PutRequest': {'Item': REFERER_CODEC.encode(referer_data)}} for referer_data in _unique_by_id(referers)]
+    failures = batch_write(client, 'Referers', requests)
+    failed = {failure['id'] for failure in failures}
+    return [referer_id for referer_id in ids if referer_id not in failed], failures
+
+@invalidates('Referers')
+def delete_referers_batch(referer_ids):
+    """Delete many referers from DynamoDB by ID; returns {'id', 'error'} for each one not deleted"""
+    client = get_dynamodb_client()
+    if not client:
+        # Use in-memory storage as fallback
+        logger.warning("Using in-memory storage to delete referer data")
+        MEMORY_REFERERS.delete_many(referer_ids)
+        return []
+    
+    # Ensure table exists
+    create_referers_table_if_not_exists()
+    
+    requests = [{'DeleteRequest': {'Key': {'id': {'S': referer_id}}}} for referer_id in dict.fromkeys(referer_ids)]
+    return batch_write(client, 'Referers', requests)
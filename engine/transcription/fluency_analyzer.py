@@ -1,45 +1,68 @@
 import numpy as np
-import librosa
 import whisper
 import re
-from typing import Dict, Any, Optional
-
-_model = None
+from typing import Dict, Any, Iterable, Optional, Sequence, Union
+from django.core.exceptions import RequestAborted
+from .model_registry import get_registry
+from .audio_decoding import SAMPLE_RATE
+from .audio_buffer import AudioBuffer
+from .inference import QueueFullError, transcribe
+from .speech_metrics import FILLER_WORDS
+from .streaming import StreamingSession
+from . import vad
 
 def get_model(model_name: str = "base") -> Optional[whisper.Whisper]:
-    """Get or load the Whisper model."""
-    global _model
-    if _model is None:
-        try:
-            _model = whisper.load_model(model_name)
-        except Exception as e:
-            print(f"Error loading Whisper model: {e}")
-            return None
-    return _model
+    """Get the named Whisper model from the process-wide registry."""
+    try:
+        return get_registry().get(model_name)
+    except Exception as e:
+        print(f"Error loading Whisper model: {e}")
+        return None
+
+# One row of FluencyAnalyzer.analyze_batch output
+BATCH_METRICS_DTYPE = np.dtype([
+    ("overall_score", np.float32),
+    ("speech_rate", np.float32),
+    ("rhythm_score", np.float32),
+    ("accuracy_score", np.float32),
+    ("duration", np.float32),
+    ("onset_count", np.int32),
+    ("speech_ratio", np.float32),
+    ("pause_count", np.int32),
+    ("mean_pause_seconds", np.float32),
+    ("longest_pause_seconds", np.float32),
+])
 
 class FluencyAnalyzer:
     def __init__(self):
-        self.model = get_model()
-        self.filler_words = ["um", "uh", "hmm", "like", "you know", "so", "actually", "basically", "literally"]
-    
-    def analyze(self, audio: np.ndarray, sr: int) -> Dict[str, float]:
+        self.filler_words = list(FILLER_WORDS)
+
+    @property
+    def model(self) -> Optional[whisper.Whisper]:
+        """Whisper model, resolved lazily so text-only analysis never loads it."""
+        return get_model()
+
+    def analyze(self, audio: Union[np.ndarray, AudioBuffer, "FluencyAccumulator"], sr: Optional[int] = None) -> Dict[str, float]:
         """
         Analyze audio for fluency metrics.
         
         Args:
-            audio: Audio signal as numpy array
-            sr: Sample rate
+            audio: AudioBuffer or FluencyAccumulator, or audio signal as numpy array
+            sr: Sample rate of a numpy array (ignored otherwise)
             
         Returns:
             Dictionary containing fluency metrics
         """
         try:
+            # Wrap raw arrays so features share one STFT
+            if isinstance(audio, np.ndarray):
+                audio = AudioBuffer(audio, sr or SAMPLE_RATE)
+            
             # Calculate speech rate (syllables per second)
-            duration = len(audio) / sr
-            speech_rate = self._calculate_speech_rate(audio, sr)
+            speech_rate = self._calculate_speech_rate(audio)
             
             # Calculate rhythm score based on pause patterns
-            rhythm_score = self._calculate_rhythm_score(audio, sr)
+            rhythm_score = self._calculate_rhythm_score(audio)
             
             # Calculate accuracy score (placeholder - would need ASR for real implementation)
             accuracy_score = 0.8  # Placeholder value
@@ -63,6 +86,39 @@ class FluencyAnalyzer:
                 "accuracy_score": 0.0
             }
     
+    def analyze_batch(self, signals: Sequence[np.ndarray], sr: Optional[int] = None,
+                      batch_size: int = 4) -> np.ndarray:
+        """
+        Analyze many recordings in one call.
+        
+        Features are computed for batches of similar-length signals at once
+        (see AudioBuffer.batch), then scored exactly as analyze() would.
+        
+        Args:
+            signals: Audio signals as numpy arrays
+            sr: Sample rate shared by all signals (16 kHz if omitted)
+            batch_size: Signals per padded STFT batch
+            
+        Returns:
+            Structured array of BATCH_METRICS_DTYPE, one row per signal
+        """
+        results = np.zeros(len(signals), dtype=BATCH_METRICS_DTYPE)
+        buffers = AudioBuffer.batch(signals, sr or SAMPLE_RATE, batch_size=batch_size)
+        for row, audio in zip(results, buffers):
+            metrics = self.analyze(audio)
+            pauses = audio.pauses
+            row["overall_score"] = metrics["overall_score"]
+            row["speech_rate"] = metrics["speech_rate"]
+            row["rhythm_score"] = metrics["rhythm_score"]
+            row["accuracy_score"] = metrics["accuracy_score"]
+            row["duration"] = audio.duration
+            row["onset_count"] = len(audio.onsets)
+            row["speech_ratio"] = audio.speech_ratio
+            row["pause_count"] = pauses["pause_count"]
+            row["mean_pause_seconds"] = pauses["mean_pause_seconds"]
+            row["longest_pause_seconds"] = pauses["longest_pause_seconds"]
+        return results
+    
     def analyze_text(self, text: str, estimated_duration: float = 30.0) -> Dict[str, float]:
         """
         Analyze transcription text for fluency metrics.
@@ -122,15 +178,14 @@ class FluencyAnalyzer:
                 "accuracy_score": 0.0
             }
     
-    def _calculate_speech_rate(self, audio: np.ndarray, sr: int) -> float:
+    def _calculate_speech_rate(self, audio: AudioBuffer) -> float:
         """Calculate speech rate based on onset detection."""
         try:
-            # Detect onsets in the audio
-            onset_env = librosa.onset.onset_strength(y=audio, sr=sr)
-            onsets = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr)
+            # Onsets come from the buffer's memoized onset envelope
+            onsets = audio.onsets
             
             # Calculate speech rate (onsets per second)
-            duration = len(audio) / sr
+            duration = audio.duration
             speech_rate = len(onsets) / duration if duration > 0 else 0
             
             # Normalize to a 0-1 scale (assuming typical speech is 2-5 syllables/sec)
@@ -142,20 +197,12 @@ class FluencyAnalyzer:
             print(f"Error calculating speech rate: {e}")
             return 0.0
     
-    def _calculate_rhythm_score(self, audio: np.ndarray, sr: int) -> float:
+    def _calculate_rhythm_score(self, audio: AudioBuffer) -> float:
         """Calculate rhythm score based on pause patterns."""
         try:
-            # Calculate RMS energy
-            rms = librosa.feature.rms(y=audio)[0]
-            
-            # Define silence threshold
-            silence_threshold = np.mean(rms) * 0.5
-            
-            # Find silence regions
-            is_silence = rms < silence_threshold
-            
-            # Calculate pause ratio
-            pause_ratio = np.mean(is_silence)
+            # Pause ratio from the shared speech segmentation (the same
+            # regions that decide what Whisper transcribes)
+            pause_ratio = 1.0 - audio.speech_ratio
             
             # Convert to score (optimal pause ratio around 0.2-0.3)
             score = 1.0 - abs(pause_ratio - 0.25) * 2
@@ -167,55 +214,182 @@ class FluencyAnalyzer:
             print(f"Error calculating rhythm score: {e}")
             return 0.0
 
-def analyze_audio(file_path: str) -> Dict[str, Any]:
+class FluencyAccumulator:
+    """
+    Fluency features for audio that arrives in pieces.
+    
+    Samples are analysed in blocks of BLOCK_SECONDS and then dropped; only the
+    per-frame RMS and the onset positions are kept (about 1/500th of the
+    samples), so memory stays small however long the recording is. It offers
+    the same duration, rms and onsets attributes FluencyAnalyzer reads from an
+    AudioBuffer.
     """
-    Analyze an audio file for transcription and fluency metrics.
+    BLOCK_SECONDS = 10.0
+    
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.num_samples = 0
+        self._pending = []
+        self._pending_samples = 0
+        self._rms = []
+        self._onsets = []
+        self._frames = 0
+    
+    def add(self, samples: np.ndarray):
+        """Add the next decoded samples of the recording."""
+        if len(samples) == 0:
+            return
+        self._pending.append(samples)
+        self._pending_samples += len(samples)
+        if self._pending_samples >= self.BLOCK_SECONDS * self.sample_rate:
+            self._analyze_pending()
+    
+    def _analyze_pending(self):
+        if not self._pending_samples:
+            return
+        block = AudioBuffer(np.concatenate(self._pending), self.sample_rate)
+        self._pending, self._pending_samples = [], 0
+        self._rms.append(block.rms)
+        self._onsets.append(block.onsets + self._frames)
+        self._frames += len(block.rms)
+        self.num_samples += len(block)
+    
+    @property
+    def duration(self) -> float:
+        return (self.num_samples + self._pending_samples) / self.sample_rate
+    
+    @property
+    def rms(self) -> np.ndarray:
+        self._analyze_pending()
+        return np.concatenate(self._rms) if self._rms else np.zeros(0, dtype=np.float32)
+    
+    @property
+    def onsets(self) -> np.ndarray:
+        self._analyze_pending()
+        return np.concatenate(self._onsets) if self._onsets else np.zeros(0, dtype=int)
+    
+    @property
+    def speech_intervals(self) -> np.ndarray:
+        """Speech regions as [start, end) sample offsets, from the kept RMS."""
+        return vad.speech_intervals_from_rms(self.rms, self.num_samples, self.sample_rate)
+    
+    @property
+    def speech_ratio(self) -> float:
+        return vad.speech_ratio(self.speech_intervals, self.num_samples)
+    
+    @property
+    def pauses(self) -> Dict[str, float]:
+        return vad.pause_stats(self.speech_intervals, self.num_samples, self.sample_rate)
+
+def analyze_audio(source: Union[str, bytes, np.ndarray, AudioBuffer], model_name: str = "base") -> Dict[str, Any]:
+    """
+    Analyze audio for transcription and fluency metrics.
     
     Args:
-        file_path: Path to the audio file
+        source: Path to an audio file, encoded audio bytes, an already
+            decoded 16 kHz mono waveform, or an AudioBuffer
+        model_name: Whisper model to transcribe with
         
     Returns:
         Dictionary containing transcription and fluency metrics
     """
     try:
-        # Load audio file
-        audio, sr = librosa.load(file_path)
+        # Decode once at 16 kHz; Whisper and the fluency metrics share it
+        audio = AudioBuffer.from_source(source)
         
-        # Get transcription
-        model = get_model()
-        if model is None:
-            raise Exception("Failed to load Whisper model")
-            
-        result = model.transcribe(file_path)
+        # Get transcription from the inference workers; only the speech
+        # regions found by the fluency features are sent to Whisper
+        result = transcribe(audio.samples, model_name=model_name, speech_intervals=audio.speech_intervals)
         transcript = result["text"]
         
         # Analyze fluency
         analyzer = FluencyAnalyzer()
-        metrics = analyzer.analyze(audio, sr)
+        metrics = analyzer.analyze(audio)
+        
+        return {
+            "transcript": transcript,
+            "duration_seconds": audio.duration,
+            "fluency_score": metrics["overall_score"],
+            "metrics": {
+                "wpm": len(transcript.split()) / (audio.duration / 60),
+                "wpm_score": metrics["speech_rate"],
+                "filler_count": sum(1 for word in transcript.lower().split() if word in analyzer.filler_words),
+                "filler_score": metrics["accuracy_score"],
+                "speech_ratio": audio.speech_ratio,
+                "ratio_score": metrics["rhythm_score"],
+                "word_count": len(transcript.split()),
+                **audio.pauses
+            }
+        }
+        
+    except QueueFullError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+
+def analyze_audio_stream(pieces: Iterable[bytes], model_name: str = "base", step_seconds: float = 10.0) -> Dict[str, Any]:
+    """
+    Analyze an encoded recording while it is still arriving.
+    
+    Each piece is decoded as soon as it is read and fed to a streaming
+    session, which transcribes in passes every step_seconds of audio, and to
+    a FluencyAccumulator. Neither keeps the whole recording, so memory is
+    bounded regardless of its length.
+    
+    Args:
+        pieces: Consecutive byte ranges of one encoded audio file
+        model_name: Whisper model to transcribe with
+        step_seconds: New audio between transcription passes
+        
+    Returns:
+        Dictionary in the same shape as analyze_audio
+    """
+    session = StreamingSession("upload", model_name=model_name, language=None, min_step_seconds=step_seconds)
+    accumulator = FluencyAccumulator()
+    try:
+        for sequence_number, piece in enumerate(pieces, start=1):
+            accumulator.add(session.add_chunk(piece, sequence_number))
+            session.process()
+        accumulator.add(session.flush())
+        transcript = session.process(final=True)["committed"]
+        
+        analyzer = FluencyAnalyzer()
+        metrics = analyzer.analyze(accumulator)
+        duration = accumulator.duration
+        if duration == 0:
+            return {"error": "No audio could be decoded from the upload"}
         
         return {
             "transcript": transcript,
+            "duration_seconds": duration,
             "fluency_score": metrics["overall_score"],
             "metrics": {
-                "wpm": len(transcript.split()) / (len(audio) / sr / 60),
+                "wpm": len(transcript.split()) / (duration / 60),
                 "wpm_score": metrics["speech_rate"],
                 "filler_count": sum(1 for word in transcript.lower().split() if word in analyzer.filler_words),
                 "filler_score": metrics["accuracy_score"],
-                "speech_ratio": 1.0 - metrics["rhythm_score"],
+                "speech_ratio": accumulator.speech_ratio,
                 "ratio_score": metrics["rhythm_score"],
-                "word_count": len(transcript.split())
+                "word_count": len(transcript.split()),
+                **accumulator.pauses
             }
         }
         
+    except (QueueFullError, RequestAborted):
+        # The upload was rejected or abandoned: the caller must not save anything
+        raise
     except Exception as e:
         return {"error": str(e)}
+    finally:
+        session.close()
 
-def analyze_audio_chunk(audio_chunk: bytes) -> Dict[str, Any]:
+def analyze_audio_chunk(audio_chunk: bytes, model_name: str = "base") -> Dict[str, Any]:
     """
     Analyze a chunk of audio data for streaming transcription.
     
     Args:
         audio_chunk: Raw audio data
+        model_name: Whisper model to transcribe with
         
     Returns:
         Dictionary containing transcription and intermediate metrics
@@ -225,12 +399,8 @@ def analyze_audio_chunk(audio_chunk: bytes) -> Dict[str, Any]:
         audio = np.frombuffer(audio_chunk, dtype=np.float32)
         sr = 16000  # Assuming 16kHz sample rate
         
-        # Get transcription
-        model = get_model()
-        if model is None:
-            raise Exception("Failed to load Whisper model")
-            
-        result = model.transcribe(audio)
+        # Get transcription from the inference workers
+        result = transcribe(audio, model_name=model_name)
         transcript = result["text"]
         
         # For streaming, we only return the transcription
@@ -239,5 +409,7 @@ def analyze_audio_chunk(audio_chunk: bytes) -> Dict[str, Any]:
             "is_final": True
         }
         
+    except QueueFullError:
+        raise
     except Exception as e:
         return {"error": str(e)} 
\ No newline at end of file
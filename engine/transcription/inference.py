@@ -0,0 +1,371 @@
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .batching import MicroBatcher
+from .model_registry import get_registry
+from .result_cache import get_result_cache, make_key
+from .vad import speech_only
+
+# Longest clip (in samples at 16 kHz) that fits one 30-second Whisper window
+WINDOW_SAMPLES = 30 * 16000
+
+logger = logging.getLogger(__name__)
+
+# Whisper installs forward hooks on the decoder for its KV cache, so two
+# decodes must never share a model instance at the same time. In process mode
+# each worker owns its models and these locks are uncontended.
+_model_locks: Dict[str, threading.Lock] = {}
+_model_locks_guard = threading.Lock()
+
+
+def _model_lock(model_name: str) -> threading.Lock:
+    with _model_locks_guard:
+        return _model_locks.setdefault(model_name, threading.Lock())
+
+
+class QueueFullError(Exception):
+    """Raised when the inference queue is at capacity."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+def _init_worker(preload_models: Iterable[str], download_root: Optional[str]) -> None:
+    """Prepare a worker process: configure its registry and load models."""
+    registry = get_registry()
+    registry.configure(download_root=download_root)
+    registry.preload(preload_models)
+
+
+def _warm_up() -> bool:
+    return True
+
+
+def _run_transcribe(model_name: str, audio: Any, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Transcribe audio with the named model. Runs inside a worker."""
+    model = get_registry().get(model_name)
+    with _model_lock(model_name):
+        result = model.transcribe(audio, **options)
+    return {
+        "text": result.get("text", ""),
+        "language": result.get("language"),
+        "segments": result.get("segments", []),
+    }
+
+
+def _run_batch(model_name: str, audios: List[np.ndarray], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Decode several 30-second windows as one padded batch. Runs inside a worker.
+
+    Each clip is padded to a full window, converted to log-mel and stacked so
+    the encoder and decoder run once for the whole batch.
+    """
+    import torch
+    import whisper
+
+    model = get_registry().get(model_name)
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(np.asarray(audio, dtype=np.float32)), model.dims.n_mels)
+        for audio in audios
+    ]).to(model.device)
+    decode_options = whisper.DecodingOptions(
+        task="transcribe",
+        language=options.get("language"),
+        fp16=options.get("fp16", model.device.type == "cuda"),
+        without_timestamps=True,
+    )
+    with _model_lock(model_name):
+        results = whisper.decode(model, mel, decode_options)
+
+    outputs = []
+    for audio, result in zip(audios, results):
+        # Same silence rule model.transcribe applies to each window
+        is_silent = result.no_speech_prob > 0.6 and result.avg_logprob < -1.0
+        text = "" if is_silent else result.text
+        outputs.append({
+            "text": text,
+            "language": result.language,
+            "segments": [] if is_silent else [{
+                "start": 0.0,
+                "end": len(audio) / 16000,
+                "text": text,
+                "avg_logprob": result.avg_logprob,
+                "no_speech_prob": result.no_speech_prob,
+            }],
+        })
+    return outputs
+
+
+class InferenceExecutor:
+    """
+    Bounded pool that runs Whisper inference off the request thread.
+
+    In "process" mode every worker process holds its own copy of each model
+    it serves; in "thread" mode workers share the models in this process's
+    registry. Callers get a Future back and wait on it. Once the number of
+    queued and running jobs reaches num_workers + max_queue_depth, submit()
+    raises QueueFullError so the view can answer 503 with Retry-After.
+
+    Clips that fit in one 30-second window can go through submit_window(),
+    which micro-batches them across concurrent requests before they reach a
+    worker.
+    """
+
+    def __init__(self, num_workers: int = 2, max_queue_depth: int = 16,
+                 mode: str = "process", preload_models: Iterable[str] = (),
+                 download_root: Optional[str] = None, max_batch_size: int = 8,
+                 max_batch_wait_ms: float = 10.0):
+        self.num_workers = max(1, num_workers)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_latency = 0.0
+
+        if mode == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(tuple(preload_models), download_root),
+            )
+        else:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.num_workers, thread_name_prefix="whisper-inference"
+            )
+
+        self._batcher = MicroBatcher(
+            submit_batch=self._submit_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            max_pending=self.capacity * max(1, max_batch_size),
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.num_workers + self.max_queue_depth
+
+    def queue_length(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        with self._lock:
+            return max(self._pending - self.num_workers, 0)
+
+    def _retry_after_locked(self) -> int:
+        avg_latency = self._total_latency / self._completed if self._completed else 1.0
+        waiting = max(self._pending - self.num_workers, 0) + 1
+        return max(1, math.ceil(waiting * avg_latency / self.num_workers))
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise QueueFullError(retry_after=self._retry_after_locked())
+            self._pending += 1
+            self._submitted += 1
+
+        enqueued_at = time.perf_counter()
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        def on_done(f: Future) -> None:
+            elapsed = time.perf_counter() - enqueued_at
+            with self._lock:
+                self._pending -= 1
+                if f.cancelled() or f.exception() is not None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                    self._total_latency += elapsed
+
+        future.add_done_callback(on_done)
+        return future
+
+    def submit(self, model_name: str, audio: Any, **options) -> Future:
+        """
+        Queue a transcription job.
+
+        Args:
+            model_name: Whisper model to run
+            audio: Path to an audio file or a 16 kHz float32 waveform
+            **options: Extra arguments for model.transcribe
+
+        Returns:
+            Future resolving to a dict with text, language and segments
+        """
+        return self._submit(_run_transcribe, model_name, audio, options)
+
+    def submit_window(self, model_name: str, audio: np.ndarray, **options) -> Future:
+        """
+        Queue a clip of at most 30 seconds for batched decoding.
+
+        Args:
+            model_name: Whisper model to run
+            audio: 16 kHz float32 waveform no longer than one window
+            **options: language and fp16 are honoured; others are ignored
+
+        Returns:
+            Future resolving to a dict with text, language and segments
+        """
+        if len(audio) > WINDOW_SAMPLES:
+            raise ValueError("Audio is longer than one 30-second window")
+        key = (model_name, options.get("language"), options.get("fp16"))
+        try:
+            return self._batcher.submit(key, audio)
+        except OverflowError:
+            with self._lock:
+                self._rejected += 1
+                raise QueueFullError(retry_after=self._retry_after_locked())
+
+    def _submit_batch(self, key, audios: List[np.ndarray]) -> Future:
+        model_name, language, fp16 = key
+        options = {"language": language}
+        if fp16 is not None:
+            options["fp16"] = fp16
+        return self._submit(_run_batch, model_name, audios, options)
+
+    def warm_up(self) -> None:
+        """Start the workers so their models are loaded before traffic."""
+        for _ in range(self.num_workers):
+            self._pool.submit(_warm_up)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return queue length and job counters."""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.num_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self._pending,
+                "queue_length": max(self._pending - self.num_workers, 0),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_latency_seconds": round(self._total_latency / self._completed, 3) if self._completed else 0.0,
+                "batching": self._batcher.stats(),
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._batcher.shutdown()
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> InferenceExecutor:
+    """Return the process-wide executor, creating it from settings on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from django.conf import settings
+                _executor = InferenceExecutor(
+                    num_workers=getattr(settings, 'WHISPER_INFERENCE_WORKERS', 2),
+                    max_queue_depth=getattr(settings, 'WHISPER_INFERENCE_QUEUE_DEPTH', 16),
+                    mode=getattr(settings, 'WHISPER_INFERENCE_MODE', 'process'),
+                    preload_models=getattr(settings, 'WHISPER_PRELOAD_MODELS', []),
+                    download_root=getattr(settings, 'MODEL_DIR', None),
+                    max_batch_size=getattr(settings, 'WHISPER_BATCH_MAX_SIZE', 8),
+                    max_batch_wait_ms=getattr(settings, 'WHISPER_BATCH_MAX_WAIT_MS', 10),
+                )
+    return _executor
+
+
+def transcribe(audio: Any, model_name: str = "tiny", timeout: Optional[float] = None,
+               batch: bool = False, vad: Optional[bool] = None,
+               speech_intervals: Optional[np.ndarray] = None, cache: bool = True,
+               **options) -> Dict[str, Any]:
+    """
+    Run a transcription on the shared executor and wait for the result.
+
+    Results are cached by audio content, model and options, so audio that
+    was already transcribed (a retried upload, a file sent twice) does not
+    run Whisper again.
+
+    Waveforms first go through voice activity detection: only their speech
+    regions are sent to Whisper and the result's timestamps are mapped back
+    to the original audio. Audio with no speech returns an empty result
+    without running Whisper at all.
+
+    Args:
+        audio: Path to an audio file or a 16 kHz float32 waveform
+        model_name: Whisper model to run
+        timeout: Seconds to wait before giving up (defaults to settings)
+        batch: Micro-batch the clip with concurrent requests when it is a
+            waveform that fits in one 30-second window
+        vad: Cut silence out of waveforms first (defaults to settings)
+        speech_intervals: Speech regions already detected for this waveform
+        cache: Look the result up in, and store it to, the result cache
+        **options: Extra arguments for model.transcribe
+
+    Returns:
+        Dictionary with text, language and segments
+
+    Raises:
+        QueueFullError: if the executor is at capacity
+    """
+    from django.conf import settings
+    if timeout is None:
+        timeout = getattr(settings, 'WHISPER_INFERENCE_TIMEOUT', 120)
+    if vad is None:
+        vad = getattr(settings, 'WHISPER_VAD', True)
+
+    result_cache = get_result_cache() if cache else None
+    if result_cache is not None:
+        # Everything the result depends on: decode options, whether a short
+        # waveform takes the batched decode (no timestamps) and how silence
+        # is cut out
+        key = make_key(audio, model_name, {
+            **options,
+            "batch": bool(batch),
+            "vad": bool(vad),
+            "speech_intervals": (
+                np.asarray(speech_intervals).tolist() if vad and speech_intervals is not None else None
+            ),
+        })
+        result = result_cache.get(key)
+        if result is not None:
+            return result
+
+    timeline = None
+    if vad and isinstance(audio, np.ndarray):
+        audio, timeline = speech_only(audio, speech_intervals)
+        if audio is None:
+            result = {"text": "", "language": options.get("language"), "segments": []}
+            if result_cache is not None:
+                result_cache.set(key, result)
+            return result
+
+    executor = get_executor()
+    if batch and isinstance(audio, np.ndarray) and len(audio) <= WINDOW_SAMPLES:
+        future = executor.submit_window(model_name, audio, **options)
+    else:
+        future = executor.submit(model_name, audio, **options)
+    try:
+        result = future.result(timeout=timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+    if timeline is not None:
+        result = timeline.remap(result)
+    if result_cache is not None:
+        result_cache.set(key, result)
+    return result
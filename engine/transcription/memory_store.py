@@ -0,0 +1,241 @@
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .dynamodb_codec import ItemCodec
+
+logger = logging.getLogger(__name__)
+
+# Position of a record in a secondary index: (sort key value, id)
+IndexPosition = Tuple[Any, str]
+
+
+class InMemoryStore:
+    """
+    One DynamoDB table kept in this process's memory.
+
+    Used in place of DynamoDB when it is not available (local development,
+    load tests), with the same behaviour: records are keyed by id and a put
+    replaces the whole record, values go through the table's codec on the
+    way in and out (so defaults, number types and dropped attributes match
+    what DynamoDB returns), scans run in key order and secondary indexes
+    are sparse, sorted by their sort key, and paged with the position of
+    the last record rather than an offset.
+
+    Records are stored as DynamoDB items, so every read decodes a fresh
+    copy that the caller may modify. All access is under one lock.
+    """
+
+    def __init__(self, codec: ItemCodec,
+                 indexes: Optional[Dict[str, Tuple[str, Optional[str]]]] = None,
+                 index_values: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+                 snapshot_path: Optional[str] = None):
+        """
+        Args:
+            codec: Converts records to and from DynamoDB items
+            indexes: Index name -> (partition key, sort key or None), as in
+                the table's global secondary indexes
+            index_values: Returns the plain values of a record's index key
+                attributes; a record lacking an index's partition key is
+                left out of that index
+            snapshot_path: JSON file the records are loaded from, if it
+                exists, and written to by save_snapshot()
+        """
+        self.codec = codec
+        self.indexes = indexes or {}
+        self.index_values = index_values
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._items: Dict[str, Dict[str, Any]] = {}
+        # Sorted ids, for scans in key order
+        self._ids: List[str] = []
+        # Index name -> partition key value -> sorted positions
+        self._index: Dict[str, Dict[Any, List[IndexPosition]]] = {name: {} for name in self.indexes}
+        # id -> index name -> (partition key value, position), for removal
+        self._entries: Dict[str, Dict[str, Tuple[Any, IndexPosition]]] = {}
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def _index_entries(self, record: Dict[str, Any]) -> Dict[str, Tuple[Any, IndexPosition]]:
+        if not self.indexes:
+            return {}
+        values = self.index_values(record) if self.index_values else record
+        entries = {}
+        for name, (partition_key, sort_key) in self.indexes.items():
+            if values.get(partition_key) is None:
+                continue
+            if sort_key and values.get(sort_key) is None:
+                continue
+            entries[name] = (values[partition_key], (values[sort_key] if sort_key else '', record['id']))
+        return entries
+
+    def _remove_locked(self, record_id: str) -> bool:
+        if self._items.pop(record_id, None) is None:
+            return False
+        del self._ids[bisect.bisect_left(self._ids, record_id)]
+        for name, (partition, position) in self._entries.pop(record_id, {}).items():
+            positions = self._index[name][partition]
+            del positions[bisect.bisect_left(positions, position)]
+            if not positions:
+                del self._index[name][partition]
+        return True
+
+    def _put_locked(self, record_id: str, item: Dict[str, Any], entries: Dict[str, Tuple[Any, IndexPosition]]) -> None:
+        self._remove_locked(record_id)
+        self._items[record_id] = item
+        bisect.insort(self._ids, record_id)
+        for name, (partition, position) in entries.items():
+            bisect.insort(self._index[name].setdefault(partition, []), position)
+        self._entries[record_id] = entries
+
+    def _prepare(self, record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Tuple[Any, IndexPosition]]]:
+        # Encoding validates the record (e.g. non-finite numbers) like a put would
+        item = self.codec.encode(record)
+        return item, self._index_entries(self.codec.decode(item))
+
+    def put(self, record: Dict[str, Any]) -> str:
+        """Insert or replace a record; returns its id."""
+        item, entries = self._prepare(record)
+        with self._lock:
+            self._put_locked(record['id'], item, entries)
+        return record['id']
+
+    def put_many(self, records: Iterable[Dict[str, Any]]) -> List[str]:
+        """Insert or replace several records; the last one wins for a repeated id."""
+        prepared = [(record['id'], *self._prepare(record)) for record in records]
+        with self._lock:
+            for record_id, item, entries in prepared:
+                self._put_locked(record_id, item, entries)
+        return [record_id for record_id, _, _ in prepared]
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """Return a record by id, or None."""
+        with self._lock:
+            item = self._items.get(record_id)
+        return self.codec.decode(item) if item is not None else None
+
+    def delete(self, record_id: str) -> bool:
+        """Delete a record by id; returns whether it existed."""
+        with self._lock:
+            return self._remove_locked(record_id)
+
+    def delete_many(self, record_ids: Iterable[str]) -> int:
+        """Delete records by id; returns how many existed."""
+        with self._lock:
+            return sum(self._remove_locked(record_id) for record_id in record_ids)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Return every record, in key order."""
+        with self._lock:
+            items = [self._items[record_id] for record_id in self._ids]
+        return self.codec.decode_many(items)
+
+    def scan(self, limit: Optional[int] = None, after: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Read one page of records in key order.
+
+        Args:
+            limit: Most records to return (all when None)
+            after: Id of the last record of the previous page
+
+        Returns:
+            (records, id to continue after, or None on the last page)
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._ids, after) if after is not None else 0
+            end = len(self._ids) if limit is None else start + limit
+            page = self._ids[start:end]
+            items = [self._items[record_id] for record_id in page]
+            more = end < len(self._ids)
+        return self.codec.decode_many(items), page[-1] if more and page else None
+
+    def query(self, index: str, key: Any, min_sort: Any = None, descending: bool = False,
+              limit: Optional[int] = None, after: Optional[IndexPosition] = None,
+              predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+              ) -> Tuple[List[Dict[str, Any]], Optional[IndexPosition]]:
+        """
+        Read one page of records from a secondary index.
+
+        Args:
+            index: Index name
+            key: Partition key value
+            min_sort: Lowest sort key value, if any
+            descending: Highest sort key first
+            limit: Most records to return (all when None)
+            after: Position of the last record of the previous page
+            predicate: Filter applied to the records read
+
+        Returns:
+            (records, position to continue after, or None on the last page)
+        """
+        with self._lock:
+            positions = self._index[index].get(key, [])
+            low = bisect.bisect_left(positions, (min_sort,)) if min_sort is not None else 0
+            if descending:
+                high = bisect.bisect_left(positions, tuple(after)) if after is not None else len(positions)
+                order = range(high - 1, low - 1, -1)
+            else:
+                start = max(low, bisect.bisect_right(positions, tuple(after))) if after is not None else low
+                order = range(start, len(positions))
+
+            records, last = [], None
+            for i in order:
+                record = self.codec.decode(self._items[positions[i][1]])
+                if predicate is not None and not predicate(record):
+                    continue
+                if limit is not None and len(records) == limit:
+                    # Another match exists: the page is not the last one
+                    return records, last
+                records.append(record)
+                last = positions[i]
+            return records, None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._ids.clear()
+            self._entries.clear()
+            for partitions in self._index.values():
+                partitions.clear()
+
+    def save_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Write every record to a JSON file, replacing it atomically.
+
+        Returns:
+            Number of records written
+        """
+        path = path or self.snapshot_path
+        if not path:
+            return 0
+        with self._lock:
+            items = [self._items[record_id] for record_id in self._ids]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as f:
+            json.dump({'items': items}, f)
+        os.replace(f.name, path)
+        return len(items)
+
+    def load_snapshot(self, path: Optional[str] = None) -> int:
+        """
+        Replace the records with those of a file written by save_snapshot().
+
+        Returns:
+            Number of records loaded
+        """
+        with open(path or self.snapshot_path) as f:
+            items = json.load(f)['items']
+        records = self.codec.decode_many(items)
+        self.clear()
+        self.put_many(records)
+        logger.info(f"Loaded {len(records)} records from {path or self.snapshot_path}")
+        return len(records)
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription', '0003_alter_audiorecording_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='articulation_rate',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='filler_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='filler_positions',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='longest_pause_seconds',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='mean_pause_seconds',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='pause_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='pause_distribution',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='speech_ratio',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='word_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='wpm',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transcription',
+            name='words',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='transcriptionchunk',
+            name='words',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:55
+
+from django.db import migrations, models
+
+
+def backfill_snapshots(apps, schema_editor):
+    """Copy existing final transcripts and chunk counts onto their scores."""
+    FluencyScore = apps.get_model('transcription', 'FluencyScore')
+    Transcription = apps.get_model('transcription', 'Transcription')
+    TranscriptionChunk = apps.get_model('transcription', 'TranscriptionChunk')
+    for score in FluencyScore.objects.all():
+        transcription = Transcription.objects.filter(recording_id=score.recording_id).order_by('-updated_at').first()
+        score.transcript = transcription.text if transcription else ''
+        score.chunk_count = TranscriptionChunk.objects.filter(recording_id=score.recording_id).count()
+        score.save(update_fields=['transcript', 'chunk_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription', '0004_word_timing_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='chunk_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fluencyscore',
+            name='transcript',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription', '0005_fluencyscore_transcript_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiorecording',
+            name='user_identifier',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:57
+
+from django.db import migrations, models
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Collapse rows that the new unique constraints would reject.
+
+    Recordings sharing a user_identifier are merged into the oldest one,
+    blank identifiers become NULL, and for each recording only the first
+    chunk per sequence number and the latest transcription and score are kept.
+    """
+    AudioRecording = apps.get_model('transcription', 'AudioRecording')
+    Transcription = apps.get_model('transcription', 'Transcription')
+    TranscriptionChunk = apps.get_model('transcription', 'TranscriptionChunk')
+    FluencyScore = apps.get_model('transcription', 'FluencyScore')
+
+    AudioRecording.objects.filter(user_identifier='').update(user_identifier=None)
+
+    identifiers = (
+        AudioRecording.objects.exclude(user_identifier=None)
+        .values('user_identifier')
+        .annotate(rows=models.Count('id'))
+        .filter(rows__gt=1)
+        .values_list('user_identifier', flat=True)
+    )
+    for identifier in identifiers:
+        keep, *duplicates = AudioRecording.objects.filter(user_identifier=identifier).order_by('id')
+        duplicate_ids = [recording.id for recording in duplicates]
+        for model in (Transcription, TranscriptionChunk, FluencyScore):
+            model.objects.filter(recording_id__in=duplicate_ids).update(recording_id=keep.id)
+        keep.is_processed = keep.is_processed or any(recording.is_processed for recording in duplicates)
+        keep.save(update_fields=['is_processed'])
+        AudioRecording.objects.filter(id__in=duplicate_ids).delete()
+
+    seen = set()
+    for chunk_id, recording_id, sequence_number in (
+        TranscriptionChunk.objects.order_by('id').values_list('id', 'recording_id', 'sequence_number')
+    ):
+        if (recording_id, sequence_number) in seen:
+            TranscriptionChunk.objects.filter(id=chunk_id).delete()
+        seen.add((recording_id, sequence_number))
+
+    for model, latest in ((Transcription, '-updated_at'), (FluencyScore, '-created_at')):
+        recording_ids = (
+            model.objects.values('recording_id')
+            .annotate(rows=models.Count('id'))
+            .filter(rows__gt=1)
+            .values_list('recording_id', flat=True)
+        )
+        for recording_id in recording_ids:
+            keep = model.objects.filter(recording_id=recording_id).order_by(latest, '-id').first()
+            model.objects.filter(recording_id=recording_id).exclude(id=keep.id).delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Data only: the constraints are added by the next migration, so that on
+    PostgreSQL no ALTER TABLE runs in the transaction that rewrote the rows
+    (which fails with "pending trigger events").
+    """
+
+    dependencies = [
+        ('transcription', '0006_audiorecording_user_identifier_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
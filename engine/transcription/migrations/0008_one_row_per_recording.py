@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription', '0007_merge_duplicate_recordings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiorecording',
+            name='user_identifier',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='fluencyscore',
+            name='recording',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fluency_score', to='transcription.audiorecording'),
+        ),
+        migrations.AlterField(
+            model_name='transcription',
+            name='recording',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='transcription', to='transcription.audiorecording'),
+        ),
+        migrations.AddConstraint(
+            model_name='transcriptionchunk',
+            constraint=models.UniqueConstraint(fields=('recording', 'sequence_number'), name='unique_chunk_sequence'),
+        ),
+    ]
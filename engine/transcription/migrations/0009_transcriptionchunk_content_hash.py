@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription', '0008_one_row_per_recording'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transcriptionchunk',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,187 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import whisper
+
+logger = logging.getLogger(__name__)
+
+# (model name, device, precision)
+ModelKey = Tuple[str, str, str]
+
+
+def _default_device() -> str:
+    """Pick the device Whisper would use by default."""
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def _model_size_bytes(model: Any) -> int:
+    """Estimate the memory held by a model's parameters and buffers."""
+    try:
+        size = sum(p.numel() * p.element_size() for p in model.parameters())
+        size += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(size)
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe pool of loaded Whisper models.
+
+    Models are keyed by (name, device, precision) so callers asking for
+    "tiny" never get "base" back. Least recently used models are evicted once
+    the total parameter memory exceeds the configured budget; the model that
+    was just requested is never evicted.
+    """
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None,
+                 download_root: Optional[str] = None,
+                 loader: Optional[Callable[..., Any]] = None):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.download_root = download_root
+        self._loader = loader or whisper.load_model
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._models: "OrderedDict[ModelKey, Any]" = OrderedDict()
+        self._sizes: Dict[ModelKey, int] = {}
+        self._load_times: Dict[ModelKey, float] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def configure(self, memory_budget_bytes: Optional[int] = None,
+                  download_root: Optional[str] = None) -> None:
+        """Update the memory budget and download location."""
+        with self._lock:
+            self.memory_budget_bytes = memory_budget_bytes
+            self.download_root = download_root
+            self._evict_locked(keep=None)
+
+    def make_key(self, name: str, device: Optional[str] = None,
+                 precision: Optional[str] = None) -> ModelKey:
+        """Normalize a model request into a registry key."""
+        device = device or _default_device()
+        if precision is None:
+            precision = "fp16" if device.startswith("cuda") else "fp32"
+        return (name, device, precision)
+
+    def get(self, name: str, device: Optional[str] = None,
+            precision: Optional[str] = None) -> Any:
+        """
+        Return a loaded model, loading it on first use.
+
+        Args:
+            name: Whisper model name (e.g. "tiny", "base")
+            device: Torch device, defaults to CUDA when available
+            precision: "fp32" or "fp16"
+
+        Returns:
+            The loaded Whisper model
+        """
+        key = self.make_key(name, device, precision)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._hits += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key; others wait for it and then hit.
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    self._hits += 1
+                    return model
+                self._misses += 1
+
+            model = self._load(key)
+
+            with self._lock:
+                self._models[key] = model
+                self._sizes[key] = _model_size_bytes(model)
+                self._evict_locked(keep=key)
+            return model
+
+    def _load(self, key: ModelKey) -> Any:
+        name, device, precision = key
+        logger.info(f"Loading Whisper model '{name}' on {device} ({precision})")
+        start = time.perf_counter()
+        model = self._loader(name, device=device, download_root=self.download_root)
+        if precision == "fp16":
+            model = model.half()
+        elapsed = time.perf_counter() - start
+        self._load_times[key] = elapsed
+        logger.info(f"Loaded Whisper model '{name}' in {elapsed:.2f}s")
+        return model
+
+    def _evict_locked(self, keep: Optional[ModelKey]) -> None:
+        if not self.memory_budget_bytes:
+            return
+        while sum(self._sizes.values()) > self.memory_budget_bytes:
+            victim = next((k for k in self._models if k != keep), None)
+            if victim is None:
+                break
+            del self._models[victim]
+            self._sizes.pop(victim, None)
+            self._evictions += 1
+            logger.info(f"Evicted Whisper model {victim} from registry")
+
+    def preload(self, names: Iterable[str], device: Optional[str] = None,
+                precision: Optional[str] = None) -> None:
+        """Load the given models up front so requests never pay for it."""
+        for name in names:
+            try:
+                self.get(name, device, precision)
+            except Exception as e:
+                logger.error(f"Error preloading Whisper model '{name}': {e}")
+
+    def loaded_keys(self) -> Tuple[ModelKey, ...]:
+        with self._lock:
+            return tuple(self._models.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, load times and memory usage."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "evictions": self._evictions,
+                "memory_bytes": sum(self._sizes.values()),
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "models": [
+                    {
+                        "name": key[0],
+                        "device": key[1],
+                        "precision": key[2],
+                        "size_bytes": self._sizes.get(key, 0),
+                        "load_seconds": round(self._load_times.get(key, 0.0), 3),
+                    }
+                    for key in self._models
+                ],
+            }
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return _registry
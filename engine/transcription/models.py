@@ -6,7 +6,8 @@ User = get_user_model()
 class AudioRecording(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recordings', null=True, blank=True)
     audio_file = models.FileField(upload_to='recordings/', null=True, blank=True)
-    user_identifier = models.CharField(max_length=255, blank=True, db_index=True)
+    # Client-side recording ID; at most one recording per ID
+    user_identifier = models.CharField(max_length=255, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     duration = models.FloatField(null=True, blank=True)
     is_processed = models.BooleanField(default=False)
@@ -16,8 +17,10 @@ class AudioRecording(models.Model):
         return f"Recording {self.id} by {user_name}"
 
 class Transcription(models.Model):
-    recording = models.ForeignKey(AudioRecording, on_delete=models.CASCADE, related_name='transcriptions')
+    recording = models.OneToOneField(AudioRecording, on_delete=models.CASCADE, related_name='transcription')
     text = models.TextField()
+    # [start, end, word] per word, times in seconds from the start of the recording
+    words = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -27,22 +30,43 @@ class Transcription(models.Model):
 class TranscriptionChunk(models.Model):
     recording = models.ForeignKey(AudioRecording, on_delete=models.CASCADE, related_name='chunks')
     text = models.TextField()
+    words = models.JSONField(default=list, blank=True)
     sequence_number = models.IntegerField(default=0)
+    # SHA-256 of the audio received under this sequence number, to recognise retries
+    content_hash = models.CharField(max_length=64, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     is_final = models.BooleanField(default=False)
 
     class Meta:
         ordering = ['sequence_number']
+        constraints = [
+            # Also the index behind filter(recording=...).order_by('sequence_number')
+            models.UniqueConstraint(fields=['recording', 'sequence_number'], name='unique_chunk_sequence'),
+        ]
 
     def __str__(self):
         return f"Chunk {self.sequence_number} for Recording {self.recording.id}"
 
 class FluencyScore(models.Model):
-    recording = models.ForeignKey(AudioRecording, on_delete=models.CASCADE, related_name='fluency_scores')
+    recording = models.OneToOneField(AudioRecording, on_delete=models.CASCADE, related_name='fluency_score')
     overall_score = models.FloatField()
     speech_rate = models.FloatField()
     rhythm_score = models.FloatField()
     accuracy_score = models.FloatField()
+    # Measured from word timestamps when the recording is finalized
+    wpm = models.FloatField(default=0)
+    articulation_rate = models.FloatField(default=0)
+    speech_ratio = models.FloatField(default=0)
+    word_count = models.IntegerField(default=0)
+    filler_count = models.IntegerField(default=0)
+    pause_count = models.IntegerField(default=0)
+    mean_pause_seconds = models.FloatField(default=0)
+    longest_pause_seconds = models.FloatField(default=0)
+    pause_distribution = models.JSONField(default=dict, blank=True)
+    filler_positions = models.JSONField(default=list, blank=True)
+    # Snapshot of the final transcript, so status requests need no other rows
+    transcript = models.TextField(blank=True, default='')
+    chunk_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
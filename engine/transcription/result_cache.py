@@ -0,0 +1,209 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of cached results changes
+KEY_VERSION = 1
+# Bytes read at a time when hashing an audio file
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def audio_digest(audio: Any) -> str:
+    """
+    Hash the content of a waveform, audio file or encoded bytes.
+
+    Waveforms are hashed as float32 PCM, so the same decoded audio gives the
+    same digest whatever container it arrived in. Files and bytes are hashed
+    as stored.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(audio, np.ndarray):
+        digest.update(b"pcm:")
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+    elif isinstance(audio, (bytes, bytearray, memoryview)):
+        digest.update(b"raw:")
+        digest.update(audio)
+    else:
+        digest.update(b"raw:")
+        with open(os.fspath(audio), "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(audio: Any, model_name: str, options: Dict[str, Any]) -> str:
+    """
+    Build the cache key for one transcription.
+
+    Args:
+        audio: Waveform, audio file path or encoded bytes
+        model_name: Whisper model that produces the result
+        options: Decode options that change the result (language, prompt, ...)
+
+    Returns:
+        A short key safe for any cache backend
+    """
+    described = json.dumps(options, sort_keys=True, default=repr)
+    options_digest = hashlib.blake2b(f"{model_name}|{described}".encode(), digest_size=10).hexdigest()
+    return f"transcription:v{KEY_VERSION}:{audio_digest(audio)}:{options_digest}"
+
+
+class MemoryBackend:
+    """Least recently used entries in this process's memory, with a TTL."""
+
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = 3600.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "memory", "size": len(self._entries),
+                    "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class DjangoCacheBackend:
+    """
+    Entries in a Django cache (file, database, memcached, redis, ...).
+
+    Size limits and eviction are those of the configured cache, e.g.
+    OPTIONS["MAX_ENTRIES"] for the file and database caches, so results can
+    be shared between server processes and survive restarts.
+    """
+
+    def __init__(self, alias: str = "default", ttl: Optional[float] = 3600.0):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self.cache.set(key, value, timeout=self.ttl or None)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "django", "alias": self.alias}
+
+
+class ResultCache:
+    """
+    Transcription results keyed by audio content, model and options.
+
+    Clients retrying an upload, or sending the same file again, get the
+    stored result instead of a new Whisper run. Results are copied on the
+    way in and out so callers may modify what they get back.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Transcription cache lookup failed: {str(e)}")
+            value = None
+            with self._lock:
+                self._errors += 1
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, copy.deepcopy(result))
+        except Exception as e:
+            logger.warning(f"Transcription cache store failed: {str(e)}")
+            with self._lock:
+                self._errors += 1
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and backend size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            data = {
+                "hits": self._hits,
+                "misses": self._misses,
+                "errors": self._errors,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+        data.update(self.backend.stats())
+        return data
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when caching is disabled."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from django.conf import settings
+                backend_name = getattr(settings, 'TRANSCRIPTION_CACHE_BACKEND', 'memory')
+                ttl = getattr(settings, 'TRANSCRIPTION_CACHE_TTL', 3600)
+                if backend_name == 'none':
+                    return None
+                if backend_name == 'django':
+                    backend = DjangoCacheBackend(getattr(settings, 'TRANSCRIPTION_CACHE_ALIAS', 'default'), ttl)
+                else:
+                    backend = MemoryBackend(getattr(settings, 'TRANSCRIPTION_CACHE_MAX_ENTRIES', 512), ttl)
+                _cache = ResultCache(backend)
+    return _cache
@@ -10,20 +10,23 @@ class AudioRecordingSerializer(serializers.ModelSerializer):
 class TranscriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transcription
-        fields = ['id', 'recording', 'text', 'created_at', 'updated_at']
+        fields = ['id', 'recording', 'text', 'words', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
 class TranscriptionChunkSerializer(serializers.ModelSerializer):
     class Meta:
         model = TranscriptionChunk
-        fields = ['id', 'recording', 'text', 'sequence_number', 'created_at', 'is_final']
+        fields = ['id', 'recording', 'text', 'words', 'sequence_number', 'created_at', 'is_final']
         read_only_fields = ['created_at']
 
 class FluencyScoreSerializer(serializers.ModelSerializer):
     class Meta:
         model = FluencyScore
         fields = ['id', 'recording', 'overall_score', 'speech_rate', 
-                 'rhythm_score', 'accuracy_score', 'created_at']
+                 'rhythm_score', 'accuracy_score', 'wpm', 'articulation_rate',
+                 'speech_ratio', 'word_count', 'filler_count', 'pause_count',
+                 'mean_pause_seconds', 'longest_pause_seconds', 'pause_distribution',
+                 'filler_positions', 'created_at']
         read_only_fields = ['created_at']
 
 class AudioUploadSerializer(serializers.Serializer):
@@ -0,0 +1,113 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FILLER_WORDS = ("um", "uh", "hmm", "like", "you know", "so", "actually", "basically", "literally")
+
+# Silence between two words shorter than this is part of normal articulation
+MIN_PAUSE_SECONDS = 0.25
+# Upper edges of the pause-length histogram buckets, in seconds
+PAUSE_BUCKETS = (0.5, 1.0, 2.0)
+
+# Normal conversational pace; speech_rate reaches 1.0 here
+TARGET_WPM = 150.0
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def words_from_segments(segments: Sequence[Dict[str, Any]], offset: float = 0.0) -> List[Tuple[float, float, str]]:
+    """
+    Flatten Whisper segments into (start, end, word) triples, shifted by `offset`.
+
+    Segments without word timings (batched or mocked output) have their text
+    spread evenly over the segment.
+    """
+    words = []
+    for segment in segments:
+        if segment.get("words"):
+            words.extend((offset + word["start"], offset + word["end"], word["word"]) for word in segment["words"])
+            continue
+        tokens = segment.get("text", "").split()
+        if not tokens:
+            continue
+        start = offset + segment["start"]
+        step = (segment["end"] - segment["start"]) / len(tokens)
+        words.extend((start + i * step, start + (i + 1) * step, " " + token) for i, token in enumerate(tokens))
+    return words
+
+
+def compute_speech_metrics(words: Sequence[Sequence[Any]], duration: Optional[float] = None,
+                           filler_words: Sequence[str] = FILLER_WORDS) -> Dict[str, Any]:
+    """
+    Fluency metrics from timed words, in one pass over their timestamps.
+
+    Args:
+        words: [start, end, word] triples in recording order, times in seconds
+        duration: Length of the recording in seconds (defaults to the end of
+            the last word)
+        filler_words: Single words or two-word phrases counted as fillers
+
+    Returns:
+        Dictionary with word_count, duration, wpm, articulation_rate (words
+        per minute of speaking time, pauses excluded), speech_ratio, pause
+        statistics, pause_distribution, filler_count and filler_positions,
+        plus speech_rate, rhythm_score, accuracy_score and overall_score on
+        a 0-1 scale
+    """
+    count = len(words)
+    times = np.array([(word[0], word[1]) for word in words], dtype=np.float64).reshape(-1, 2)
+    tokens = [_normalize(word[2]) for word in words]
+    if duration is None or duration <= 0:
+        duration = float(times[:, 1].max()) if count else 0.0
+
+    # Silence between consecutive words; short gaps are articulation, not pauses
+    gaps = np.clip(times[1:, 0] - times[:-1, 1], 0.0, None)
+    pauses = gaps[gaps >= MIN_PAUSE_SECONDS]
+    span = float(times[-1, 1] - times[0, 0]) if count else 0.0
+    speaking_time = max(span - float(pauses.sum()), 0.0)
+
+    edges = (MIN_PAUSE_SECONDS,) + PAUSE_BUCKETS + (np.inf,)
+    histogram = np.histogram(pauses, bins=edges)[0] if len(pauses) else np.zeros(len(edges) - 1, dtype=int)
+    labels = [f"{low:g}-{high:g}s" for low, high in zip(edges[:-2], edges[1:-1])] + [f"{edges[-2]:g}s+"]
+
+    single = {filler for filler in filler_words if " " not in filler}
+    phrases = {tuple(filler.split()) for filler in filler_words if " " in filler}
+    filler_positions = []
+    for i, token in enumerate(tokens):
+        if token in single:
+            filler_positions.append({"word": token, "start": float(times[i, 0]), "end": float(times[i, 1])})
+        elif i + 1 < count and (token, tokens[i + 1]) in phrases:
+            filler_positions.append({"word": f"{token} {tokens[i + 1]}",
+                                     "start": float(times[i, 0]), "end": float(times[i + 1, 1])})
+
+    wpm = count / duration * 60 if duration > 0 else 0.0
+    articulation_rate = count / speaking_time * 60 if speaking_time > 0 else 0.0
+    speech_ratio = min(speaking_time / duration, 1.0) if duration > 0 else 0.0
+    filler_count = len(filler_positions)
+
+    speech_rate = min(max(wpm / TARGET_WPM, 0.0), 1.0)
+    # Same scales as FluencyAnalyzer: pauses around a quarter of the time
+    # are ideal, and each percent of filler words costs ten points
+    rhythm_score = max(min(1.0 - abs((1.0 - speech_ratio) - 0.25) * 2, 1.0), 0.0) if count else 0.0
+    accuracy_score = 1.0 - min(filler_count / count * 10, 1.0) if count else 0.0
+
+    return {
+        "word_count": count,
+        "duration": float(duration),
+        "wpm": float(wpm),
+        "articulation_rate": float(articulation_rate),
+        "speech_ratio": float(speech_ratio),
+        "pause_count": int(len(pauses)),
+        "mean_pause_seconds": float(pauses.mean()) if len(pauses) else 0.0,
+        "longest_pause_seconds": float(pauses.max()) if len(pauses) else 0.0,
+        "pause_distribution": dict(zip(labels, (int(n) for n in histogram))),
+        "filler_count": filler_count,
+        "filler_positions": filler_positions,
+        "speech_rate": float(speech_rate),
+        "rhythm_score": float(rhythm_score),
+        "accuracy_score": float(accuracy_score),
+        "overall_score": float((speech_rate + rhythm_score + accuracy_score) / 3),
+    }
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often a long-poll re-checks the shared cache for changes made by other
+# processes (changes in this process wake it immediately)
+POLL_INTERVAL = 0.5
+
+# One condition per recording with waiting long-polls, notified when that
+# recording's status is invalidated in this process. Each entry holds the
+# condition and how many waiters use it; the last waiter removes it.
+_conditions: Dict[str, List[Any]] = {}
+_conditions_lock = threading.Lock()
+
+
+def _acquire_condition(recording_id: str) -> threading.Condition:
+    with _conditions_lock:
+        entry = _conditions.setdefault(recording_id, [threading.Condition(), 0])
+        entry[1] += 1
+        return entry[0]
+
+
+def _release_condition(recording_id: str) -> None:
+    with _conditions_lock:
+        entry = _conditions[recording_id]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _conditions[recording_id]
+
+
+def _cache():
+    from django.core.cache import caches
+    from django.conf import settings
+    return caches[getattr(settings, 'TRANSCRIPTION_STATUS_CACHE_ALIAS', 'default')]
+
+
+def _key(recording_id: str) -> str:
+    return f"transcription:status:{recording_id}"
+
+
+def make_etag(data: Dict[str, Any]) -> str:
+    """
+    Strong ETag for a status response, from its content.
+
+    The transcript, chunk count and scores change whenever a chunk is
+    committed or the transcription is (re)finalized, so equal content means
+    the client is up to date.
+    """
+    body = json.dumps(data, sort_keys=True, default=str).encode()
+    return '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def get_cached_status(recording_id: str) -> Optional[Dict[str, Any]]:
+    """Return the cached {"etag", "data"} entry for a recording, if any."""
+    try:
+        return _cache().get(_key(recording_id))
+    except Exception as e:
+        logger.warning(f"Status cache lookup failed for {recording_id}: {str(e)}")
+        return None
+
+
+def set_cached_status(recording_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Store the GET response for a recording until it changes, and return its entry."""
+    from django.conf import settings
+    entry = {'etag': make_etag(data), 'data': data}
+    try:
+        _cache().set(_key(recording_id), entry, timeout=getattr(settings, 'TRANSCRIPTION_STATUS_CACHE_TTL', 300))
+    except Exception as e:
+        logger.warning(f"Status cache store failed for {recording_id}: {str(e)}")
+    return entry
+
+
+def invalidate_status(recording_id: str) -> None:
+    """Drop a recording's cached response; call whenever its transcript or score changes."""
+    try:
+        _cache().delete(_key(recording_id))
+    except Exception as e:
+        logger.warning(f"Status cache invalidation failed for {recording_id}: {str(e)}")
+    with _conditions_lock:
+        entry = _conditions.get(recording_id)
+    if entry is not None:
+        with entry[0]:
+            entry[0].notify_all()
+
+
+def wait_for_change(recording_id: str, etag: str, timeout: float,
+                    load: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """
+    Block until a recording's status differs from `etag`, for a long-poll.
+
+    Only invalidations of this recording wake the wait early. The database
+    is only read again once the cached entry was invalidated, so an idle
+    wait costs cache lookups only.
+
+    Args:
+        recording_id: Client identifier of the recording
+        etag: The version the client already has
+        timeout: Longest time to wait, in seconds
+        load: Returns the current {"etag", "data"} entry (cached or rebuilt)
+
+    Returns:
+        The new entry, or None if nothing changed in time
+    """
+    deadline = time.monotonic() + timeout
+    changed = _acquire_condition(recording_id)
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            with changed:
+                changed.wait(min(remaining, POLL_INTERVAL))
+            # Cached (possibly rebuilt by another process) or read from the database
+            entry = load(recording_id)
+            if entry is not None and entry['etag'] != etag:
+                return entry
+    finally:
+        _release_condition(recording_id)
@@ -0,0 +1,393 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_decoding import SAMPLE_RATE, decode_audio, open_stream_decoder
+from .chunk_buffer import flush_write_buffer, get_write_buffer
+from .inference import transcribe
+from .speech_metrics import words_from_segments
+
+logger = logging.getLogger(__name__)
+
+# (start, end, text) with times in seconds from the start of the recording
+Word = Tuple[float, float, str]
+
+# Chunks that arrive out of order are held back until the gap is filled or
+# this many later chunks are waiting
+MAX_REORDER = 3
+
+# Clients (the portal, the WebSocket consumer) number chunks from 1; 0 is
+# what a client that does not number its chunks sends
+FIRST_SEQUENCE = 1
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _join(words: List[Word]) -> str:
+    return "".join(word[2] for word in words).strip()
+
+
+class StreamingSession:
+    """
+    Rolling transcription state for one recording.
+
+    Decoded PCM accumulates in a buffer that is re-transcribed on every pass,
+    with the committed text before the buffer given to Whisper as the prompt.
+    A word is committed once two consecutive passes agree on it (local
+    agreement); the words after it are returned as tentative text. Once the
+    buffer grows past trim_seconds, audio up to the last committed word is
+    dropped, so a pass never decodes more than about trim_seconds of audio.
+
+    Sessions live in this process's memory, so every chunk of a recording
+    must reach the same server process.
+    """
+
+    def __init__(self, key: str, model_name: str = "tiny", language: Optional[str] = "en",
+                 min_step_seconds: float = 1.0, trim_seconds: float = 15.0,
+                 max_buffer_seconds: float = 30.0, first_sequence: int = FIRST_SEQUENCE):
+        self.key = key
+        self.model_name = model_name
+        self.language = language
+        self.min_step_seconds = min_step_seconds
+        self.trim_seconds = trim_seconds
+        self.max_buffer_seconds = max(max_buffer_seconds, trim_seconds)
+        self.last_active = time.monotonic()
+
+        self._lock = threading.Lock()        # guards everything below
+        self._pass_lock = threading.Lock()   # one transcription pass at a time
+        self._decoder = None
+        self._reorder: Dict[int, Tuple[bytes, bool]] = {}
+        # Taken from the client's numbering, not from the first chunk to
+        # arrive, which may already be out of order
+        self._next_sequence = first_sequence
+        self.last_sequence = 0
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._audio_offset = 0.0             # seconds dropped from the front of the buffer
+        self._transcribed_until = 0.0        # recording time covered by the last pass
+        self._committed: List[Word] = []
+        self._tentative: List[Word] = []
+        self._finished = False
+
+    @property
+    def committed_text(self) -> str:
+        with self._lock:
+            return _join(self._committed)
+
+    @property
+    def buffered_seconds(self) -> float:
+        with self._lock:
+            return len(self._audio) / SAMPLE_RATE
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio decoded so far, including audio already trimmed."""
+        with self._lock:
+            return self._audio_offset + len(self._audio) / SAMPLE_RATE
+
+    def add_chunk(self, data: bytes, sequence_number: int = 0, standalone: bool = False) -> np.ndarray:
+        """
+        Decode one client chunk and append its audio to the buffer.
+
+        Args:
+            data: Encoded audio for this chunk
+            sequence_number: Client-side order of the chunk
+            standalone: True when the chunk is a complete file (e.g. WAV)
+                rather than a continuation of one compressed stream
+
+        Returns:
+            The newly decoded samples (empty while the chunk waits for an
+            earlier one or the decoder has no output yet)
+        """
+        with self._lock:
+            self.last_active = time.monotonic()
+            decoded = [
+                self._decode_locked(sequence, payload, is_standalone)
+                for sequence, (payload, is_standalone) in self._accept(sequence_number, data, standalone)
+            ]
+        return np.concatenate(decoded) if decoded else np.zeros(0, dtype=np.float32)
+
+    def _decode_locked(self, sequence_number: int, data: bytes, standalone: bool) -> np.ndarray:
+        self.last_sequence = max(self.last_sequence, sequence_number)
+        if standalone:
+            samples = decode_audio(data)
+        else:
+            if self._decoder is None:
+                self._decoder = open_stream_decoder(header=data)
+            self._decoder.feed(data)
+            samples = self._decoder.read(wait=0.2)
+        self._audio = np.concatenate([self._audio, samples])
+        return samples
+
+    def _accept(self, sequence_number: int, data: bytes, standalone: bool) -> List[Tuple[int, Tuple[bytes, bool]]]:
+        """Return the chunks that can be decoded now, in sequence order."""
+        if sequence_number < self._next_sequence:
+            # Unsequenced client or a late duplicate: take it as it comes
+            return [(sequence_number, (data, standalone))]
+        self._reorder[sequence_number] = (data, standalone)
+        ready = []
+        while self._reorder:
+            lowest = min(self._reorder)
+            if lowest != self._next_sequence and len(self._reorder) <= MAX_REORDER:
+                break
+            ready.append((lowest, self._reorder.pop(lowest)))
+            self._next_sequence = lowest + 1
+        return ready
+
+    def process(self, final: bool = False) -> Dict[str, Any]:
+        """
+        Run a transcription pass over the buffer if enough new audio arrived.
+
+        Passes for one recording never overlap: if one is already running this
+        returns the current state immediately, and the running (or next) pass
+        picks up the new audio.
+
+        Args:
+            final: Transcribe whatever is buffered and commit every word
+
+        Returns:
+            Dictionary with text (committed + tentative), committed, tentative,
+            newly_committed, newly_committed_words ([start, end, word] with
+            times in the recording) and sequence_number (the last chunk fed in)
+        """
+        if not self._pass_lock.acquire(blocking=final):
+            return self._state([])
+        try:
+            with self._lock:
+                audio = self._audio
+                offset = self._audio_offset
+                sequence_number = self.last_sequence
+                end = offset + len(audio) / SAMPLE_RATE
+                prompt = _join([word for word in self._committed if word[1] <= offset])[-200:]
+            if len(audio) == 0 or (not final and end - self._transcribed_until < self.min_step_seconds):
+                newly = self._commit_all() if final else []
+                return self._state(newly, sequence_number)
+
+            # Not micro-batched (batch=True): the batched decode has no word
+            # timestamps and one prompt per batch, while agreement and
+            # trimming need real word times and this session's prompt
+            result = transcribe(
+                audio, model_name=self.model_name, language=self.language, fp16=False,
+                initial_prompt=prompt or None, word_timestamps=True, condition_on_previous_text=False,
+                # Each window is new audio: a lookup always misses and the
+                # entry would only evict reusable results
+                cache=False,
+            )
+            words = words_from_segments(result.get("segments", []), offset)
+
+            with self._lock:
+                self._transcribed_until = end
+                newly = self._agree(words)
+                if final:
+                    newly += self._commit_all_locked()
+                newly += self._trim()
+            return self._state(newly, sequence_number)
+        finally:
+            self._pass_lock.release()
+
+    def _agree(self, words: List[Word]) -> List[Word]:
+        """Commit the prefix this pass shares with the previous one."""
+        committed_end = self._committed[-1][1] if self._committed else 0.0
+        words = [word for word in words if word[0] > committed_end - 0.1]
+        # Whisper often repeats the last committed words; drop that overlap
+        if self._committed and words:
+            for n in range(min(5, len(self._committed), len(words)), 0, -1):
+                tail = [_normalize(word[2]) for word in self._committed[-n:]]
+                head = [_normalize(word[2]) for word in words[:n]]
+                if tail == head:
+                    words = words[n:]
+                    break
+        agreed = []
+        for previous, current in zip(self._tentative, words):
+            if _normalize(previous[2]) != _normalize(current[2]):
+                break
+            agreed.append(current)
+        self._committed.extend(agreed)
+        self._tentative = words[len(agreed):]
+        return agreed
+
+    def _commit_all(self) -> List[Word]:
+        with self._lock:
+            return self._commit_all_locked()
+
+    def _commit_all_locked(self) -> List[Word]:
+        newly = self._tentative
+        self._committed.extend(newly)
+        self._tentative = []
+        return newly
+
+    def _trim(self) -> List[Word]:
+        """
+        Drop buffered audio that is already committed once the buffer is long.
+
+        Returns:
+            Words committed without agreement because the buffer overflowed
+        """
+        duration = len(self._audio) / SAMPLE_RATE
+        if duration <= self.trim_seconds:
+            return []
+        forced = []
+        if duration > self.max_buffer_seconds and self._tentative:
+            # No agreement for too long: accept the latest hypothesis as is
+            forced = self._commit_all_locked()
+        if self._committed and self._committed[-1][1] > self._audio_offset:
+            cut = self._committed[-1][1]
+        elif duration > self.max_buffer_seconds:
+            cut = self._audio_offset + duration - self.trim_seconds
+        else:
+            return forced
+        samples = int((cut - self._audio_offset) * SAMPLE_RATE)
+        self._audio = self._audio[samples:]
+        self._audio_offset = cut
+        return forced
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current text without running a pass."""
+        return self._state([])
+
+    def _state(self, newly_committed: List[Word], sequence_number: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            committed = _join(self._committed)
+            tentative = _join(self._tentative)
+            return {
+                "text": f"{committed} {tentative}".strip(),
+                "committed": committed,
+                "tentative": tentative,
+                "newly_committed": _join(newly_committed),
+                "newly_committed_words": [[round(start, 3), round(end, 3), text] for start, end, text in newly_committed],
+                "sequence_number": self.last_sequence if sequence_number is None else sequence_number,
+            }
+
+    def flush(self) -> np.ndarray:
+        """
+        Decode everything still held back and end the stream.
+
+        Returns:
+            The samples this added to the buffer
+        """
+        with self._lock:
+            # A gap that was never filled: decode what did arrive, in order
+            pending, self._reorder = self._reorder, {}
+            decoded = [self._decode_locked(sequence, *pending[sequence]) for sequence in sorted(pending)]
+            if self._decoder is not None and not self._finished:
+                tail = self._decoder.close()
+                self._audio = np.concatenate([self._audio, tail])
+                decoded.append(tail)
+            self._finished = True
+        return np.concatenate(decoded) if decoded else np.zeros(0, dtype=np.float32)
+
+    def finish(self) -> Dict[str, Any]:
+        """Flush the decoder and buffer, committing everything that is left."""
+        self.flush()
+        return self.process(final=True)
+
+    def close(self) -> None:
+        """Release the decoder without transcribing what is left."""
+        with self._lock:
+            if self._decoder is not None and not self._finished:
+                try:
+                    self._decoder.close()
+                except Exception as e:
+                    logger.warning(f"Error closing stream decoder for {self.key}: {str(e)}")
+            self._finished = True
+
+
+_sessions: Dict[str, StreamingSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def _expire_idle_sessions(ttl: float) -> None:
+    now = time.monotonic()
+    with _sessions_lock:
+        expired = [key for key, session in _sessions.items() if now - session.last_active > ttl]
+        sessions = [_sessions.pop(key) for key in expired]
+    for session in sessions:
+        logger.info(f"Closing idle streaming session {session.key}")
+        session.close()
+        try:
+            flush_write_buffer(session.key, close=True)
+        except Exception as e:
+            logger.error(f"Could not flush chunks for {session.key}: {str(e)}")
+
+
+def get_session(key: str, create: bool = True) -> Optional[StreamingSession]:
+    """
+    Return the streaming session for a recording, creating it if needed.
+
+    Args:
+        key: Client recording identifier
+        create: Create a session when none exists
+
+    Returns:
+        The session, or None if it does not exist and create is False
+    """
+    from django.conf import settings
+    _expire_idle_sessions(getattr(settings, 'STREAMING_SESSION_TTL', 300))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None and create:
+            session = StreamingSession(
+                key,
+                model_name=getattr(settings, 'STREAMING_MODEL', 'tiny'),
+                min_step_seconds=getattr(settings, 'STREAMING_MIN_STEP_SECONDS', 1.0),
+                trim_seconds=getattr(settings, 'STREAMING_BUFFER_TRIM_SECONDS', 15.0),
+            )
+            _sessions[key] = session
+        return session
+
+
+def close_session(key: str) -> Optional[StreamingSession]:
+    """Forget a recording's session, write its buffered chunks and return it."""
+    with _sessions_lock:
+        session = _sessions.pop(key, None)
+    flush_write_buffer(key, close=True)
+    return session
+
+
+def claim_chunk(recording, sequence_number: int, data: bytes) -> Optional[str]:
+    """
+    Record that the audio for a sequence number is being processed.
+
+    Claims go through the recording's write buffer under its lock, so of
+    several identical requests (client retries, possibly concurrent) exactly
+    one gets the chunk and the others are told it is a duplicate and can skip
+    decoding and inference. The hash reaches the database with the next flush.
+
+    Returns:
+        The audio's content hash, or None if this exact audio was already received
+    """
+    content_hash = hashlib.sha256(data).hexdigest()
+    if not get_write_buffer(recording).claim(sequence_number, content_hash):
+        return None
+    return content_hash
+
+
+def release_chunk(recording, sequence_number: int, content_hash: str) -> None:
+    """Undo claim_chunk for audio that could not be used, so a retry is processed."""
+    get_write_buffer(recording).release(sequence_number, content_hash)
+
+
+def persist_committed(recording, sequence_number: int, text: str, is_final: bool = False,
+                      words: Optional[List[List[Any]]] = None) -> bool:
+    """
+    Store newly committed text in the recording's TranscriptionChunk rows.
+
+    The row is keyed by the client sequence number that triggered the commit;
+    text committed again under the same number is appended to it. `words`
+    keeps the committed words' timestamps for the finalize-time metrics.
+    Rows are written behind, in batches (see ChunkWriteBuffer).
+
+    Returns:
+        True if this call wrote the buffered rows to the database
+    """
+    from .status_cache import invalidate_status
+    flushed = get_write_buffer(recording).append(sequence_number, text, words or [], is_final=is_final)
+    # Readers flush the buffer on a cache miss, so they see the new text
+    invalidate_status(recording.user_identifier)
+    return flushed
@@ -1,3 +1,1640 @@
-from django.test import TestCase
+import asyncio
+import base64
+import io
+import json
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from concurrent.futures import Future
+from contextlib import ExitStack
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from botocore.exceptions import ClientError
+from django.core.exceptions import RequestAborted
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from . import chunk_buffer, dynamodb_utils, status_cache, vad
+from .audio_buffer import AudioBuffer
+from .audio_decoding import AudioDecodeError, decode_audio, parse_wav
+from .batching import MicroBatcher
+from .chunk_buffer import flush_all_write_buffers, get_write_buffer
+from .dynamodb_cache import cache_stats
+from .dynamodb_codec import CANDIDATE_CODEC, REFERER_CODEC
+from .dynamodb_fake import FakeDynamoDBClient
+from .consumers import UploadASGIHandler, websocket_application
+from .fluency_analyzer import FluencyAnalyzer, analyze_audio
+from .memory_store import InMemoryStore
+from .inference import InferenceExecutor, QueueFullError, transcribe
+from .model_registry import ModelRegistry
+from .models import AudioRecording, FluencyScore, Transcription, TranscriptionChunk
+from .result_cache import MemoryBackend, ResultCache
+from .speech_metrics import compute_speech_metrics
+from .status_cache import invalidate_status
+from .streaming import MAX_REORDER, StreamingSession, close_session
+
+
+def make_wav(seconds, sample_rate=16000):
+    """Return a WAV file of a quiet tone as bytes."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (0.1 * np.sin(2 * np.pi * 220 * t) * 32767).astype('<i2')
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+def fake_transcribe(audio, **options):
+    """Two words per second of audio, numbered from the start of the buffer."""
+    duration = len(audio) / 16000
+    words = [
+        {'start': i * 0.5, 'end': i * 0.5 + 0.4, 'word': f' w{i}'}
+        for i in range(int(duration * 2))
+    ]
+    return {'text': ''.join(w['word'] for w in words), 'language': 'en',
+            'segments': [{'start': 0.0, 'end': duration, 'text': '', 'words': words}]}
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+class WebSocketStreamingTests(TransactionTestCase):
+
+    async def connect(self, path):
+        communicator = ApplicationCommunicator(websocket_application, {'type': 'websocket', 'path': path})
+        await communicator.send_input({'type': 'websocket.connect'})
+        return communicator
+
+    async def test_binary_frames_stream_partials_and_finalize(self):
+        communicator = await self.connect('/ws/transcription/ws-test/')
+        accepted = await communicator.receive_output(timeout=5)
+        self.assertEqual(accepted['type'], 'websocket.accept')
+
+        partials = []
+        for _ in range(3):
+            await communicator.send_input({'type': 'websocket.receive', 'bytes': make_wav(1.0)})
+            message = await communicator.receive_output(timeout=5)
+            partials.append(json.loads(message['text']))
+        self.assertEqual([p['type'] for p in partials], ['partial'] * 3)
+        self.assertEqual(partials[-1]['transcript'], 'w0 w1 w2 w3 w4 w5')
+        self.assertEqual(partials[-1]['committed'], 'w0 w1 w2 w3')
+
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'type': 'finalize'})})
+        message = await communicator.receive_output(timeout=5)
+        final = json.loads(message['text'])
+        self.assertEqual(final['type'], 'final')
+        self.assertEqual(final['transcript'], 'w0 w1 w2 w3 w4 w5')
+        self.assertEqual(final['fluency_score']['word_count'], 6)
+        self.assertEqual(final['fluency_score']['wpm'], 120.0)
+        closed = await communicator.receive_output(timeout=5)
+        self.assertEqual(closed['type'], 'websocket.close')
+
+        recording = await AudioRecording.objects.aget(user_identifier='ws-test')
+        self.assertTrue(recording.is_processed)
+        self.assertFalse(await TranscriptionChunk.objects.filter(recording=recording, is_final=False).aexists())
+
+    async def test_disconnect_finalizes_recording(self):
+        communicator = await self.connect('/ws/transcription/ws-drop/')
+        await communicator.receive_output(timeout=5)
+        await communicator.send_input({'type': 'websocket.receive', 'bytes': make_wav(1.0)})
+        await communicator.receive_output(timeout=5)
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1001})
+        await communicator.wait(timeout=5)
+
+        recording = await AudioRecording.objects.aget(user_identifier='ws-drop')
+        self.assertTrue(recording.is_processed)
+        transcription = await Transcription.objects.aget(recording=recording)
+        self.assertEqual(transcription.text, 'w0 w1')
+
+    async def test_unknown_path_is_rejected(self):
+        communicator = await self.connect('/ws/unknown/')
+        self.assertEqual(await communicator.receive_output(timeout=5), {'type': 'websocket.close', 'code': 4404})
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+class RawUploadTests(TestCase):
+
+    def test_raw_body_is_analyzed(self):
+        response = self.client.post(
+            '/api/transcription/upload-complete/?recording_id=raw-test',
+            data=make_wav(3.0), content_type='application/octet-stream'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['transcript'], 'w0 w1 w2 w3 w4 w5')
+        recording = AudioRecording.objects.get(user_identifier='raw-test')
+        self.assertEqual(recording.transcription.text, 'w0 w1 w2 w3 w4 w5')
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+class AsgiRawUploadTests(TransactionTestCase):
+
+    def upload_scope(self, recording_id):
+        return {
+            'type': 'http', 'method': 'POST', 'path': '/api/transcription/upload-complete/',
+            'query_string': f'recording_id={recording_id}'.encode(),
+            'headers': [(b'content-type', b'application/octet-stream'),
+                        (b'origin', b'http://localhost:3000'), (b'host', b'testserver')],
+        }
+
+    async def test_body_messages_are_streamed(self):
+        communicator = ApplicationCommunicator(UploadASGIHandler(), self.upload_scope('asgi-upload'))
+        body = make_wav(2.0)
+        for start in range(0, len(body), 4096):
+            piece = body[start:start + 4096]
+            await communicator.send_input({
+                'type': 'http.request', 'body': piece, 'more_body': start + 4096 < len(body)
+            })
+        response_start = await communicator.receive_output(timeout=5)
+        response_body = await communicator.receive_output(timeout=5)
+        self.assertEqual(response_start['status'], 200)
+        # The request went through Django's middleware
+        headers = dict(response_start['headers'])
+        self.assertEqual(headers[b'access-control-allow-origin'], b'http://localhost:3000')
+        self.assertEqual(json.loads(response_body['body'])['transcript'], 'w0 w1 w2 w3')
+
+    async def test_disconnect_saves_nothing(self):
+        from . import views
+        started, finished = threading.Event(), threading.Event()
+        outcome = {}
+        analyze = views.analyze_upload_stream
+
+        def recording_outcome(*args, **kwargs):
+            started.set()
+            try:
+                outcome['result'] = analyze(*args, **kwargs)
+            except Exception as e:
+                outcome['error'] = e
+                raise
+            finally:
+                finished.set()
+
+        with mock.patch.object(views, 'analyze_upload_stream', recording_outcome):
+            communicator = ApplicationCommunicator(UploadASGIHandler(), self.upload_scope('asgi-dropped'))
+            body = make_wav(2.0)
+            await communicator.send_input({'type': 'http.request', 'body': body[:len(body) // 2], 'more_body': True})
+            # Disconnect while the view is reading the body
+            self.assertTrue(await asyncio.to_thread(started.wait, 5))
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=5)
+            self.assertTrue(await asyncio.to_thread(finished.wait, 5))
+        self.assertIsInstance(outcome.get('error'), RequestAborted)
+        exists = await sync_to_async(Transcription.objects.filter(recording__user_identifier='asgi-dropped').exists)()
+        self.assertFalse(exists)
+
+
+class StartupTests(TestCase):
+    """Only serving processes load models and start background work."""
+
+    def run_ready(self, argv, environ=None, **settings):
+        from django.apps import apps
+        started = mock.MagicMock()
+        patches = [
+            mock.patch('transcription.apps.sys.argv', argv),
+            mock.patch.dict(os.environ, environ or {}),
+            mock.patch('transcription.apps.atexit.register', started.register),
+            mock.patch('transcription.chunk_buffer.install_shutdown_flush', started.install_shutdown_flush),
+            mock.patch('transcription.chunk_buffer.start_background_flush', started.start_background_flush),
+            mock.patch('transcription.dynamodb_utils.verify_tables', started.verify_tables),
+            mock.patch('transcription.inference.get_executor', started.get_executor),
+            override_settings(WHISPER_INFERENCE_MODE='process', WHISPER_PRELOAD_MODELS=['tiny'], **settings),
+        ]
+        with ExitStack() as stack:
+            for patch in patches:
+                stack.enter_context(patch)
+            apps.get_app_config('transcription').ready()
+        return {name for name, _, _ in started.mock_calls}
+
+    def test_commands_and_scripts_start_nothing(self):
+        for argv in (['benchmark.py', 'codec'], ['manage.py', 'showmigrations'], ['manage.py', 'dbshell'],
+                     ['manage.py', 'createsuperuser'], ['manage.py', 'runserver']):
+            self.assertEqual(self.run_ready(argv), set(), argv)
+
+    def test_serving_processes_warm_up(self):
+        expected = {'install_shutdown_flush', 'start_background_flush', 'verify_tables', 'register',
+                    'get_executor', 'get_executor().warm_up'}
+        self.assertEqual(self.run_ready(['manage.py', 'runserver', '--noreload']), expected)
+        self.assertEqual(self.run_ready(['manage.py', 'runserver'], {'RUN_MAIN': 'true'}), expected)
+        self.assertEqual(self.run_ready(['gunicorn', 'backend.wsgi'], TRANSCRIPTION_SERVING=True), expected)
+
+
+class FakeModel:
+    """Stand-in for a Whisper model holding `size` float32 parameters."""
+
+    def __init__(self, name, size):
+        import torch
+        self.name = name
+        self.weights = torch.zeros(size, dtype=torch.float32)
+        self.is_half = False
+
+    def parameters(self):
+        return [self.weights]
+
+    def buffers(self):
+        return []
+
+    def half(self):
+        self.weights = self.weights.half()
+        self.is_half = True
+        return self
+
+
+def wav_bytes(frames, sample_rate=16000, channels=1, sample_width=2):
+    """Return a PCM WAV file of already-encoded frames."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(sample_width)
+        f.setframerate(sample_rate)
+        f.writeframes(frames)
+    return buffer.getvalue()
+
+
+class AudioDecodingTests(TestCase):
+
+    def test_wav_is_parsed_without_ffmpeg(self):
+        # Stereo 16-bit: each frame is averaged to mono
+        frames = np.array([16384, -16384, 8192, 8192, -32768, -32768], dtype='<i2').tobytes()
+        with mock.patch('transcription.audio_decoding.subprocess.run') as run:
+            samples = decode_audio(wav_bytes(frames, channels=2))
+        run.assert_not_called()
+        self.assertEqual(samples.dtype, np.float32)
+        self.assertEqual(samples.tolist(), [0.0, 0.25, -1.0])
+
+        unsigned = decode_audio(wav_bytes(bytes([128, 192, 0]), sample_width=1))
+        self.assertEqual(unsigned.tolist(), [0.0, 0.5, -1.0])
+
+    def test_wav_formats_and_sample_rates(self):
+        samples, rate = parse_wav(wav_bytes(np.zeros(80, dtype='<i2').tobytes(), sample_rate=8000))
+        self.assertEqual((len(samples), rate), (80, 8000))
+        # Resampled to 16 kHz on the way out
+        self.assertEqual(len(decode_audio(wav_bytes(np.zeros(8000, dtype='<i2').tobytes(), sample_rate=8000))), 16000)
+
+        # A streaming writer's header leaves the data size at 0
+        data = bytearray(make_wav(0.5))
+        data[40:44] = b'\x00\x00\x00\x00'
+        self.assertEqual(len(parse_wav(bytes(data))[0]), 8000)
+
+        self.assertIsNone(parse_wav(b'OggS' + bytes(100)))
+        self.assertIsNone(parse_wav(make_wav(0.5)[:30]))
+
+    def test_other_formats_are_piped_through_ffmpeg(self):
+        pcm = np.array([0, 16384, -16384], dtype='<i2').tobytes()
+        completed = subprocess.CompletedProcess(args=[], returncode=0, stdout=pcm, stderr=b'')
+        with mock.patch('transcription.audio_decoding.subprocess.run', return_value=completed) as run:
+            samples = decode_audio(b'OggS-not-really')
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index('-i') + 1], 'pipe:0')
+        self.assertEqual(run.call_args.kwargs['input'], b'OggS-not-really')
+        self.assertEqual(samples.tolist(), [0.0, 0.5, -0.5])
+
+    def test_missing_ffmpeg_falls_back_to_soundfile(self):
+        import soundfile as sf
+        flac = io.BytesIO()
+        sf.write(flac, np.full(1600, 0.25, dtype=np.float32), 16000, format='FLAC')
+        with mock.patch('transcription.audio_decoding.subprocess.run', side_effect=FileNotFoundError('ffmpeg')):
+            samples = decode_audio(flac.getvalue())
+            self.assertEqual(len(samples), 1600)
+            self.assertAlmostEqual(float(samples.mean()), 0.25, places=3)
+            with self.assertRaises(AudioDecodeError) as raised:
+                decode_audio(b'not audio at all')
+        self.assertIn('ffmpeg is not installed', str(raised.exception))
+
+
+class AudioBufferTests(TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        envelope = (np.sin(np.arange(48000) / 3000) > 0).astype(np.float32)
+        self.samples = (0.2 * rng.standard_normal(48000) * envelope).astype(np.float32)
+
+    def test_features_share_one_stft(self):
+        import librosa
+        audio = AudioBuffer(self.samples)
+        with mock.patch('transcription.audio_buffer.librosa.stft', wraps=librosa.stft) as stft:
+            rms, envelope = audio.rms, audio.onset_envelope
+            audio.onsets, audio.speech_intervals, audio.speech_ratio, audio.pauses
+            FluencyAnalyzer().analyze(audio)
+            self.assertIs(audio.rms, rms)
+            self.assertIs(audio.onset_envelope, envelope)
+        self.assertEqual(stft.call_count, 1)
+
+        # The same values librosa computes from the raw signal
+        np.testing.assert_allclose(rms, librosa.feature.rms(S=np.abs(librosa.stft(self.samples)))[0], rtol=1e-5)
+        np.testing.assert_allclose(envelope, librosa.onset.onset_strength(y=self.samples, sr=16000),
+                                   rtol=1e-3, atol=1e-4)
+
+    def test_source_is_decoded_once_for_whisper_and_metrics(self):
+        captured = {}
+
+        def capture_transcribe(audio, **options):
+            captured.update(options, audio=audio)
+            return fake_transcribe(audio, **options)
+
+        with mock.patch('transcription.audio_buffer.decode_audio', return_value=self.samples) as decode, \
+                mock.patch('transcription.fluency_analyzer.transcribe', capture_transcribe):
+            result = analyze_audio(b'encoded audio')
+        decode.assert_called_once_with(b'encoded audio')
+        self.assertEqual(result['duration_seconds'], 3.0)
+        # Whisper gets the decoded samples and the speech regions found for the metrics
+        self.assertIs(captured['audio'], decode.return_value)
+        self.assertGreater(len(captured['speech_intervals']), 0)
+
+        buffer = AudioBuffer(self.samples)
+        self.assertIs(AudioBuffer.from_source(buffer), buffer)
+
+
+class ModelRegistryTests(TestCase):
+
+    def setUp(self):
+        self.loads = []
+
+    def loader(self, name, device=None, download_root=None):
+        self.loads.append((name, device))
+        return FakeModel(name, {'tiny': 1000, 'base': 2000, 'small': 4000}[name])
+
+    def test_models_are_keyed_by_name_device_and_precision(self):
+        registry = ModelRegistry(loader=self.loader)
+        tiny = registry.get('tiny', device='cpu')
+        self.assertIs(registry.get('tiny', device='cpu'), tiny)
+        self.assertIsNot(registry.get('base', device='cpu'), tiny)
+        self.assertEqual(registry.get('base', device='cpu').name, 'base')
+        half = registry.get('tiny', device='cpu', precision='fp16')
+        self.assertTrue(half.is_half)
+        self.assertFalse(tiny.is_half)
+        self.assertEqual(set(registry.loaded_keys()),
+                         {('tiny', 'cpu', 'fp32'), ('base', 'cpu', 'fp32'), ('tiny', 'cpu', 'fp16')})
+        stats = registry.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 3))
+
+    def test_least_recently_used_models_are_evicted_over_budget(self):
+        # tiny and base fit (12 kB of float32); small does not fit with them
+        registry = ModelRegistry(memory_budget_bytes=24000, loader=self.loader)
+        registry.get('tiny', device='cpu')
+        registry.get('base', device='cpu')
+        registry.get('tiny', device='cpu')
+        registry.get('small', device='cpu')
+        # base was the least recently used
+        self.assertEqual(registry.loaded_keys(), (('tiny', 'cpu', 'fp32'), ('small', 'cpu', 'fp32')))
+        self.assertEqual(registry.stats()['memory_bytes'], 20000)
+        self.assertEqual(registry.stats()['evictions'], 1)
+
+        # A model larger than the budget is still returned and kept alone
+        registry.configure(memory_budget_bytes=8000)
+        self.assertEqual(registry.get('small', device='cpu').name, 'small')
+        self.assertEqual(registry.loaded_keys(), (('small', 'cpu', 'fp32'),))
+
+    def test_concurrent_requests_load_once(self):
+        registry = ModelRegistry(loader=self.loader)
+        barrier = threading.Barrier(4)
+
+        def get():
+            barrier.wait()
+            registry.get('tiny', device='cpu')
+
+        threads = [threading.Thread(target=get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.loads, [('tiny', 'cpu')])
+
+
+class InferenceBackpressureTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.started, self.release = threading.Event(), threading.Event()
+        self.executor = InferenceExecutor(num_workers=1, max_queue_depth=0, mode='thread')
+        self.addCleanup(self.executor.shutdown)
+        self.addCleanup(self.release.set)
+        self.addCleanup(close_session, 'busy-test')
+
+    def blocking_transcribe(self, model_name, audio, options):
+        self.started.set()
+        self.release.wait(5)
+        return {'text': '', 'language': 'en', 'segments': []}
+
+    def test_full_queue_answers_503_with_retry_after(self):
+        with mock.patch('transcription.inference._run_transcribe', self.blocking_transcribe), \
+                mock.patch('transcription.inference.get_executor', return_value=self.executor):
+            running = self.executor.submit('tiny', np.zeros(16000, dtype=np.float32))
+            self.assertTrue(self.started.wait(5))
+            with self.assertRaises(QueueFullError) as raised:
+                self.executor.submit('tiny', np.zeros(16000, dtype=np.float32))
+            self.assertGreaterEqual(raised.exception.retry_after, 1)
+
+            response = self.client.post('/api/transcription/stream/', json.dumps({
+                'audio': base64.b64encode(make_wav(1.0)).decode(),
+                'recording_id': 'busy-test',
+                'sequence_number': 1,
+                'file_extension': '.wav',
+            }), content_type='application/json')
+            self.release.set()
+            running.result(timeout=5)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(response.json()['retry_after']))
+        metrics = self.executor.metrics()
+        self.assertEqual((metrics['rejected'], metrics['completed']), (2, 1))
+
+
+class MicroBatcherTests(TestCase):
+
+    def make_batcher(self, submit_batch, **options):
+        batcher = MicroBatcher(submit_batch, **options)
+        self.addCleanup(batcher.shutdown)
+        return batcher
+
+    def test_groups_by_key_and_routes_results(self):
+        calls = []
+
+        def submit_batch(key, payloads):
+            calls.append((key, list(payloads)))
+            future = Future()
+            future.set_result([f'{key}:{payload}' for payload in payloads])
+            return future
+
+        batcher = self.make_batcher(submit_batch, max_batch_size=4, max_wait_ms=200)
+        futures = [batcher.submit('a', i) for i in range(5)] + [batcher.submit('b', i) for i in range(3)]
+        self.assertEqual([future.result(timeout=5) for future in futures],
+                         [f'a:{i}' for i in range(5)] + [f'b:{i}' for i in range(3)])
+        self.assertEqual(calls, [('a', [0, 1, 2, 3]), ('a', [4]), ('b', [0, 1, 2])])
+        self.assertEqual(batcher.stats()['batches'], 3)
+
+    def test_lone_item_flushes_after_max_wait(self):
+        def submit_batch(key, payloads):
+            future = Future()
+            future.set_result(payloads)
+            return future
+
+        batcher = self.make_batcher(submit_batch, max_batch_size=8, max_wait_ms=50)
+        start = time.monotonic()
+        self.assertEqual(batcher.submit('a', 'x').result(timeout=5), 'x')
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+    def test_errors_reach_every_item(self):
+        def failing_batch(key, payloads):
+            future = Future()
+            future.set_exception(RuntimeError('decode failed'))
+            return future
+
+        def raising_batch(key, payloads):
+            raise OverflowError('queue full')
+
+        for submit_batch, error in ((failing_batch, RuntimeError), (raising_batch, OverflowError)):
+            batcher = self.make_batcher(submit_batch, max_batch_size=3, max_wait_ms=100)
+            futures = [batcher.submit('a', i) for i in range(3)]
+            for future in futures:
+                with self.assertRaises(error):
+                    future.result(timeout=5)
+
+    def test_cancelled_items(self):
+        dispatched = threading.Event()
+        batches = []
+
+        def submit_batch(key, payloads):
+            batches.append(list(payloads))
+            batches_future = Future()
+            pending.append(batches_future)
+            dispatched.set()
+            return batches_future
+
+        pending = []
+        batcher = self.make_batcher(submit_batch, max_batch_size=2, max_wait_ms=200)
+        # Cancelled while queued: never sent to Whisper
+        queued = batcher.submit('a', 'dropped')
+        self.assertTrue(queued.cancel())
+        first, second = batcher.submit('a', 1), batcher.submit('a', 2)
+        self.assertTrue(dispatched.wait(5))
+        self.assertEqual(batches, [[1, 2]])
+
+        # Once dispatched a caller's timeout cannot cancel its item, and the
+        # rest of the batch still gets results
+        self.assertFalse(first.cancel())
+        pending[0].set_result(['one', 'two'])
+        self.assertEqual(first.result(timeout=5), 'one')
+        self.assertEqual(second.result(timeout=5), 'two')
+
+
+def scripted_result(*words):
+    """Transcription result with the given (start, word) pairs, each 0.4 s long."""
+    timed = [{'start': start, 'end': start + 0.4, 'word': f' {word}'} for start, word in words]
+    return {'text': ''.join(w['word'] for w in timed), 'language': 'en',
+            'segments': [{'start': 0.0, 'end': 30.0, 'text': '', 'words': timed}]}
+
+
+class StreamingSessionTests(TestCase):
+
+    def setUp(self):
+        # Each chunk decodes to a second of its own value, so order is visible
+        patcher = mock.patch('transcription.streaming.decode_audio',
+                             side_effect=lambda data: np.full(16000, float(data.decode()), dtype=np.float32))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reorders_from_the_first_sequence_number(self):
+        session = StreamingSession('reorder', min_step_seconds=0.0)
+        # Chunk 2 overtakes chunk 1: held back rather than taken as the start
+        self.assertEqual(len(session.add_chunk(b'2', 2, standalone=True)), 0)
+        decoded = session.add_chunk(b'1', 1, standalone=True)
+        self.assertEqual(decoded.tolist(), [1.0] * 16000 + [2.0] * 16000)
+        self.assertEqual(session.add_chunk(b'3', 3, standalone=True).tolist(), [3.0] * 16000)
+        self.assertEqual(session.last_sequence, 3)
+
+    def test_gap_is_skipped_once_enough_chunks_wait(self):
+        session = StreamingSession('gap', min_step_seconds=0.0)
+        for sequence in range(3, 3 + MAX_REORDER):
+            self.assertEqual(len(session.add_chunk(str(sequence).encode(), sequence, standalone=True)), 0)
+        decoded = session.add_chunk(b'9', 3 + MAX_REORDER, standalone=True)
+        self.assertEqual(len(decoded), 16000 * (MAX_REORDER + 1))
+        # Chunk 1 or 2 arriving now is too late to reorder and is appended
+        self.assertEqual(len(session.add_chunk(b'1', 1, standalone=True)), 16000)
+
+    def test_unsequenced_chunks_are_taken_as_they_come(self):
+        session = StreamingSession('unsequenced', min_step_seconds=0.0)
+        for value in (b'5', b'6'):
+            self.assertEqual(session.add_chunk(value, 0, standalone=True).tolist(), [float(value)] * 16000)
+
+    def test_words_are_committed_once_two_passes_agree(self):
+        session = StreamingSession('agreement', min_step_seconds=0.0)
+        session.add_chunk(b'1', 1, standalone=True)
+        passes = [
+            scripted_result((0.0, 'a'), (0.5, 'b'), (1.0, 'c')),
+            scripted_result((0.0, 'a'), (0.5, 'b'), (1.0, 'd')),
+            # Whisper repeats the committed "b"; only "d" is new agreement
+            scripted_result((0.5, 'b'), (1.0, 'd'), (1.5, 'e')),
+            scripted_result((1.0, 'd'), (1.5, 'e'), (2.0, 'f')),
+        ]
+        with mock.patch('transcription.streaming.transcribe', side_effect=passes):
+            first = session.process()
+            self.assertEqual((first['committed'], first['tentative']), ('', 'a b c'))
+            second = session.process()
+            self.assertEqual((second['newly_committed'], second['tentative']), ('a b', 'd'))
+            self.assertEqual(second['newly_committed_words'], [[0.0, 0.4, ' a'], [0.5, 0.9, ' b']])
+            third = session.process()
+            self.assertEqual((third['newly_committed'], third['tentative']), ('d', 'e'))
+            final = session.finish()
+        self.assertEqual(final['newly_committed'], 'e f')
+        self.assertEqual(session.committed_text, 'a b d e f')
+        self.assertEqual(final['tentative'], '')
+
+
+class CountingExecutor:
+    """Stand-in for the inference executor that counts Whisper runs."""
+
+    def __init__(self):
+        self.runs = 0
+
+    def submit(self, model_name, audio, **options):
+        self.runs += 1
+        future = Future()
+        future.set_result(fake_transcribe(audio, **options))
+        return future
+
+    submit_window = submit
+
+
+class VoiceActivityTests(TestCase):
+
+    def setUp(self):
+        self.executor = CountingExecutor()
+        patches = [
+            mock.patch('transcription.inference.get_executor', return_value=self.executor),
+            mock.patch('transcription.inference.get_result_cache', return_value=None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # One second of speech, two of silence, one of speech
+        rng = np.random.default_rng(0)
+        self.audio = np.zeros(64000, dtype=np.float32)
+        self.audio[:16000] = 0.3 * rng.standard_normal(16000)
+        self.audio[48000:] = 0.3 * rng.standard_normal(16000)
+
+    def test_detects_speech_regions(self):
+        import librosa
+        np.testing.assert_allclose(vad.frame_rms(self.audio), librosa.feature.rms(y=self.audio)[0], rtol=1e-4, atol=1e-6)
+        intervals = vad.detect_speech(self.audio)
+        self.assertEqual(len(intervals), 2)
+        # Padded by 0.15 s around each region, give or take a 2048-sample frame
+        np.testing.assert_allclose(intervals / 16000, [[0.0, 1.15], [2.85, 4.0]], atol=0.1)
+        self.assertEqual(vad.pause_stats(intervals, len(self.audio))['pause_count'], 1)
+
+    def test_silence_is_not_sent_to_whisper(self):
+        result = transcribe(np.zeros(32000, dtype=np.float32), model_name='tiny', language='en')
+        self.assertEqual(result, {'text': '', 'language': 'en', 'segments': []})
+        quiet = (1e-5 * np.random.default_rng(1).standard_normal(32000)).astype(np.float32)
+        self.assertEqual(transcribe(quiet, model_name='tiny')['segments'], [])
+        self.assertEqual(self.executor.runs, 0)
+
+    def test_only_speech_is_transcribed_and_times_map_back(self):
+        sent = []
+
+        def submit(model_name, audio, **options):
+            sent.append(len(audio))
+            return CountingExecutor.submit(self.executor, model_name, audio, **options)
+
+        with mock.patch.object(self.executor, 'submit', side_effect=submit):
+            result = transcribe(self.audio, model_name='tiny')
+            with override_settings(WHISPER_VAD=False):
+                transcribe(self.audio, model_name='tiny')
+        self.assertEqual(sent[-1], 64000)
+        # About 2.5 s of padded speech plus a short gap instead of 4 s
+        self.assertLess(sent[0], 48000)
+        (_, first_end), (second_start, _) = vad.detect_speech(self.audio) / 16000
+        starts = [word['start'] for word in result['segments'][0]['words']]
+        # No word is placed in the silence between the regions
+        self.assertFalse([start for start in starts if first_end < start < second_start])
+        self.assertGreater(max(starts), second_start)
+
+
+class ResultCacheTests(TestCase):
+
+    def setUp(self):
+        self.executor = CountingExecutor()
+        self.cache = ResultCache(MemoryBackend(max_entries=2, ttl=60))
+        patches = [
+            mock.patch('transcription.inference.get_executor', return_value=self.executor),
+            mock.patch('transcription.inference.get_result_cache', return_value=self.cache),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.audio = np.random.default_rng(0).uniform(-0.5, 0.5, 32000).astype(np.float32)
+
+    def test_identical_audio_is_transcribed_once(self):
+        first = transcribe(self.audio.copy(), model_name='tiny', language='en')
+        second = transcribe(self.audio.copy(), model_name='tiny', language='en')
+        self.assertEqual(first, second)
+        self.assertEqual(self.executor.runs, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+        transcribe(self.audio, model_name='base', language='en')
+        transcribe(self.audio, model_name='tiny', language='de')
+        self.assertEqual(self.executor.runs, 3)
+
+    def test_entries_are_evicted_and_expire(self):
+        for seed in range(3):
+            transcribe(np.full(16000, 0.1 * (seed + 1), dtype=np.float32), model_name='tiny')
+        self.assertEqual(self.cache.stats()['size'], 2)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+        transcribe(self.audio, model_name='tiny')
+        with mock.patch('transcription.result_cache.time.monotonic', return_value=10 ** 9):
+            transcribe(self.audio, model_name='tiny')
+        self.assertEqual(self.executor.runs, 5)
+
+    def test_streaming_windows_are_not_micro_batched(self):
+        session = StreamingSession('unbatched', min_step_seconds=0.0)
+        session.add_chunk(make_wav(2.0), sequence_number=1, standalone=True)
+        with mock.patch.object(self.executor, 'submit', wraps=self.executor.submit) as submit, \
+                mock.patch.object(self.executor, 'submit_window') as submit_window:
+            session.process()
+            session.process()
+        # Windows short enough to batch still go to model.transcribe, with
+        # word timestamps and the session's prompt
+        submit_window.assert_not_called()
+        self.assertEqual(submit.call_count, 2)
+        for call in submit.call_args_list:
+            self.assertTrue(call.kwargs['word_timestamps'])
+            self.assertIn('initial_prompt', call.kwargs)
+
+    def test_key_covers_every_option(self):
+        transcribe(self.audio, model_name='tiny', language='en')
+        transcribe(self.audio, model_name='tiny', language='en', initial_prompt='Hello.')
+        # The batched decode returns no timestamps, so it is a different result
+        transcribe(self.audio, model_name='tiny', language='en', batch=True)
+        self.assertEqual(self.executor.runs, 3)
+
+    def test_streaming_windows_bypass_the_cache(self):
+        session = StreamingSession('cache-bypass', min_step_seconds=0.0)
+        with mock.patch('transcription.streaming.transcribe', wraps=transcribe) as wrapped:
+            session.add_chunk(make_wav(2.0), sequence_number=1, standalone=True)
+            session.process()
+        self.assertFalse(wrapped.call_args.kwargs['cache'])
+        self.assertEqual(self.executor.runs, 1)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+
+class FluencyBatchTests(TestCase):
+
+    def test_batch_matches_single_analysis(self):
+        rng = np.random.default_rng(0)
+        signals = []
+        for seconds in (4.0, 0.3, 9.5, 6.0):
+            n = int(seconds * 16000)
+            envelope = (np.sin(np.arange(n) / 2000) > 0).astype(np.float32)
+            signals.append((0.2 * rng.standard_normal(n) * envelope).astype(np.float32))
+
+        analyzer = FluencyAnalyzer()
+        batched = analyzer.analyze_batch(signals, batch_size=3)
+        self.assertEqual(len(batched), len(signals))
+        for signal, row in zip(signals, batched):
+            single = analyzer.analyze(AudioBuffer(signal))
+            self.assertAlmostEqual(float(row['overall_score']), single['overall_score'], places=5)
+            self.assertAlmostEqual(float(row['rhythm_score']), single['rhythm_score'], places=5)
+            self.assertAlmostEqual(float(row['duration']), len(signal) / 16000, places=5)
+
+
+class SpeechMetricsTests(TestCase):
+
+    def test_metrics_from_word_timestamps(self):
+        words = [
+            [0.0, 0.4, ' So'], [0.5, 0.9, ' I'], [1.0, 1.4, ' think'],
+            # 1.6 s pause
+            [3.0, 3.3, ' you'], [3.3, 3.6, ' know'], [3.7, 4.0, ' it'],
+            # 0.5 s pause
+            [4.5, 5.0, ' works.'],
+        ]
+        metrics = compute_speech_metrics(words, duration=6.0)
+        self.assertEqual(metrics['word_count'], 7)
+        self.assertAlmostEqual(metrics['wpm'], 70.0)
+        self.assertEqual(metrics['pause_count'], 2)
+        self.assertAlmostEqual(metrics['longest_pause_seconds'], 1.6)
+        self.assertEqual(metrics['pause_distribution'], {'0.25-0.5s': 0, '0.5-1s': 1, '1-2s': 1, '2s+': 0})
+        # 5 s from first to last word, 2.1 s of it pauses
+        self.assertAlmostEqual(metrics['articulation_rate'], 7 / 2.9 * 60)
+        self.assertAlmostEqual(metrics['speech_ratio'], 2.9 / 6.0)
+        self.assertEqual([(f['word'], f['start']) for f in metrics['filler_positions']], [('so', 0.0), ('you know', 3.0)])
+
+
+class GetTranscriptionTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.recording = AudioRecording.objects.create(user_identifier='get-test')
+        for sequence in range(1, 21):
+            TranscriptionChunk.objects.create(
+                recording=self.recording, text=f'w{sequence}', sequence_number=sequence,
+                words=[[sequence * 0.5, sequence * 0.5 + 0.4, f' w{sequence}']]
+            )
+
+    def test_finalized_recording_is_served_from_one_query_then_cache(self):
+        response = self.client.post('/api/transcription/finalize/get-test/')
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1):
+            first = self.client.get('/api/transcription/get-transcription/get-test/').json()
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/transcription/get-transcription/get-test/').json()
+        self.assertEqual(first, second)
+        self.assertEqual(first['chunk_count'], 20)
+        self.assertEqual(first['transcript'], ' '.join(f'w{i}' for i in range(1, 21)))
+        self.assertEqual(first['fluency_score']['word_count'], 20)
+
+    def test_finalize_invalidates_cached_response(self):
+        before = self.client.get('/api/transcription/get-transcription/get-test/').json()
+        self.assertNotIn('fluency_score', before)
+        self.client.post('/api/transcription/finalize/get-test/')
+        after = self.client.get('/api/transcription/get-transcription/get-test/').json()
+        self.assertTrue(after['is_processed'])
+        self.assertIn('fluency_score', after)
+
+    def test_etag_and_long_poll(self):
+        url = '/api/transcription/get-transcription/get-test/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Nothing changes: the long-poll gives up with 304 after the wait
+        response = self.client.get(url + '?wait=0.6', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A chunk is committed while the client waits
+        TranscriptionChunk.objects.create(recording=self.recording, text='w21', sequence_number=21)
+        timer = threading.Timer(0.2, invalidate_status, args=['get-test'])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        response = self.client.get(url + '?wait=5', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response.json()['transcript'].endswith('w21'))
+
+    def test_long_poll_ignores_other_recordings(self):
+        loads = []
+
+        def load(recording_id):
+            loads.append(recording_id)
+            return {'etag': '"same"', 'data': {}}
+
+        timer = threading.Timer(0.1, invalidate_status, args=['get-other'])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        with mock.patch.object(status_cache, 'POLL_INTERVAL', 5):
+            started = time.monotonic()
+            self.assertIsNone(status_cache.wait_for_change('get-test', '"same"', 0.5, load))
+        # Woken neither by the other recording's change nor to reload early
+        self.assertEqual(loads, ['get-test'])
+        self.assertGreaterEqual(time.monotonic() - started, 0.5)
+        self.assertEqual(status_cache._conditions, {})
+
+        # Its own recording's change wakes it at once
+        timer = threading.Timer(0.1, invalidate_status, args=['get-test'])
+        timer.start()
+        self.addCleanup(timer.cancel)
+        with mock.patch.object(status_cache, 'POLL_INTERVAL', 5):
+            started = time.monotonic()
+            self.assertIsNotNone(status_cache.wait_for_change('get-test', '"old"', 2, load))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(loads, ['get-test', 'get-test'])
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+class QueryCountTests(TestCase):
+    """Database round trips per request, so regressions in the hot paths show up."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def stream(self, recording_id, sequence_number, seconds=1.0):
+        return self.client.post('/api/transcription/stream/', json.dumps({
+            'audio': base64.b64encode(make_wav(seconds)).decode(),
+            'recording_id': recording_id,
+            'sequence_number': sequence_number,
+            'file_extension': '.wav',
+        }), content_type='application/json')
+
+    def test_stream_chunk(self):
+        self.stream('qc-stream', 1)
+        # Recording lookup only: the chunk's rows are written behind
+        with self.assertNumQueries(1):
+            response = self.stream('qc-stream', 2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_finalize(self):
+        for sequence in range(1, 4):
+            self.stream('qc-finalize', sequence)
+        with self.assertNumQueries(15):
+            response = self.client.post('/api/transcription/finalize/qc-finalize/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FluencyScore.objects.get(recording__user_identifier='qc-finalize').word_count, 6)
+
+    def test_raw_upload(self):
+        with self.assertNumQueries(16):
+            response = self.client.post('/api/transcription/upload-complete/?recording_id=qc-raw',
+                                        data=make_wav(2.0), content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 200)
+
+    def test_upload(self):
+        with mock.patch('transcription.fluency_analyzer.transcribe', fake_transcribe):
+            with self.assertNumQueries(17):
+                response = self.client.post('/api/transcription/upload/', {
+                    'audio_file': io.BytesIO(make_wav(2.0)), 'user_identifier': 'qc-upload'
+                })
+        self.assertEqual(response.status_code, 201)
+        recording = AudioRecording.objects.get(user_identifier='qc-upload')
+        self.assertEqual(recording.transcription.text, response.json()['transcript'])
+        self.assertEqual(recording.fluency_score.word_count, 4)
+
+    def test_process(self):
+        from django.contrib.auth import get_user_model
+        self.client.force_login(get_user_model().objects.create_user('qc-user'))
+        with mock.patch('transcription.views.transcribe', fake_transcribe):
+            # Session and user, recording get_or_create, retry check, chunk update_or_create
+            with self.assertNumQueries(13):
+                response = self.client.post('/api/transcription/recordings/process/', {
+                    'recording_id': 'qc-process', 'sequence_number': 1,
+                    'audio': base64.b64encode(make_wav(1.0)).decode(),
+                }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TranscriptionChunk.objects.get(recording__user_identifier='qc-process').text, 'w0 w1')
+
+
+class IdempotentIngestionTests(TestCase):
+    """Retried chunks are stored once and never transcribed twice."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.calls = 0
+
+    def counting_transcribe(self, audio, **options):
+        self.calls += 1
+        return fake_transcribe(audio, **options)
+
+    def post_chunk(self, recording_id, sequence_number, audio):
+        return self.client.post('/api/transcription/stream/', json.dumps({
+            'audio': base64.b64encode(audio).decode(),
+            'recording_id': recording_id,
+            'sequence_number': sequence_number,
+            'file_extension': '.wav',
+        }), content_type='application/json')
+
+    def test_retried_stream_chunk(self):
+        first = second = make_wav(1.0)
+        with mock.patch('transcription.streaming.transcribe', self.counting_transcribe):
+            self.post_chunk('retry-test', 1, first)
+            self.post_chunk('retry-test', 2, second)
+            calls = self.calls
+            response = self.post_chunk('retry-test', 2, second)
+        self.assertEqual(self.calls, calls)
+        self.assertTrue(response.json()['duplicate'])
+        self.assertEqual(response.json()['transcript'], 'w0 w1 w2 w3')
+
+        recording = AudioRecording.objects.get(user_identifier='retry-test')
+        self.assertEqual(AudioRecording.objects.filter(user_identifier='retry-test').count(), 1)
+        with mock.patch('transcription.streaming.transcribe', fake_transcribe):
+            data = self.client.post('/api/transcription/finalize/retry-test/').json()
+        self.assertEqual(data['transcript'], 'w0 w1 w2 w3')
+        self.assertEqual(recording.chunks.filter(sequence_number=2).count(), 1)
+        self.assertEqual(FluencyScore.objects.get(recording=recording).word_count, 4)
+
+    def test_undecodable_stream_chunk_is_rejected(self):
+        with mock.patch('transcription.streaming.transcribe', self.counting_transcribe):
+            self.post_chunk('bad-chunk', 1, make_wav(1.0))
+            response = self.post_chunk('bad-chunk', 2, b'RIFF' + b'\x00' * 40)
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json()['accepted'])
+            self.assertIn('error', response.json())
+            calls = self.calls
+
+            # The chunk was not claimed, so a corrected retry is processed
+            response = self.post_chunk('bad-chunk', 2, make_wav(1.0))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('duplicate', response.json())
+        self.assertGreater(self.calls, calls)
+
+    def test_retried_process_chunk(self):
+        from django.contrib.auth import get_user_model
+        self.client.force_login(get_user_model().objects.create_user('retry-user'))
+        payload = {'recording_id': 'retry-process', 'sequence_number': 1,
+                   'audio': base64.b64encode(make_wav(1.0)).decode()}
+        with mock.patch('transcription.views.transcribe', self.counting_transcribe):
+            for _ in range(2):
+                response = self.client.post('/api/transcription/recordings/process/', payload,
+                                            content_type='application/json')
+                self.assertEqual(response.json()['transcription']['text'], 'w0 w1')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(TranscriptionChunk.objects.filter(recording__user_identifier='retry-process').count(), 1)
+
+    def test_processed_chunks_are_scored_from_their_words(self):
+        from django.contrib.auth import get_user_model
+        self.client.force_login(get_user_model().objects.create_user('words-user'))
+        with mock.patch('transcription.views.transcribe', fake_transcribe):
+            for sequence_number in (1, 2):
+                self.client.post('/api/transcription/recordings/process/', {
+                    'recording_id': 'process-words', 'sequence_number': sequence_number,
+                    'audio': base64.b64encode(make_wav(1.0)).decode(),
+                }, content_type='application/json')
+        data = self.client.post('/api/transcription/finalize/process-words/').json()
+        self.assertEqual(data['transcript'], 'w0 w1 w0 w1')
+
+        # The second chunk's words follow the first's instead of restarting at 0
+        words = Transcription.objects.get(recording__user_identifier='process-words').words
+        self.assertEqual([word[0] for word in words], [0.0, 0.5, 0.9, 1.4])
+        score = FluencyScore.objects.get(recording__user_identifier='process-words')
+        self.assertEqual(score.word_count, 4)
+        self.assertGreater(score.wpm, 0)
+        self.assertGreater(score.overall_score, 0)
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+@mock.patch.dict(chunk_buffer._buffers, clear=True)
+@override_settings(TRANSCRIPTION_CHUNK_FLUSH_SIZE=10, TRANSCRIPTION_CHUNK_FLUSH_SECONDS=60)
+class ChunkWriteBufferTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def stream(self, recording_id, sequence_number):
+        return self.client.post('/api/transcription/stream/', json.dumps({
+            'audio': base64.b64encode(make_wav(1.0)).decode(),
+            'recording_id': recording_id,
+            'sequence_number': sequence_number,
+            'file_extension': '.wav',
+        }), content_type='application/json')
+
+    def test_session_writes_in_batches(self):
+        for sequence in range(1, 10):
+            self.stream('buffer-test', sequence)
+        recording = AudioRecording.objects.get(user_identifier='buffer-test')
+        self.assertFalse(recording.chunks.exists())
+        buffer = get_write_buffer(recording)
+        self.assertEqual(buffer.pending, 9)
+
+        # The tenth changed row triggers one bulk write of all of them
+        self.stream('buffer-test', 10)
+        self.assertEqual(buffer.flushes, 1)
+        self.assertEqual(recording.chunks.count(), 10)
+        self.assertEqual(buffer.pending, 0)
+
+        data = self.client.post('/api/transcription/finalize/buffer-test/').json()
+        self.assertEqual(data['transcript'], ' '.join(f'w{i}' for i in range(20)))
+        self.assertTrue(all(len(chunk.content_hash) == 64 for chunk in recording.chunks.all()))
+
+    def test_status_read_and_shutdown_flush(self):
+        for sequence in range(1, 4):
+            self.stream('buffer-read', sequence)
+        # A reader sees committed text that is still buffered, without writing it
+        recording = AudioRecording.objects.get(user_identifier='buffer-read')
+        buffer = get_write_buffer(recording)
+        data = self.client.get('/api/transcription/get-transcription/buffer-read/').json()
+        self.assertEqual(data['transcript'], 'w0 w1 w2 w3')
+        self.assertEqual(data['chunk_count'], 3)
+        self.assertEqual(buffer.pending, 3)
+        self.assertEqual(buffer.flushes, 0)
+        self.assertFalse(recording.chunks.exists())
+
+        self.stream('buffer-read', 4)
+        self.assertEqual(flush_all_write_buffers(), 4)
+        chunk = TranscriptionChunk.objects.get(recording__user_identifier='buffer-read', sequence_number=4)
+        self.assertEqual(chunk.text, 'w4 w5')
+        close_session('buffer-read')
+
+
+@mock.patch('transcription.streaming.transcribe', fake_transcribe)
+@mock.patch.dict(chunk_buffer._buffers, clear=True)
+class ChunkFlushTimingTests(TransactionTestCase):
+
+    @override_settings(TRANSCRIPTION_CHUNK_FLUSH_SECONDS=0.2)
+    def test_idle_recording_is_flushed(self):
+        for sequence in range(1, 3):
+            self.client.post('/api/transcription/stream/', json.dumps({
+                'audio': base64.b64encode(make_wav(1.0)).decode(),
+                'recording_id': 'buffer-idle',
+                'sequence_number': sequence,
+                'file_extension': '.wav',
+            }), content_type='application/json')
+        chunks = TranscriptionChunk.objects.filter(recording__user_identifier='buffer-idle')
+        self.assertFalse(chunks.exists())
+
+        # No more chunks arrive: the background thread writes them
+        buffer = chunk_buffer._buffers['buffer-idle']
+        chunk_buffer.start_background_flush()
+        deadline = time.monotonic() + 5
+        while buffer.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        chunk_buffer.stop_background_flush()
+        self.assertEqual(buffer.flushes, 1)
+        self.assertEqual(chunks.count(), 2)
+        close_session('buffer-idle')
+
+    def test_sigterm_does_not_take_buffer_locks(self):
+        handlers = {}
+        with mock.patch('signal.getsignal', return_value=signal.SIG_DFL), \
+                mock.patch('signal.signal', side_effect=lambda signum, handler: handlers.setdefault(signum, handler)), \
+                mock.patch('atexit.register') as register:
+            chunk_buffer.install_shutdown_flush()
+        register.assert_called_once_with(flush_all_write_buffers)
+
+        # Interrupting a thread that holds a buffer lock must not block
+        recording = AudioRecording.objects.create(user_identifier='buffer-signal')
+        buffer = get_write_buffer(recording)
+        with buffer._lock:
+            with self.assertRaises(SystemExit):
+                handlers[signal.SIGTERM](signal.SIGTERM, None)
+
+
+class SQLiteSettingsTests(TestCase):
+
+    def test_connections_use_wal_and_immediate_transactions(self):
+        import sqlite3
+        from django.db import connections, transaction
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'settings.sqlite3')
+        # The configured options on a file database (the test database is in memory)
+        connections['wal-test'] = wrapper = DatabaseWrapper(
+            {**connections['default'].settings_dict, 'NAME': path}, alias='wal-test'
+        )
+        self.addCleanup(connections.__delitem__, 'wal-test')
+        self.addCleanup(wrapper.close)
+
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE notes (text TEXT)')
+            pragmas = {}
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {pragma}')
+                pragmas[pragma] = cursor.fetchone()[0]
+        timeout = wrapper.settings_dict['OPTIONS']['timeout']
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': int(timeout * 1000)})
+
+        other = sqlite3.connect(path, timeout=0)
+        self.addCleanup(other.close)
+        with transaction.atomic(using='wal-test'):
+            # The write lock is taken when the transaction begins, before any write
+            with self.assertRaisesRegex(sqlite3.OperationalError, 'locked'):
+                other.execute('BEGIN IMMEDIATE')
+            # Readers are not blocked by the writer
+            self.assertEqual(other.execute('SELECT COUNT(*) FROM notes').fetchone(), (0,))
+            with wrapper.cursor() as cursor:
+                cursor.execute("INSERT INTO notes VALUES ('written')")
+        self.assertEqual(other.execute('SELECT text FROM notes').fetchall(), [('written',)])
+
+
+def candidate_item(index):
+    return {
+        'id': {'S': f'candidate-{index:06d}'},
+        'name': {'S': f'Candidate {index}'},
+        'email': {'S': f'c{index}@example.com'},
+        'education': {'S': 'BS Computer Science'},
+        'experience': {'N': str(index % 10)},
+        'timestamp': {'N': str(1700000000000 + index)},
+        'pythonScore': {'N': str(index % 100)},
+        'responses': {'M': {'interests': {'S': 'machine learning and distributed systems ' * 5}}},
+        'internalNotes': {'S': 'not needed by the dashboard ' * 10},
+    }
+
+
+class DynamoDBScanTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = FakeDynamoDBClient()
+        self.client.tables['Candidates'] = {
+            item['id']['S']: item for item in map(candidate_item, range(20000))
+        }
+
+    def test_parallel_scan_reads_every_page(self):
+        candidates = list(dynamodb_utils.iter_candidates(self.client, segments=4))
+        self.assertEqual(len(candidates), 20000)
+        self.assertEqual(len({candidate['id'] for candidate in candidates}), 20000)
+        # Several 1 MB pages per segment, all followed
+        self.assertGreater(self.client.calls['scan'], 4)
+        first = min(candidates, key=lambda candidate: candidate['id'])
+        self.assertEqual(first['pythonScore'], 0)
+        self.assertTrue(first['responses']['interests'].startswith('machine learning'))
+
+        items = list(dynamodb_utils.scan_items(self.client, 'Candidates', ['id', 'name'], segments=3, page_size=500))
+        self.assertEqual(len(items), 20000)
+        self.assertEqual(set(items[0]), {'id', 'name'})
+
+    def test_get_all_candidates(self):
+        with mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.client):
+            candidates = dynamodb_utils.get_all_candidates()
+        self.assertEqual(len(candidates), 20000)
+        self.assertNotIn('internalNotes', candidates[0])
+
+    def test_early_stop(self):
+        scan = dynamodb_utils.scan_items(self.client, 'Candidates', segments=4, page_size=100)
+        self.assertEqual(len([item for _, item in zip(range(250), scan)]), 250)
+        scan.close()
+        # The scanners stop instead of reading the rest of the table
+        self.assertLess(self.client.calls['scan'], 40)
+
+
+class DynamoDBBatchWriteTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.dynamodb = FakeDynamoDBClient(latency=0.002, unprocessed_rate=0.3)
+        for patcher in (mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.dynamodb),
+                        mock.patch.object(dynamodb_utils, 'BATCH_WRITE_BACKOFF', 0.001)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def post_json(self, url, data):
+        return self.client.post(url, json.dumps(data), content_type='application/json')
+
+    def test_batch_endpoints(self):
+        candidates = [
+            {'id': f'bulk-{i}', 'name': f'Candidate {i}', 'experience': i % 5, 'fluencyScore': 80}
+            for i in range(300)
+        ]
+        start = time.perf_counter()
+        response = self.post_json('/api/transcription/candidate/save-batch/', candidates)
+        batched = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['ids']), 300)
+        self.assertEqual(len(self.dynamodb.tables['Candidates']), 300)
+        # 12 batches of 25, plus retries of the throttled items
+        self.assertGreaterEqual(self.dynamodb.calls['batch_write_item'], 12)
+        self.assertEqual(self.dynamodb.calls['put_item'], 0)
+
+        self.dynamodb.unprocessed_rate = 0.0
+        start = time.perf_counter()
+        for candidate in candidates:
+            dynamodb_utils.save_candidate(candidate)
+        sequential = time.perf_counter() - start
+        batch_rate, sequential_rate = 300 / batched, 300 / sequential
+        self.assertGreater(batch_rate, 3 * sequential_rate,
+                           f"batched {batch_rate:.0f} items/s vs put_item {sequential_rate:.0f} items/s")
+
+        response = self.post_json('/api/transcription/candidate/delete-batch/',
+                                    {'ids': [f'bulk-{i}' for i in range(250)]})
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(len(self.dynamodb.tables['Candidates']), 50)
+
+        response = self.post_json('/api/transcription/referer/save-batch/',
+                                    [{'name': f'Referer {i}', 'requirement': 'Python'} for i in range(60)])
+        ids = response.json()['ids']
+        self.assertEqual(len(self.dynamodb.tables['Referers']), 60)
+        self.post_json('/api/transcription/referer/delete-batch/', {'ids': ids})
+        self.assertEqual(len(self.dynamodb.tables['Referers']), 0)
+
+    def test_failed_batch_is_reported_with_the_others(self):
+        write = self.dynamodb.batch_write_item
+
+        def batch_write_item(RequestItems):
+            if any(request['PutRequest']['Item']['id']['S'] == 'part-30' for request in RequestItems['Candidates']):
+                raise ClientError({'Error': {'Code': 'ValidationException', 'Message': 'Item too large'}},
+                                  'BatchWriteItem')
+            return write(RequestItems)
+
+        with mock.patch.object(self.dynamodb, 'batch_write_item', side_effect=batch_write_item):
+            response = self.post_json('/api/transcription/candidate/save-batch/',
+                                      [{'id': f'part-{i:02d}'} for i in range(60)])
+        self.assertEqual(response.status_code, 500)
+        data = response.json()
+        self.assertFalse(data['success'])
+        # The second batch of 25 failed; the first and third were written
+        failed = [f'part-{i:02d}' for i in range(25, 50)]
+        self.assertEqual(sorted(failure['id'] for failure in data['failed']), failed)
+        self.assertIn('Item too large', data['failed'][0]['error'])
+        self.assertEqual(data['ids'], [f'part-{i:02d}' for i in range(60) if f'part-{i:02d}' not in failed])
+        self.assertEqual(len(self.dynamodb.tables['Candidates']), 35)
+
+    def test_unprocessed_items_give_up(self):
+        self.dynamodb.unprocessed_rate = 1.0
+        saved, failures = dynamodb_utils.save_candidates_batch([{'id': f'stuck-{i}'} for i in range(30)])
+        self.assertEqual(saved, [])
+        self.assertEqual(sorted(failure['id'] for failure in failures), sorted(f'stuck-{i}' for i in range(30)))
+        self.assertEqual(self.dynamodb.calls['batch_write_item'], 2 * dynamodb_utils.BATCH_WRITE_MAX_ATTEMPTS)
+
+
+class DynamoDBCodecTests(TestCase):
+
+    def test_candidate_round_trip(self):
+        candidate = {
+            'id': 'c1', 'name': 'Ada', 'email': 'ada@example.com', 'education': 'BS',
+            'experience': 3, 'timestamp': 1700000000123, 'fluencyScore': 87.5,
+            'pythonScore': Decimal('92.25'), 'javaScore': 0.1, 'awsScore': 70,
+            'responses': {'interests': 'compilers', 'transcription': 'hello'},
+        }
+        item = CANDIDATE_CODEC.encode(candidate)
+        self.assertEqual(item['fluencyScore'], {'N': '87.5'})
+        self.assertEqual(item['javaScore'], {'N': '0.1'})
+        self.assertEqual(item['responses'], {'M': {'interests': {'S': 'compilers'}, 'transcription': {'S': 'hello'}}})
+        self.assertNotIn('cppScore', item)
+
+        decoded = CANDIDATE_CODEC.decode(item)
+        self.assertEqual(decoded, {**candidate, 'pythonScore': 92.25})
+        self.assertIsInstance(decoded['awsScore'], int)
+        self.assertEqual(CANDIDATE_CODEC.decode_many(CANDIDATE_CODEC.encode_many([candidate])), [decoded])
+
+    def test_defaults_and_invalid_numbers(self):
+        item = CANDIDATE_CODEC.encode({'id': 'c2', 'name': None, 'fluencyScore': None, 'responses': {}})
+        self.assertEqual(item, {
+            'id': {'S': 'c2'}, 'name': {'S': ''}, 'email': {'S': ''}, 'education': {'S': ''},
+            'experience': {'N': '0'}, 'timestamp': {'N': '0'},
+        })
+        self.assertEqual(REFERER_CODEC.decode({'id': {'S': 'r1'}, 'name': {'S': 'Grace'}}),
+                         {'id': 'r1', 'name': 'Grace', 'role': '', 'image': '', 'about': '', 'requirement': ''})
+        with self.assertRaises(ValueError):
+            CANDIDATE_CODEC.encode({'id': 'c3', 'fluencyScore': float('nan')})
+
+
+class CandidateSearchTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.dynamodb = FakeDynamoDBClient()
+        patcher = mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.dynamodb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(dynamodb_utils._verified_tables.clear)
+        dynamodb_utils._verified_tables.clear()
+        # 2026-10-01 00:00 UTC, one candidate per hour
+        start = 1790812800000
+        dynamodb_utils.save_candidates_batch([{
+            'id': f'search-{i}', 'name': f'Candidate {i}', 'email': f'Person{i}@Example.com',
+            'experience': i % 6, 'timestamp': start + i * 3600 * 1000,
+            'pythonScore': 50 + i % 50, 'javaScore': 60,
+        } for i in range(1000)])
+
+    def page_through(self, params):
+        items, cursor = [], None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get('/api/transcription/candidate/search/', query).json()
+            self.assertLessEqual(len(data['items']), int(params.get('limit', 20)))
+            items += data['items']
+            cursor = data['next_cursor']
+            if not cursor:
+                return items
+
+    def test_indexes_created(self):
+        self.assertEqual(set(self.dynamodb.indexes['Candidates']), set(dynamodb_utils.CANDIDATE_INDEXES))
+
+    def test_search_by_month_skill_and_email(self):
+        october = self.page_through({'month': '2026-10', 'limit': 50})
+        self.assertEqual(len(october), 31 * 24)
+        timestamps = [candidate['timestamp'] for candidate in october]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        first_page = self.client.get('/api/transcription/candidate/search/', {'month': '2026-10', 'limit': 10})
+        self.assertEqual(len(first_page.json()['items']), 10)
+        self.assertEqual(self.dynamodb.calls['scan'], 0)
+
+        strong = self.page_through({'skill': 'python', 'min_score': 90, 'min_experience': 3, 'limit': 7})
+        expected = {f'search-{i}' for i in range(1000) if 50 + i % 50 >= 90 and i % 6 >= 3}
+        self.assertEqual({candidate['id'] for candidate in strong}, expected)
+        scores = [candidate['pythonScore'] for candidate in strong]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        found = self.client.get('/api/transcription/candidate/search/', {'email': 'person7@example.com'}).json()
+        self.assertEqual([candidate['id'] for candidate in found['items']], ['search-7'])
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/transcription/candidate/search/', {'skill': 'cobol'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/transcription/candidate/search/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CandidateListTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.dynamodb = FakeDynamoDBClient()
+        self.dynamodb.tables['Candidates'] = {
+            item['id']['S']: item for item in map(candidate_item, range(500))
+        }
+        patcher = mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.dynamodb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(dynamodb_utils._verified_tables.clear)
+        dynamodb_utils._verified_tables.add('Candidates')
+
+    def page_through(self, params):
+        items, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            data = self.client.get('/api/transcription/candidate/all/', query).json()
+            items += data['items']
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                return items, pages
+
+    def test_pages_with_projection(self):
+        items, pages = self.page_through({'limit': 40, 'fields': 'name,pythonScore'})
+        self.assertEqual(pages, 13)
+        self.assertEqual(len({item['id'] for item in items}), 500)
+        self.assertEqual(set(items[0]), {'id', 'name', 'pythonScore'})
+        # Each page is one Scan call fetching only the requested attributes
+        self.assertEqual(self.dynamodb.calls['scan'], 13)
+
+        candidate = self.client.get('/api/transcription/candidate/candidate-000007/').json()
+        self.assertTrue(candidate['responses']['interests'].startswith('machine learning'))
+        response = self.client.get('/api/transcription/candidate/missing/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_streamed_gzip_list(self):
+        response = self.client.get('/api/transcription/candidate/all/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        body = zlib.decompress(b''.join(response.streaming_content), 16 + zlib.MAX_WBITS)
+        candidates = json.loads(body)
+        self.assertEqual(len(candidates), 500)
+        self.assertIn('responses', candidates[0])
+
+        response = self.client.get('/api/transcription/candidate/all/', {'fields': 'email'})
+        candidates = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(set(candidates[0]), {'id', 'email'})
+
+    def test_invalid_parameters(self):
+        response = self.client.get('/api/transcription/candidate/all/', {'fields': 'salary'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/transcription/candidate/all/', {'cursor': '%%%'})
+        self.assertEqual(response.status_code, 400)
+
+
+class DynamoDBCacheTests(TestCase):
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.dynamodb = FakeDynamoDBClient()
+        self.dynamodb.tables['Candidates'] = {
+            item['id']['S']: item for item in map(candidate_item, range(200))
+        }
+        self.dynamodb.tables['Referers'] = {
+            'r1': REFERER_CODEC.encode({'id': 'r1', 'name': 'Grace', 'requirement': 'Python'}),
+        }
+        patcher = mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.dynamodb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(dynamodb_utils._verified_tables.clear)
+        dynamodb_utils._verified_tables.update({'Candidates', 'Referers'})
+
+    def test_reads_are_cached_until_a_write(self):
+        before = cache_stats()
+        for _ in range(10):
+            self.assertEqual(len(dynamodb_utils.get_all_candidates()), 200)
+            self.assertEqual(dynamodb_utils.get_referer_by_id('r1')['name'], 'Grace')
+        self.assertIsNone(dynamodb_utils.get_referer_by_id('missing'))
+        self.assertIsNone(dynamodb_utils.get_referer_by_id('missing'))
+        self.assertEqual(self.dynamodb.calls['scan'], dynamodb_utils.SCAN_SEGMENTS)
+        self.assertEqual(self.dynamodb.calls['get_item'], 2)
+        stats = cache_stats()
+        self.assertEqual(stats['hits'] - before['hits'], 19)
+        self.assertEqual(stats['misses'] - before['misses'], 3)
+
+        # Callers get copies they may modify
+        referer = dynamodb_utils.get_referer_by_id('r1')
+        referer['name'] = 'Changed'
+        self.assertEqual(dynamodb_utils.get_referer_by_id('r1')['name'], 'Grace')
+
+        dynamodb_utils.save_referer({'id': 'r1', 'name': 'Grace Hopper'})
+        self.assertEqual(dynamodb_utils.get_referer_by_id('r1')['name'], 'Grace Hopper')
+        self.assertEqual(len(dynamodb_utils.get_all_referers()), 1)
+
+        dynamodb_utils.delete_candidates_batch(['candidate-000000', 'candidate-000001'])
+        self.assertEqual(len(dynamodb_utils.get_all_candidates()), 198)
+        # Candidates scanned twice, Referers once
+        self.assertEqual(self.dynamodb.calls['scan'], 3 * dynamodb_utils.SCAN_SEGMENTS)
+
+    def test_concurrent_misses_load_once(self):
+        self.dynamodb.latency = 0.05
+        barrier = threading.Barrier(8)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(len(dynamodb_utils.get_all_candidates()))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [200] * 8)
+        # One scan (one call per segment) for all eight readers
+        self.assertEqual(self.dynamodb.calls['scan'], dynamodb_utils.SCAN_SEGMENTS)
+
+    def test_streamed_list_is_not_cached_but_pages_are(self):
+        before = cache_stats()
+        for _ in range(2):
+            response = self.client.get('/api/transcription/candidate/all/')
+            self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 200)
+        # Streamed from the scan each time, without a cache entry for the table
+        self.assertEqual(self.dynamodb.calls['scan'], 2 * dynamodb_utils.SCAN_SEGMENTS)
+        self.assertEqual(cache_stats()['misses'], before['misses'])
+
+        first, cursor = dynamodb_utils.list_candidates(limit=10, fields=['id', 'name'])
+        again, _ = dynamodb_utils.list_candidates(limit=10, fields=['id', 'name'])
+        self.assertEqual(first, again)
+        self.assertEqual(self.dynamodb.calls['scan'], 2 * dynamodb_utils.SCAN_SEGMENTS + 1)
+        second, _ = dynamodb_utils.list_candidates(limit=10, cursor=cursor, fields=['id', 'name'])
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.dynamodb.calls['scan'], 2 * dynamodb_utils.SCAN_SEGMENTS + 2)
+
+    @override_settings(DYNAMODB_CACHE_TTL=0)
+    def test_disabled(self):
+        dynamodb_utils.get_referer_by_id('r1')
+        dynamodb_utils.get_referer_by_id('r1')
+        self.assertEqual(self.dynamodb.calls['get_item'], 2)
+
+
+class StorageBackendContract:
+    """
+    Behaviour shared by the DynamoDB path and the in-memory fallback.
+
+    Subclasses choose the backend in use_backend().
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        dynamodb_utils.MEMORY_CANDIDATES.clear()
+        dynamodb_utils.MEMORY_REFERERS.clear()
+        self.addCleanup(dynamodb_utils.MEMORY_CANDIDATES.clear)
+        self.addCleanup(dynamodb_utils.MEMORY_REFERERS.clear)
+        self.addCleanup(dynamodb_utils._verified_tables.clear)
+        dynamodb_utils._verified_tables.clear()
+        patcher = mock.patch.object(dynamodb_utils, 'get_dynamodb_client', return_value=self.use_backend())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page_through(self, read, **params):
+        items, cursor, pages = [], None, 0
+        while True:
+            page, cursor = read(cursor=cursor, **params)
+            items += page
+            pages += 1
+            if not cursor:
+                return items, pages
+
+    def test_put_replaces_and_get(self):
+        dynamodb_utils.save_candidate({'id': 'c1', 'name': 'Ada', 'pythonScore': 90.0, 'note': 'dropped'})
+        dynamodb_utils.save_candidate({'id': 'c1', 'name': 'Ada Lovelace', 'experience': 2})
+        candidate = dynamodb_utils.get_candidate_by_id('c1')
+        self.assertEqual(candidate['name'], 'Ada Lovelace')
+        self.assertEqual(candidate['experience'], 2)
+        self.assertNotIn('pythonScore', candidate)
+        self.assertNotIn('note', candidate)
+        self.assertEqual(candidate['email'], '')
+        self.assertEqual(len(dynamodb_utils.get_all_candidates()), 1)
+        self.assertIsNone(dynamodb_utils.get_candidate_by_id('missing'))
+
+        dynamodb_utils.save_referer({'id': 'r1', 'name': 'Grace'})
+        dynamodb_utils.save_referers_batch([{'id': 'r1', 'name': 'Grace Hopper'}, {'id': 'r2', 'name': 'Alan'}])
+        self.assertEqual(dynamodb_utils.get_referer_by_id('r1')['name'], 'Grace Hopper')
+        self.assertEqual(sorted(r['id'] for r in dynamodb_utils.get_all_referers()), ['r1', 'r2'])
+
+    def test_delete(self):
+        dynamodb_utils.save_candidates_batch([{'id': f'c{i}'} for i in range(5)])
+        self.assertTrue(dynamodb_utils.delete_candidate('c0'))
+        self.assertTrue(dynamodb_utils.delete_candidate('c0'))
+        self.assertEqual(dynamodb_utils.delete_candidates_batch(['c1', 'c2', 'missing']), [])
+        self.assertEqual(sorted(c['id'] for c in dynamodb_utils.get_all_candidates()), ['c3', 'c4'])
+
+        dynamodb_utils.save_referer({'id': 'r1'})
+        self.assertTrue(dynamodb_utils.delete_referer('r1'))
+        self.assertIsNone(dynamodb_utils.get_referer_by_id('r1'))
+
+    def test_list_pages_survive_writes(self):
+        dynamodb_utils.save_candidates_batch([{'id': f'c{i:02d}', 'name': f'{i}'} for i in range(45)])
+        items, pages = self.page_through(dynamodb_utils.list_candidates, limit=20, fields=['id', 'name'])
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(item['id'] for item in items), [f'c{i:02d}' for i in range(45)])
+        self.assertEqual(set(items[0]), {'id', 'name'})
+
+        # Cursors are positions, not offsets: writes before the cursor do
+        # not make the next page skip or repeat records
+        first, cursor = dynamodb_utils.list_candidates(limit=10)
+        dynamodb_utils.delete_candidate(first[0]['id'])
+        rest, _ = dynamodb_utils.list_candidates(limit=50, cursor=cursor)
+        self.assertEqual(len(first) + len(rest), 45)
+        self.assertFalse({c['id'] for c in first} & {c['id'] for c in rest})
+
+    def test_query_indexes(self):
+        start = 1790812800000
+        dynamodb_utils.save_candidates_batch([{
+            'id': f'q{i}', 'email': f'Person{i}@Example.com', 'experience': i % 4,
+            'timestamp': start + i * 3600 * 1000, 'pythonScore': 50 + i % 50, 'javaScore': 40,
+        } for i in range(120)])
+        october, _ = self.page_through(dynamodb_utils.query_candidates, index='by-created', key='2026-10', limit=25)
+        self.assertEqual([c['id'] for c in october], [f'q{i}' for i in reversed(range(120))])
+
+        strong, _ = self.page_through(dynamodb_utils.query_candidates, index='by-top-skill', key='python',
+                                      min_score=90, min_experience=2, limit=3, descending=False)
+        expected = [i for i in range(120) if 50 + i % 50 >= 90 and i % 4 >= 2]
+        self.assertEqual(sorted(c['id'] for c in strong), sorted(f'q{i}' for i in expected))
+        scores = [c['pythonScore'] for c in strong]
+        self.assertEqual(scores, sorted(scores))
+
+        found, _ = dynamodb_utils.query_candidates('by-email', 'person7@example.com')
+        self.assertEqual([c['id'] for c in found], ['q7'])
+        # Candidates without an index key are not in that index
+        dynamodb_utils.save_candidate({'id': 'no-scores', 'timestamp': start})
+        python, _ = self.page_through(dynamodb_utils.query_candidates, index='by-top-skill', key='python', limit=100)
+        self.assertEqual(len(python), 120)
+
+    def test_concurrent_writers(self):
+        def writer(prefix):
+            for i in range(50):
+                dynamodb_utils.save_candidate({'id': f'{prefix}-{i}', 'pythonScore': i})
+            dynamodb_utils.delete_candidates_batch([f'{prefix}-{i}' for i in range(0, 50, 2)])
+
+        threads = [threading.Thread(target=writer, args=(f't{n}',)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(dynamodb_utils.get_all_candidates()), 100)
+        python, _ = self.page_through(dynamodb_utils.query_candidates, index='by-top-skill', key='python', limit=100)
+        self.assertEqual(len(python), 100)
+
+
+class DynamoDBBackendTests(StorageBackendContract, TestCase):
+
+    def use_backend(self):
+        return FakeDynamoDBClient()
+
+
+class InMemoryBackendTests(StorageBackendContract, TestCase):
+
+    def use_backend(self):
+        return None
+
+    def test_snapshot_round_trip(self):
+        dynamodb_utils.save_candidates_batch([{'id': f'c{i}', 'pythonScore': 60 + i, 'timestamp': 1790812800000}
+                                              for i in range(10)])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'Candidates.json')
+            self.assertEqual(dynamodb_utils.MEMORY_CANDIDATES.save_snapshot(path), 10)
+            restored = InMemoryStore(CANDIDATE_CODEC, dynamodb_utils.CANDIDATE_INDEXES,
+                                     dynamodb_utils._index_values, snapshot_path=path)
+        self.assertEqual(restored.all(), dynamodb_utils.MEMORY_CANDIDATES.all())
+        best, _ = restored.query('by-top-skill', 'python', descending=True, limit=1)
+        self.assertEqual(best[0]['id'], 'c9')
@@ -14,12 +14,19 @@ urlpatterns = [
     path('get-transcription/<str:recording_id>/', views.GetTranscriptionView.as_view(), name='get-transcription'),
     path('transcription/<str:recording_id>/', views.GetTranscriptionView.as_view(), name='get-transcription-alt'),
     path('finalize/<str:recording_id>/', views.FinalizeTranscriptionView.as_view(), name='finalize-transcription'),
+    path('metrics/', views.InferenceMetricsView.as_view(), name='inference-metrics'),
     path('candidate/save/', views.save_candidate_view, name='save_candidate'),
+    path('candidate/save-batch/', views.save_candidates_batch_view, name='save_candidates_batch'),
+    path('candidate/delete-batch/', views.delete_candidates_batch_view, name='delete_candidates_batch'),
     path('candidate/all/', views.get_all_candidates_view, name='get_all_candidates'),
+    path('candidate/search/', views.search_candidates_view, name='search_candidates'),
+    path('candidate/<str:candidate_id>/', views.get_candidate_by_id_view, name='get_candidate_by_id'),
     path('candidate/delete/<str:candidate_id>/', views.delete_candidate_view, name='delete_candidate'),
     
     # Referer endpoints
     path('referer/save/', views.save_referer_view, name='save_referer'),
+    path('referer/save-batch/', views.save_referers_batch_view, name='save_referers_batch'),
+    path('referer/delete-batch/', views.delete_referers_batch_view, name='delete_referers_batch'),
     path('referer/all/', views.get_all_referers_view, name='get_all_referers'),
     path('referer/<str:referer_id>/', views.get_referer_by_id_view, name='get_referer_by_id'),
     path('referer/delete/<str:referer_id>/', views.delete_referer_view, name='delete_referer'),
@@ -0,0 +1,190 @@
+import copy
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .audio_decoding import SAMPLE_RATE
+
+# Frame parameters for energy-based detection (librosa defaults)
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+
+def frame_rms(samples: np.ndarray, frame_length: int = FRAME_LENGTH, hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """
+    RMS energy of centred frames, from a running sum of squares.
+
+    Equivalent to librosa.feature.rms(y=samples) but O(n) with no frame copies.
+    """
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32)
+    half = frame_length // 2
+    padded = np.pad(np.asarray(samples, dtype=np.float64), half)
+    energy = np.concatenate([[0.0], np.cumsum(padded * padded)])
+    starts = np.arange(0, len(samples) + 1, hop_length)
+    starts = starts[starts + frame_length <= len(padded)]
+    window_energy = np.maximum(energy[starts + frame_length] - energy[starts], 0.0)
+    return np.sqrt(window_energy / frame_length).astype(np.float32)
+
+
+def speech_intervals_from_rms(rms: np.ndarray, num_samples: int, sample_rate: int = SAMPLE_RATE,
+                              hop_length: int = HOP_LENGTH, top_db: float = 40.0,
+                              min_level_db: float = -60.0, min_silence: float = 0.3,
+                              min_speech: float = 0.1, pad: float = 0.15) -> np.ndarray:
+    """
+    Turn per-frame RMS energy into speech regions.
+
+    A frame is speech when it is within top_db of the loudest frame (as in
+    librosa.effects.split) and above min_level_db full scale, so a recording
+    that is silent throughout has no speech at all. Regions are padded,
+    joined across pauses shorter than min_silence and dropped when shorter
+    than min_speech.
+
+    Args:
+        rms: RMS energy per frame (centred frames, hop_length apart)
+        num_samples: Length of the signal the frames cover
+        sample_rate: Sample rate of that signal
+        hop_length: Samples between frames
+
+    Returns:
+        Integer array of shape (n, 2) with [start, end) sample offsets
+    """
+    if len(rms) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    level = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    active = level > max(level.max() - top_db, min_level_db)
+
+    edges = np.diff(np.concatenate([[0], active.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * hop_length - int(pad * sample_rate)
+    ends = np.flatnonzero(edges == -1) * hop_length + int(pad * sample_rate)
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    starts = np.clip(starts, 0, num_samples)
+    ends = np.clip(ends, 0, num_samples)
+
+    # Join regions separated by less than min_silence (or overlapping after padding)
+    joined = starts[1:] - ends[:-1] < int(min_silence * sample_rate)
+    starts = np.concatenate([starts[:1], starts[1:][~joined]])
+    ends = np.concatenate([ends[:-1][~joined], ends[-1:]])
+
+    long_enough = ends - starts >= int(min_speech * sample_rate)
+    return np.stack([starts[long_enough], ends[long_enough]], axis=1).astype(np.int64)
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int = SAMPLE_RATE, **options) -> np.ndarray:
+    """
+    Find the speech regions of a waveform.
+
+    Args:
+        samples: Mono waveform
+        sample_rate: Its sample rate
+        **options: Thresholds for speech_intervals_from_rms
+
+    Returns:
+        Integer array of shape (n, 2) with [start, end) sample offsets
+    """
+    return speech_intervals_from_rms(frame_rms(samples), len(samples), sample_rate, **options)
+
+
+def speech_ratio(intervals: np.ndarray, num_samples: int) -> float:
+    """Fraction of the signal inside speech regions."""
+    if num_samples <= 0:
+        return 0.0
+    return float((intervals[:, 1] - intervals[:, 0]).sum() / num_samples)
+
+
+def pause_stats(intervals: np.ndarray, num_samples: int, sample_rate: int = SAMPLE_RATE,
+                min_pause: float = 0.3) -> Dict[str, float]:
+    """
+    Summarise the pauses between speech regions.
+
+    Leading and trailing silence is not counted as a pause.
+
+    Returns:
+        Dictionary with pause_count, mean_pause_seconds, longest_pause_seconds
+        and total_pause_seconds
+    """
+    pauses = (intervals[1:, 0] - intervals[:-1, 1]) / sample_rate if len(intervals) > 1 else np.zeros(0)
+    pauses = pauses[pauses >= min_pause]
+    return {
+        "pause_count": int(len(pauses)),
+        "mean_pause_seconds": float(pauses.mean()) if len(pauses) else 0.0,
+        "longest_pause_seconds": float(pauses.max()) if len(pauses) else 0.0,
+        "total_pause_seconds": float(pauses.sum()),
+    }
+
+
+class SpeechTimeline:
+    """
+    Speech regions cut out of a recording and joined into one shorter clip.
+
+    Regions are separated by gap_seconds of silence so Whisper still hears a
+    boundary between them. Times in the joined clip map back to the original
+    recording with to_original(), and remap() applies that to a
+    transcription result's segments and words.
+    """
+
+    def __init__(self, intervals: np.ndarray, sample_rate: int = SAMPLE_RATE, gap_seconds: float = 0.1):
+        self.intervals = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+        self.sample_rate = sample_rate
+        self.gap = int(gap_seconds * sample_rate)
+        self.lengths = self.intervals[:, 1] - self.intervals[:, 0]
+        # Offset of each region in the joined clip
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths + self.gap)[:-1]]).astype(np.int64)
+
+    @property
+    def speech_samples(self) -> int:
+        return int(self.lengths.sum())
+
+    def extract(self, samples: np.ndarray) -> np.ndarray:
+        """Return the speech regions of `samples` joined with short gaps."""
+        total = int(self.lengths.sum() + self.gap * max(len(self.intervals) - 1, 0))
+        joined = np.zeros(total, dtype=np.float32)
+        for (start, end), offset in zip(self.intervals, self.offsets):
+            joined[offset:offset + end - start] = samples[start:end]
+        return joined
+
+    def to_original(self, seconds) -> np.ndarray:
+        """Map times (seconds) in the joined clip to times in the recording."""
+        position = np.asarray(seconds, dtype=np.float64) * self.sample_rate
+        index = np.clip(np.searchsorted(self.offsets, position, side="right") - 1, 0, len(self.offsets) - 1)
+        within = np.clip(position - self.offsets[index], 0, self.lengths[index])
+        return (self.intervals[index, 0] + within) / self.sample_rate
+
+    def remap(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of a transcription result with times in the recording."""
+        result = copy.deepcopy(result)
+        for segment in result.get("segments", []):
+            segment["start"], segment["end"] = (float(t) for t in self.to_original([segment["start"], segment["end"]]))
+            words = segment.get("words")
+            if words:
+                times = self.to_original([t for word in words for t in (word["start"], word["end"])])
+                for i, word in enumerate(words):
+                    word["start"], word["end"] = float(times[2 * i]), float(times[2 * i + 1])
+        return result
+
+
+def speech_only(samples: np.ndarray, intervals: Optional[np.ndarray] = None,
+                min_saving: float = 0.05) -> Tuple[Optional[np.ndarray], Optional[SpeechTimeline]]:
+    """
+    Prepare a waveform for Whisper by cutting out its silence.
+
+    Args:
+        samples: 16 kHz mono waveform
+        intervals: Precomputed speech regions (detected when omitted)
+        min_saving: Keep the original audio when cutting would remove less
+            than this fraction of it
+
+    Returns:
+        (audio to transcribe, timeline to remap its result) where the
+        timeline is None if the audio was left as is, or (None, None) when
+        there is no speech at all
+    """
+    if intervals is None:
+        intervals = detect_speech(samples)
+    if len(intervals) == 0:
+        return None, None
+    timeline = SpeechTimeline(intervals)
+    if timeline.speech_samples > (1.0 - min_saving) * len(samples):
+        return samples, None
+    return timeline.extract(samples), timeline
@@ -1,11 +1,13 @@
 from django.shortcuts import render
 import os
 import base64
+import hashlib
 import json
 import tempfile
 import numpy as np
 import librosa
 from django.conf import settings
+from django.core.exceptions import RequestAborted
 from django.http import StreamingHttpResponse, JsonResponse, HttpResponse
 from rest_framework import status, viewsets
 from rest_framework.views import APIView
@@ -17,8 +19,17 @@ from .serializers import (
     FluencyScoreSerializer, AudioUploadSerializer,
     TranscriptionChunkSerializer
 )
-from .fluency_analyzer import analyze_audio, analyze_audio_chunk, get_model, FluencyAnalyzer
+from .fluency_analyzer import analyze_audio, analyze_audio_chunk, analyze_audio_stream, FluencyAnalyzer
 from .utils import transcribe_audio, analyze_fluency
+from .inference import QueueFullError, get_executor, transcribe
+from .model_registry import get_registry
+from .result_cache import get_result_cache
+from .audio_decoding import AudioDecodeError, decode_audio
+from .audio_buffer import AudioBuffer
+from .chunk_buffer import buffered_rows
+from .streaming import claim_chunk, close_session, get_session, persist_committed, release_chunk
+from .speech_metrics import compute_speech_metrics, words_from_segments
+from .status_cache import get_cached_status, invalidate_status, set_cached_status, wait_for_change
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.core.files.storage import default_storage
@@ -28,12 +39,29 @@ import subprocess
 import whisper
 import random
 from .dynamodb_utils import save_candidate, get_all_candidates, delete_candidate, save_referer, get_all_referers, get_referer_by_id, delete_referer
+from .dynamodb_utils import save_candidates_batch, delete_candidates_batch, save_referers_batch, delete_referers_batch
+from .dynamodb_utils import SKILL_FIELDS, query_candidates
+from .dynamodb_cache import cache_stats as dynamodb_cache_stats
+from .dynamodb_utils import get_candidate_by_id, list_candidates, parse_candidate_fields, stream_candidates
+from django.core.serializers.json import DjangoJSONEncoder
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.gzip import gzip_page
+from django.utils.http import parse_etags
 import uuid
+from datetime import datetime, timezone
 
 # Initialize logger for this module
 logger = logging.getLogger(__name__)
 
+def busy_response(error):
+    """Build the 503 returned when the inference queue is full."""
+    response = Response(
+        {'error': 'Transcription service is busy, please retry', 'retry_after': error.retry_after},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    response['Retry-After'] = str(error.retry_after)
+    return response
+
 class AudioRecordingViewSet(viewsets.ModelViewSet):
     queryset = AudioRecording.objects.all()
     serializer_class = AudioRecordingSerializer
@@ -59,17 +87,6 @@ class AudioRecordingViewSet(viewsets.ModelViewSet):
         try:
             # Decode base64 audio
             audio_data = base64.b64decode(base64_audio)
-            
-            # Create temp directory if it doesn't exist
-            os.makedirs(settings.TEMP_DIR, exist_ok=True)
-            
-            # Create unique filenames for audio files
-            audio_filename = f"{recording_id}_{sequence_number}{file_extension}"
-            audio_filepath = os.path.join(settings.TEMP_DIR, audio_filename)
-            
-            # Write audio data to file
-            with open(audio_filepath, 'wb') as f:
-                f.write(audio_data)
                 
             # For testing, use mock transcription
             if settings.USE_MOCK_TRANSCRIPTION:
@@ -88,68 +105,60 @@ class AudioRecordingViewSet(viewsets.ModelViewSet):
                     }
                 })
             
-            # Actual audio processing for WAV files is simpler
+            # Resolve the recording first, so inference is never spent on a
+            # chunk that could not be stored
+            recording, _ = AudioRecording.objects.get_or_create(
+                user_identifier=recording_id,
+                defaults={'user': request.user}
+            )
+            
+            # A retry of a chunk that was already transcribed gets the stored
+            # result without another decode or inference run
+            content_hash = hashlib.sha256(audio_data).hexdigest()
+            chunk = TranscriptionChunk.objects.filter(
+                recording=recording, sequence_number=sequence_number, content_hash=content_hash
+            ).first()
+            if chunk is not None:
+                return Response({
+                    "recording_id": recording_id,
+                    "sequence_number": sequence_number,
+                    "transcription": {**TranscriptionChunkSerializer(chunk).data, "is_partial": True}
+                })
+            
             try:
-                # Direct load for WAV files is more reliable
-                if content_type.startswith('audio/wav'):
-                    audio_array, sample_rate = librosa.load(audio_filepath, sr=16000)
-                else:
-                    # For other formats, try direct conversion with librosa first
-                    try:
-                        audio_array, sample_rate = librosa.load(audio_filepath, sr=16000)
-                    except Exception as e:
-                        logger.error(f"Librosa load failed: {str(e)}")
-                        
-                        # Fall back to FFMPEG conversion if librosa fails
-                        wav_filepath = os.path.join(settings.TEMP_DIR, f"{recording_id}_{sequence_number}_converted.wav")
-                        try:
-                            ffmpeg_cmd = [
-                                'ffmpeg', '-i', audio_filepath, 
-                                '-c:a', 'pcm_s16le',  # Linear PCM format
-                                '-ar', '16000',       # 16kHz sample rate for Whisper
-                                '-ac', '1',           # Mono audio
-                                '-y',                 # Overwrite output file
-                                wav_filepath
-                            ]
-                            subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-                            audio_array, sample_rate = librosa.load(wav_filepath, sr=16000)
-                            os.remove(wav_filepath)  # Clean up temporary file
-                        except subprocess.CalledProcessError as e:
-                            logger.error(f"FFMPEG conversion failed: {e}")
-                            # Try one more approach - pydub
-                            try:
-                                from pydub import AudioSegment
-                                audio = AudioSegment.from_file(audio_filepath)
-                                audio = audio.set_frame_rate(16000).set_channels(1)
-                                audio.export(wav_filepath, format="wav")
-                                audio_array, sample_rate = librosa.load(wav_filepath, sr=16000)
-                                os.remove(wav_filepath)
-                            except Exception as e:
-                                logger.error(f"All audio conversion methods failed: {str(e)}")
-                                raise
-                
-                # Load the Whisper model once
-                model = whisper.load_model("tiny", download_root=settings.MODEL_DIR)
+                # Decode straight from memory to a 16 kHz waveform
+                audio_array = decode_audio(audio_data)
                 
-                # Transcribe the audio
-                result = model.transcribe(audio_array, language="en", fp16=False)
+                # Transcribe the audio on the inference workers
+                result = transcribe(audio_array, model_name="tiny", batch=True, language="en", fp16=False)
                 transcription_text = result["text"].strip()
+                # Timed from the start of this chunk; finalize lines the chunks up
+                words = [
+                    [round(start, 3), round(end, 3), text]
+                    for start, end, text in words_from_segments(result.get("segments", []))
+                ]
                 
-                # Save the transcription in the database
-                transcription = Transcription.objects.create(
-                    recording_id=recording_id,
+                # Save the transcription as this sequence number's chunk
+                chunk, _ = TranscriptionChunk.objects.update_or_create(
+                    recording=recording,
                     sequence_number=sequence_number,
-                    text=transcription_text,
-                    is_partial=True
+                    defaults={'text': transcription_text, 'words': words, 'content_hash': content_hash}
                 )
+                invalidate_status(recording_id)
                 
                 # Return the transcription
                 return Response({
                     "recording_id": recording_id,
                     "sequence_number": sequence_number,
-                    "transcription": TranscriptionSerializer(transcription).data
+                    "transcription": {
+                        **TranscriptionChunkSerializer(chunk).data,
+                        "is_partial": True
+                    }
                 })
                 
+            except QueueFullError as e:
+                logger.warning("Inference queue full, rejecting chunk")
+                return busy_response(e)
             except Exception as e:
                 logger.error(f"Audio processing error: {str(e)}")
                 return Response(
@@ -163,13 +172,6 @@ class AudioRecordingViewSet(viewsets.ModelViewSet):
                 {"error": f"Recording process failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        finally:
-            # Clean up the audio file
-            if 'audio_filepath' in locals() and os.path.exists(audio_filepath):
-                try:
-                    os.remove(audio_filepath)
-                except Exception as e:
-                    logger.error(f"Failed to remove temp file {audio_filepath}: {str(e)}")
 
     @action(detail=False, methods=['post'])
     def finalize(self, request):
@@ -182,71 +184,23 @@ class AudioRecordingViewSet(viewsets.ModelViewSet):
             )
             
         try:
-            # Get all transcription segments for this recording
-            transcriptions = Transcription.objects.filter(recording_id=recording_id).order_by('sequence_number')
-            
-            if not transcriptions.exists():
+            recording = AudioRecording.objects.filter(user_identifier=recording_id).first()
+            response_data = finalize_recording(recording) if recording else None
+            if response_data is None:
                 return Response(
                     {"error": "No transcriptions found for this recording"},
                     status=status.HTTP_404_NOT_FOUND
                 )
-                
-            # Combine all transcription segments
-            full_text = " ".join([t.text for t in transcriptions])
-            
-            # Create a final transcription entry
-            final_transcription = Transcription.objects.create(
-                recording_id=recording_id,
-                sequence_number=0,  # 0 indicates the final combined transcription
-                text=full_text,
-                is_partial=False
-            )
-            
-            # Generate mock fluency score if needed
-            if settings.USE_MOCK_TRANSCRIPTION:
-                fluency_score = FluencyScore.objects.create(
-                    recording_id=recording_id,
-                    overall_score=random.uniform(70, 95),
-                    speech_rate=random.uniform(120, 180),
-                    rhythm_score=random.uniform(65, 90),
-                    accuracy_score=random.uniform(70, 95)
-                )
-            else:
-                # Analyze fluency based on final transcription
-                try:
-                    # Create a temporary audio file concatenating all chunks if needed
-                    # This is a simplified approach - ideally we'd use the full audio
-                    # If we don't have all audio chunks, we can still score based on text
-                    analyzer = FluencyAnalyzer()
-                    fluency_metrics = analyzer.analyze_text(full_text)
-                    
-                    fluency_score = FluencyScore.objects.create(
-                        recording_id=recording_id,
-                        overall_score=fluency_metrics["overall_score"],
-                        speech_rate=fluency_metrics["speech_rate"],
-                        rhythm_score=fluency_metrics["rhythm_score"],
-                        accuracy_score=fluency_metrics["accuracy_score"]
-                    )
-                except Exception as e:
-                    logger.error(f"Fluency analysis failed: {str(e)}")
-                    # Create a fallback fluency score if analysis fails
-                    fluency_score = FluencyScore.objects.create(
-                        recording_id=recording_id,
-                        overall_score=75,  # Default values
-                        speech_rate=150,
-                        rhythm_score=75,
-                        accuracy_score=75
-                    )
-            
-            # Update all partial transcriptions to indicate they're part of a finalized recording
-            transcriptions.update(is_final=True)
             
             return Response({
                 "recording_id": recording_id,
-                "transcription": TranscriptionSerializer(final_transcription).data,
-                "fluency_score": FluencyScoreSerializer(fluency_score).data
+                "transcription": TranscriptionSerializer(recording.transcription).data,
+                "fluency_score": FluencyScoreSerializer(recording.fluency_score).data
+                if hasattr(recording, 'fluency_score') else None
             })
             
+        except QueueFullError as e:
+            return busy_response(e)
         except Exception as e:
             logger.error(f"Finalization error: {str(e)}")
             return Response(
@@ -272,50 +226,34 @@ class AudioUploadView(APIView):
         
         if serializer.is_valid():
             audio_file = serializer.validated_data['audio_file']
-            user_identifier = serializer.validated_data.get('user_identifier', '')
+            user_identifier = serializer.validated_data.get('user_identifier') or None
             
-            # Save the audio file to temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                for chunk in audio_file.chunks():
-                    temp_file.write(chunk)
-                temp_file_path = temp_file.name
+            # Resolve the recording first, so inference is never spent on a
+            # result that could not be stored
+            if user_identifier:
+                recording, _ = AudioRecording.objects.get_or_create(user_identifier=user_identifier)
+            else:
+                recording = AudioRecording.objects.create()
             
-            # Analyze the audio file
-            result = analyze_audio(temp_file_path)
+            # Analyze the uploaded file straight from memory
+            try:
+                result = analyze_audio(audio_file)
+            except QueueFullError as e:
+                return busy_response(e)
             
             if result and not result.get('error'):
-                # Create audio recording
-                recording = AudioRecording.objects.create(
-                    file_path=temp_file_path,
-                    user_identifier=user_identifier,
-                    duration_seconds=result['duration_seconds']
-                )
-                
-                # Create transcription
-                transcription = Transcription.objects.create(
-                    recording=recording,
-                    text=result['transcript']
-                )
+                recording.duration = result['duration_seconds']
+                recording.is_processed = True
+                recording.save(update_fields=['duration', 'is_processed'])
                 
-                # Create fluency score
-                metrics = result['metrics']
-                FluencyScore.objects.create(
-                    transcription=transcription,
-                    overall_score=result['fluency_score'],
-                    wpm=metrics['wpm'],
-                    wpm_score=metrics['wpm_score'],
-                    filler_count=metrics['filler_count'],
-                    filler_score=metrics['filler_score'],
-                    speech_ratio=metrics['speech_ratio'],
-                    ratio_score=metrics['ratio_score'],
-                    word_count=metrics['word_count']
-                )
+                # Store the transcription and fluency score
+                save_complete_analysis(recording, user_identifier, result)
                 
                 return Response({
                     'id': recording.id,
                     'transcript': result['transcript'],
                     'fluency_score': result['fluency_score'],
-                    'metrics': metrics
+                    'metrics': result['metrics']
                 }, status=status.HTTP_201_CREATED)
             else:
                 error_message = result.get('error', 'Unknown error during analysis')
@@ -354,48 +292,21 @@ class StreamingTranscriptionView(APIView):
                 logger.error(f"Base64 decode error: {str(e)}")
                 return Response({'error': f'Invalid audio data: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Get or create recording
+            # Get or create recording; atomic on the unique user_identifier, so
+            # concurrent chunks of a new recording all land on one row
             try:
-                if recording_id:
-                    # Look up by user_identifier
-                    recordings = AudioRecording.objects.filter(user_identifier=recording_id)
-                    if recordings.exists():
-                        recording = recordings.first() 
-                    else:
-                        # Create new recording with client ID as user_identifier
-                        recording = AudioRecording.objects.create(
-                            user=request.user if request.user.is_authenticated else None,
-                            user_identifier=recording_id
-                        )
-                        logger.info(f"Created new recording for user_id: {recording_id}")
-                else:
-                    # Create new recording
-                    recording = AudioRecording.objects.create(
-                        user=request.user if request.user.is_authenticated else None,
-                        user_identifier=user_identifier or f"temp_{np.random.randint(10000, 99999)}"
-                    )
+                recording, created = AudioRecording.objects.get_or_create(
+                    user_identifier=recording_id or user_identifier or f"temp_{uuid.uuid4().hex[:12]}",
+                    defaults={'user': request.user if request.user.is_authenticated else None}
+                )
+                if created:
+                    logger.info(f"Created new recording for user_id: {recording.user_identifier}")
                 
                 logger.info(f"Using recording DB ID: {recording.id}, user_identifier: {recording.user_identifier}")
             except Exception as e:
                 logger.error(f"Recording error: {str(e)}")
                 return Response({'error': f'Recording error: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            # Skip audio processing for very small chunks or initial chunks
-            # Just create an empty chunk to maintain sequence
-            if len(audio_bytes) < 1000 or sequence_number < 2:
-                logger.info(f"Skipping processing for small/initial chunk: {len(audio_bytes)} bytes, seq: {sequence_number}")
-                chunk = TranscriptionChunk.objects.create(
-                    recording=recording,
-                    text="",
-                    sequence_number=sequence_number
-                )
-                return Response({
-                    'recording_id': recording_id or recording.user_identifier,
-                    'chunk_id': str(chunk.id),
-                    'transcript': "",
-                    'is_final': True
-                })
-            
             # Mock transcription for testing without Whisper
             USE_MOCK_TRANSCRIPTION = False
             
@@ -417,70 +328,70 @@ class StreamingTranscriptionView(APIView):
                     'is_final': True
                 })
             
-            # Real transcription process
+            # Feed the chunk into the recording's streaming session. MediaRecorder
+            # WebM/Ogg chunks continue one stream, so they are decoded in order by a
+            # long-lived decoder; WAV chunks are complete files on their own.
+            # A retried chunk (same sequence number and audio) was already
+            # fed in: answer with the current state and skip inference
+            content_hash = claim_chunk(recording, sequence_number, audio_bytes)
+            if content_hash is None:
+                logger.info(f"Chunk {sequence_number} for {recording.user_identifier} already received")
+                session = get_session(recording.user_identifier, create=False)
+                text = session.snapshot()['text'] if session else transcription_status(recording.user_identifier)['transcript']
+                return Response({
+                    'recording_id': recording_id or recording.user_identifier,
+                    'chunk_id': None,
+                    'transcript': text,
+                    'committed': session.committed_text if session else text,
+                    'tentative': '',
+                    'is_final': False,
+                    'duplicate': True
+                })
+            
+            session = get_session(recording.user_identifier)
+            standalone = audio_bytes[:4] == b'RIFF' or file_extension.lower() == '.wav'
             try:
-                # Save the audio using the correct file extension
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension)
-                temp_file.write(audio_bytes)
-                temp_file.close()
-                temp_file_path = temp_file.name
-                
-                logger.info(f"Saved audio to temp file: {temp_file_path}, size: {len(audio_bytes)} bytes, ext: {file_extension}")
-                
-                # Skip transcription attempts for WebM files (known to be problematic)
-                if file_extension == '.webm':
-                    logger.info("WebM files are problematic with Whisper, skipping transcription")
-                    transcript = ""
-                else:
-                    # Load Whisper model and transcribe
-                    model = get_model("tiny")
-                    if not model:
-                        logger.error("Failed to load Whisper model")
-                        raise Exception("Failed to load Whisper model")
-                    
-                    # Verify file exists
-                    if not os.path.exists(temp_file_path) or os.path.getsize(temp_file_path) == 0:
-                        logger.error(f"File missing or empty: {temp_file_path}")
-                        raise Exception("Audio file is empty or missing")
-                    
-                    # Transcribe directly without any conversion attempts
-                    logger.info(f"Starting transcription of {temp_file_path}")
-                    try:
-                        result = model.transcribe(temp_file_path, fp16=False)
-                        transcript = result.get("text", "").strip()
-                        logger.info(f"Transcription result: '{transcript}'")
-                    except Exception as e:
-                        logger.error(f"Whisper transcription failed: {str(e)}")
-                        transcript = ""
+                session.add_chunk(audio_bytes, sequence_number, standalone=standalone)
             except Exception as e:
-                logger.error(f"Transcription process error: {str(e)}")
-                transcript = ""
-            finally:
-                # Always clean up the temporary file
-                try:
-                    if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-                        logger.info(f"Cleaned up temp file: {temp_file_path}")
-                except Exception as e:
-                    logger.error(f"Cleanup error: {str(e)}")
+                # Unclaim the chunk so a corrected retry is processed
+                release_chunk(recording, sequence_number, content_hash)
+                logger.error(f"Could not decode chunk {sequence_number}: {str(e)}")
+                bad_audio = isinstance(e, AudioDecodeError)
+                return Response({
+                    'error': f'Could not decode audio: {str(e)}',
+                    'recording_id': recording_id or recording.user_identifier,
+                    'sequence_number': sequence_number,
+                    'accepted': False
+                }, status=status.HTTP_400_BAD_REQUEST if bad_audio else status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            # Save the transcription chunk
             try:
-                chunk = TranscriptionChunk.objects.create(
-                    recording=recording,
-                    text=transcript,
-                    sequence_number=sequence_number
-                )
-                logger.info(f"Saved chunk {chunk.id}")
+                update = session.process()
+            except QueueFullError as e:
+                # The audio is buffered; the next pass transcribes it
+                logger.warning(f"Inference queue full, deferring chunk {sequence_number}")
+                return busy_response(e)
             except Exception as e:
-                logger.error(f"Chunk save error: {str(e)}")
-                return Response({'error': f'Failed to save chunk: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                logger.error(f"Transcription process error: {str(e)}")
+                update = session.snapshot()
+            
+            # Persist only text that consecutive passes agreed on
+            if update['newly_committed']:
+                try:
+                    persist_committed(recording, update['sequence_number'], update['newly_committed'],
+                                      words=update['newly_committed_words'])
+                    logger.info(f"Committed chunk {update['sequence_number']}: '{update['newly_committed']}'")
+                except Exception as e:
+                    logger.error(f"Chunk save error: {str(e)}")
+                    return Response({'error': f'Failed to save chunk: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
             return Response({
                 'recording_id': recording_id or recording.user_identifier,
-                'chunk_id': str(chunk.id),
-                'transcript': transcript,
-                'is_final': True
+                # Chunks are written behind (see ChunkWriteBuffer), so there is no row id yet
+                'chunk_id': None,
+                'transcript': update['text'],
+                'committed': update['committed'],
+                'tentative': update['tentative'],
+                'is_final': not update['tentative']
             })
                 
         except json.JSONDecodeError as e:
@@ -493,86 +404,244 @@ class StreamingTranscriptionView(APIView):
 class GetTranscriptionView(APIView):
     """
     API view to get the complete transcription for a recording.
+    
+    Responses carry an ETag; a request whose If-None-Match matches gets 304
+    Not Modified. With ?wait=N as well, the request is held for up to N
+    seconds (at most TRANSCRIPTION_LONG_POLL_MAX) until the transcription
+    changes, so a polling client makes one request per change instead of
+    one per interval.
     """
     
     def get(self, request, recording_id, format=None):
         try:
             logger.info(f"Getting transcription for recording: {recording_id}")
             
-            # Find by user_identifier - simpler approach
-            recordings = AudioRecording.objects.filter(user_identifier=recording_id)
-            if not recordings.exists():
+            entry = load_transcription_status(recording_id)
+            if entry is None:
                 logger.info(f"No recording found with user_identifier: {recording_id}")
                 return Response({'error': 'Recording not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            recording = recordings.first()
-            logger.info(f"Found recording with DB ID: {recording.id}")
-            
-            # Get all chunks for this recording, ordered by sequence number
-            chunks = TranscriptionChunk.objects.filter(recording=recording).order_by('sequence_number')
-            
-            # Get or create a full transcription object
-            transcription = None
-            try:
-                # Look for a finalized transcription
-                transcription = Transcription.objects.get(recording=recording)
-                full_transcript = transcription.text
-                logger.info(f"Using finalized transcription: {transcription.id}")
-            except Transcription.DoesNotExist:
-                # If no finalized transcription exists, combine chunks
-                if chunks.exists():
-                    full_transcript = ' '.join(chunk.text for chunk in chunks if chunk.text)
-                    logger.info(f"Combined {chunks.count()} chunks into transcription")
-                else:
-                    # No chunks yet, return empty text
-                    logger.info("No transcription chunks found")
-                    return Response({'transcript': '', 'recording_id': recording_id})
-            
-            # Get fluency score if it exists
-            fluency_data = None
+            client_etags = parse_etags(request.headers.get('If-None-Match', ''))
             try:
-                fluency_score = FluencyScore.objects.get(recording=recording)
-                logger.info(f"Found fluency score: {fluency_score.id}")
-                
-                # Calculate some additional metrics to match what the frontend expects
-                words = full_transcript.split()
-                word_count = len(words)
-                filler_words = ["um", "uh", "hmm", "like", "you know", "so", "actually", "basically", "literally"]
-                filler_count = sum(1 for word in words if word.lower() in filler_words)
-                
-                fluency_data = {
-                    'overall_score': round(fluency_score.overall_score, 2),
-                    'speech_rate': round(fluency_score.speech_rate, 2),
-                    'rhythm_score': round(fluency_score.rhythm_score, 2),
-                    'accuracy_score': round(fluency_score.accuracy_score, 2),
-                    
-                    # Additional fields expected by frontend
-                    'wpm': word_count * 2,  # Assuming 30 second recording
-                    'filler_count': filler_count,
-                    'speech_ratio': 0.7,  # Mock value
-                    'word_count': word_count
-                }
-            except FluencyScore.DoesNotExist:
-                logger.info("No fluency score found")
-                pass
-            
-            # Build the response
-            response_data = {
-                'transcript': full_transcript,
-                'recording_id': recording_id,  # Return the original ID
-                'is_processed': recording.is_processed,
-                'chunk_count': chunks.count() if chunks.exists() else 0
-            }
-            
-            # Add fluency data if available
-            if fluency_data:
-                response_data['fluency_score'] = fluency_data
-            
-            return Response(response_data)
+                wait = min(float(request.query_params.get('wait', 0)), settings.TRANSCRIPTION_LONG_POLL_MAX)
+            except ValueError:
+                return Response({'error': 'wait must be a number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+            if wait > 0 and entry['etag'] in client_etags:
+                entry = wait_for_change(recording_id, entry['etag'], wait, load_transcription_status) or entry
+            
+            if entry['etag'] in client_etags or '*' in client_etags:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = Response(entry['data'])
+            response['ETag'] = entry['etag']
+            response['Cache-Control'] = 'no-cache'
+            return response
         except Exception as e:
             logger.error(f"Error getting transcription: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+def load_transcription_status(recording_id):
+    """
+    Return the {"etag", "data"} status entry for a recording.
+    
+    Served from the cache until the recording changes (see invalidate_status),
+    otherwise rebuilt from the database and cached.
+    
+    Returns:
+        The entry, or None if there is no such recording
+    """
+    entry = get_cached_status(recording_id)
+    if entry is None:
+        data = transcription_status(recording_id)
+        if data is None:
+            return None
+        entry = set_cached_status(recording_id, data)
+    return entry
+
+def transcription_status(recording_id):
+    """
+    Build the get-transcription response for a recording.
+    
+    A finalized recording is answered from its FluencyScore row alone (one
+    query): the score holds the transcript snapshot and all metrics. Until
+    then the chunks committed so far are joined, with the recording and its
+    transcription fetched in one query and the chunks in a second.
+    
+    Args:
+        recording_id: Client identifier of the recording
+        
+    Returns:
+        Response data, or None if there is no such recording
+    """
+    fluency_score = (
+        FluencyScore.objects.select_related('recording')
+        .filter(recording__user_identifier=recording_id)
+        .first()
+    )
+    if fluency_score is not None:
+        return {
+            'transcript': fluency_score.transcript,
+            'recording_id': recording_id,  # Return the original ID
+            'is_processed': fluency_score.recording.is_processed,
+            'chunk_count': fluency_score.chunk_count,
+            'fluency_score': fluency_score_data(fluency_score),
+        }
+    
+    recording = (
+        AudioRecording.objects.filter(user_identifier=recording_id)
+        .select_related('transcription')
+        .prefetch_related('chunks')
+        .first()
+    )
+    if recording is None:
+        return None
+    
+    # Overlay text committed in this process but not yet written, without
+    # flushing the write buffer
+    chunks = {chunk.sequence_number: chunk.text for chunk in recording.chunks.all()}
+    chunks.update((sequence_number, row['text']) for sequence_number, row in buffered_rows(recording_id).items())
+    if hasattr(recording, 'transcription'):
+        full_transcript = recording.transcription.text
+    elif chunks:
+        full_transcript = ' '.join(chunks[sequence_number] for sequence_number in sorted(chunks) if chunks[sequence_number])
+    else:
+        return {'transcript': '', 'recording_id': recording_id}
+    
+    return {
+        'transcript': full_transcript,
+        'recording_id': recording_id,
+        'is_processed': recording.is_processed,
+        'chunk_count': len(chunks)
+    }
+
+def fluency_score_data(fluency_score):
+    """Response data for a stored FluencyScore, in the shape the frontend expects."""
+    return {
+        'overall_score': round(fluency_score.overall_score, 2),
+        'speech_rate': round(fluency_score.speech_rate, 2),
+        'rhythm_score': round(fluency_score.rhythm_score, 2),
+        'accuracy_score': round(fluency_score.accuracy_score, 2),
+        'wpm': round(fluency_score.wpm, 1),
+        'articulation_rate': round(fluency_score.articulation_rate, 1),
+        'filler_count': fluency_score.filler_count,
+        'filler_positions': fluency_score.filler_positions,
+        'speech_ratio': round(fluency_score.speech_ratio, 2),
+        'word_count': fluency_score.word_count,
+        'pause_count': fluency_score.pause_count,
+        'mean_pause_seconds': round(fluency_score.mean_pause_seconds, 2),
+        'longest_pause_seconds': round(fluency_score.longest_pause_seconds, 2),
+        'pause_distribution': fluency_score.pause_distribution,
+    }
+
+def recording_words(chunks):
+    """
+    Timed words of a recording's chunks, in sequence order.
+    
+    Streaming chunks hold times from the start of the recording, while
+    chunks posted to process are transcribed on their own and hold times
+    from the start of the chunk. Words that would start before the previous
+    chunk's last word are moved after it, so the timeline never runs back.
+    """
+    words = []
+    for chunk in chunks:
+        chunk_words = chunk.words or []
+        if not chunk_words:
+            continue
+        offset = 0.0
+        if words and chunk_words[0][0] < words[-1][1]:
+            offset = words[-1][1] - chunk_words[0][0]
+        words.extend([start + offset, end + offset, text] for start, end, text in chunk_words)
+    return words
+
+def finalize_recording(recording):
+    """
+    Flush a recording's streaming session, store the final transcription and
+    generate its fluency score.
+    
+    Args:
+        recording: The AudioRecording to finalize
+        
+    Returns:
+        Response data with transcript and fluency_score, or None if the
+        recording has no transcription chunks
+        
+    Raises:
+        QueueFullError: if flushing the session could not be queued
+    """
+    # Flush the streaming session: transcribe what is still buffered and
+    # commit the tentative tail, so the chunks hold the whole transcript
+    session = get_session(recording.user_identifier, create=False)
+    if session is not None:
+        update = session.finish()
+        if update['newly_committed']:
+            persist_committed(recording, update['sequence_number'], update['newly_committed'], is_final=True,
+                              words=update['newly_committed_words'])
+        recording.duration = session.duration
+    # Ends the session and writes the chunks still buffered for it
+    close_session(recording.user_identifier)
+    
+    # Mark chunks as final
+    chunk_rows = TranscriptionChunk.objects.filter(recording=recording).order_by('sequence_number')
+    chunks = list(chunk_rows)
+    if not chunks:
+        return None
+    
+    chunk_rows.update(is_final=True)
+    
+    # Combine all chunk texts and their timed words
+    full_transcript = ' '.join(chunk.text for chunk in chunks if chunk.text)
+    words = recording_words(chunks)
+    
+    # Create a final transcription
+    transcription, created = Transcription.objects.get_or_create(
+        recording=recording,
+        defaults={'text': full_transcript, 'words': words}
+    )
+    
+    if not created:
+        transcription.text = full_transcript
+        transcription.words = words
+        transcription.save()
+    
+    # Generate fluency scores from the word timestamps, once; GETs read them back
+    try:
+        metrics = compute_speech_metrics(words, recording.duration)
+        if not words:
+            # Chunks stored without timings: only the word count is known
+            metrics['word_count'] = len(full_transcript.split())
+        
+        defaults = {
+            field: metrics[field] for field in (
+                'overall_score', 'speech_rate', 'rhythm_score', 'accuracy_score',
+                'wpm', 'articulation_rate', 'speech_ratio', 'word_count', 'filler_count',
+                'pause_count', 'mean_pause_seconds', 'longest_pause_seconds',
+                'pause_distribution', 'filler_positions',
+            )
+        }
+        # Snapshot for get-transcription, which then reads this row only
+        defaults.update(transcript=full_transcript, chunk_count=len(chunks))
+        fluency_score, _ = FluencyScore.objects.update_or_create(recording=recording, defaults=defaults)
+        fluency_data = fluency_score_data(fluency_score)
+    except Exception as e:
+        logger.error(f"Error generating fluency score: {str(e)}")
+        fluency_data = None
+    
+    # Mark recording as processed
+    recording.is_processed = True
+    recording.save()
+    invalidate_status(recording.user_identifier)
+    
+    response_data = {
+        'recording_id': recording.user_identifier,  # Return the original ID
+        'transcript': transcription.text,
+        'is_processed': True
+    }
+    
+    if fluency_data:
+        response_data['fluency_score'] = fluency_data
+    
+    return response_data
+
 class FinalizeTranscriptionView(APIView):
     """
     API view to finalize a transcription and generate fluency scores.
@@ -582,103 +651,45 @@ class FinalizeTranscriptionView(APIView):
         try:
             logger.info(f"Finalizing transcription for recording: {recording_id}")
             
-            # Find by user_identifier - simpler approach
-            recordings = AudioRecording.objects.filter(user_identifier=recording_id)
-            if not recordings.exists():
+            # user_identifier is unique, so one lookup finds the recording
+            recording = AudioRecording.objects.filter(user_identifier=recording_id).first()
+            if recording is None:
                 logger.info(f"No recording found with user_identifier: {recording_id}")
                 return Response({'error': 'Recording not found'}, status=status.HTTP_404_NOT_FOUND)
             
-            recording = recordings.first()
             logger.info(f"Found recording with DB ID: {recording.id}")
             
-            # Mark chunks as final
-            chunks = TranscriptionChunk.objects.filter(recording=recording).order_by('sequence_number')
-            if not chunks.exists():
-                return Response({'error': 'No transcription chunks found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            chunks.update(is_final=True)
-            
-            # Combine all chunk texts
-            full_transcript = ' '.join(chunk.text for chunk in chunks if chunk.text)
-            
-            # Create a final transcription
-            transcription, created = Transcription.objects.get_or_create(
-                recording=recording,
-                defaults={'text': full_transcript}
-            )
-            
-            if not created:
-                transcription.text = full_transcript
-                transcription.save()
-            
-            # Calculate basic metrics for fluency score
-            words = full_transcript.split()
-            word_count = len(words)
-            
-            # Calculate filler words 
-            filler_words = ["um", "uh", "hmm", "like", "you know", "so", "actually", "basically", "literally"]
-            filler_count = sum(1 for word in words if word.lower() in filler_words)
-            
-            # Generate fluency scores with all required metrics
             try:
-                # Calculate speech rate (words per minute) - assuming average recording length of 30 seconds
-                wpm = word_count * 2  # Multiply by 2 to convert to per minute
-                
-                # Calculate metrics
-                speech_rate = min(1.0, wpm / 150.0)  # Normalize to 0-1 range (150 wpm is good)
-                rhythm_score = 0.8  # Mock value
-                accuracy_score = 0.9  # Mock value
-                
-                # Calculate overall score - weighted average
-                overall_score = (speech_rate + rhythm_score + accuracy_score) / 3
-                
-                # Create or update fluency score
-                fluency_score, _ = FluencyScore.objects.get_or_create(
-                    recording=recording,
-                    defaults={
-                        'overall_score': overall_score,
-                        'speech_rate': speech_rate,
-                        'rhythm_score': rhythm_score,
-                        'accuracy_score': accuracy_score
-                    }
-                )
-                
-                # The frontend expects these specific fields
-                fluency_data = {
-                    'overall_score': round(fluency_score.overall_score, 2),
-                    'speech_rate': round(fluency_score.speech_rate, 2),
-                    'rhythm_score': round(fluency_score.rhythm_score, 2),
-                    'accuracy_score': round(fluency_score.accuracy_score, 2),
-                    
-                    # Additional fields expected by frontend
-                    'wpm': wpm,
-                    'filler_count': filler_count,
-                    'speech_ratio': 0.7,  # Mock value
-                    'word_count': word_count
-                }
-            except Exception as e:
-                logger.error(f"Error generating fluency score: {str(e)}")
-                fluency_data = None
-            
-            # Mark recording as processed
-            recording.is_processed = True
-            recording.save()
-            
-            response_data = {
-                'recording_id': recording_id,  # Return the original ID
-                'transcript': transcription.text,
-                'is_processed': True
-            }
-            
-            if fluency_data:
-                response_data['fluency_score'] = fluency_data
+                response_data = finalize_recording(recording)
+            except QueueFullError as e:
+                return busy_response(e)
+            if response_data is None:
+                return Response({'error': 'No transcription chunks found'}, status=status.HTTP_404_NOT_FOUND)
             
+            response_data['recording_id'] = recording_id  # Return the original ID
             return Response(response_data)
             
         except Exception as e:
             logger.error(f"Error finalizing transcription: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class InferenceMetricsView(APIView):
+    """
+    API view exposing inference queue length and model registry statistics.
+    """
+    
+    def get(self, request, format=None):
+        executor = get_executor()
+        data = {'inference': executor.metrics()}
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            data['result_cache'] = result_cache.stats()
+        data['dynamodb_cache'] = dynamodb_cache_stats()
+        if executor.mode != 'process':
+            # In process mode the models live in the workers, not here
+            data['model_registry'] = get_registry().stats()
+        return Response(data)
+
 @csrf_exempt
 def save_candidate_view(request):
     """Save candidate data to DynamoDB"""
@@ -705,14 +716,145 @@ def save_candidate_view(request):
         'error': 'Only POST method is allowed'
     }, status=405)
 
+def json_array_stream(items, batch_size=200):
+    """
+    Serialize an iterable as a JSON array, a batch of items per chunk.
+    
+    The response body is written as items arrive instead of being built in
+    memory first.
+    """
+    yield '['
+    separator = ''
+    batch = []
+    try:
+        for item in items:
+            batch.append(json.dumps(item, cls=DjangoJSONEncoder))
+            if len(batch) >= batch_size:
+                yield separator + ','.join(batch)
+                separator = ','
+                batch = []
+    except Exception as e:
+        # Headers are already sent: the client sees a truncated body
+        logger.error(f"Streaming response failed: {str(e)}")
+        raise
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']'
+
+@gzip_page
 def get_all_candidates_view(request):
-    """Get all candidates from DynamoDB"""
+    """
+    Get all candidates from DynamoDB
+    
+    Without parameters the whole list is streamed as a JSON array. With
+    limit or cursor a single page is returned as {"items", "next_cursor"}.
+    
+    Query parameters:
+        fields: Comma-separated attributes to return (id is always
+            included), e.g. name,email,fluencyScore to leave out the
+            response texts; candidate/<id>/ returns a full candidate
+        limit: Page size (default 20, at most 100)
+        cursor: next_cursor from the previous page
+    """
     if request.method == 'GET':
         try:
-            # Get all candidates
-            candidates = get_all_candidates()
+            params = request.GET
+            fields = parse_candidate_fields(params.get('fields'))
+            if 'limit' in params or 'cursor' in params:
+                candidates, next_cursor = list_candidates(
+                    limit=int(params.get('limit') or 20), cursor=params.get('cursor'), fields=fields
+                )
+                return JsonResponse({
+                    'items': candidates,
+                    'next_cursor': next_cursor
+                })
             
-            return JsonResponse(candidates, safe=False)
+            # Get all candidates, writing them out as the table is scanned
+            return StreamingHttpResponse(
+                json_array_stream(stream_candidates(fields)),
+                content_type='application/json'
+            )
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only GET method is allowed'
+    }, status=405)
+
+def get_candidate_by_id_view(request, candidate_id):
+    """Get a candidate, including its response texts, from DynamoDB by ID"""
+    if request.method == 'GET':
+        try:
+            candidate = get_candidate_by_id(candidate_id)
+            
+            if candidate:
+                return JsonResponse(candidate)
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Candidate with ID {candidate_id} not found'
+                }, status=404)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only GET method is allowed'
+    }, status=405)
+
+def search_candidates_view(request):
+    """
+    Query one page of candidates from a secondary index.
+    
+    Query parameters (one of email, skill or month picks the index):
+        email: Candidates with this email
+        skill: Candidates whose best skill this is (python, java, aws, cpp),
+            best first, optionally with min_score
+        month: Candidates created in this month (YYYY-MM, default the
+            current month), newest first
+        min_experience: Only candidates with at least this many years
+        limit: Page size (default 20, at most 100)
+        cursor: next_cursor from the previous page
+    """
+    if request.method == 'GET':
+        try:
+            params = request.GET
+            min_score = float(params['min_score']) if params.get('min_score') else None
+            min_experience = float(params['min_experience']) if params.get('min_experience') else None
+            if params.get('email'):
+                index, key = 'by-email', params['email'].strip().lower()
+            elif params.get('skill'):
+                if params['skill'] not in SKILL_FIELDS:
+                    raise ValueError(f"skill must be one of {', '.join(SKILL_FIELDS)}")
+                index, key = 'by-top-skill', params['skill']
+            else:
+                index, key = 'by-created', params.get('month') or datetime.now(timezone.utc).strftime('%Y-%m')
+            
+            candidates, next_cursor = query_candidates(
+                index, key, min_score=min_score, min_experience=min_experience,
+                limit=int(params.get('limit', 20)), cursor=params.get('cursor')
+            )
+            return JsonResponse({
+                'items': candidates,
+                'next_cursor': next_cursor
+            })
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -756,14 +898,216 @@ def delete_candidate_view(request, candidate_id):
         'error': 'Only DELETE method is allowed'
     }, status=405)
 
+@csrf_exempt
+def save_candidates_batch_view(request):
+    """Save a JSON list of candidates to DynamoDB with batched writes"""
+    if request.method == 'POST':
+        try:
+            # Parse the JSON body
+            data = json.loads(request.body)
+            if not isinstance(data, list):
+                raise ValueError('Expected a JSON list of candidates')
+            
+            # Save the candidates in batches of 25
+            candidate_ids, failures = save_candidates_batch(data)
+            
+            # Batches that failed are reported item by item; the rest were saved
+            return JsonResponse({
+                'success': not failures,
+                'ids': candidate_ids,
+                'failed': failures
+            }, status=500 if failures else 200)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only POST method is allowed'
+    }, status=405)
+
+@csrf_exempt
+def delete_candidates_batch_view(request):
+    """Delete the candidates listed in {"ids": [...]} from DynamoDB"""
+    if request.method == 'POST':
+        try:
+            candidate_ids = json.loads(request.body).get('ids', [])
+            
+            failures = delete_candidates_batch(candidate_ids)
+            if not failures:
+                return JsonResponse({
+                    'success': True,
+                    'message': f'{len(candidate_ids)} candidates deleted successfully'
+                })
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Failed to delete {len(failures)} candidates',
+                    'failed': failures
+                }, status=500)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only POST method is allowed'
+    }, status=405)
+
+# Upload bodies are read and decoded in pieces of this size
+UPLOAD_PIECE_SIZE = 64 * 1024
+
+def iter_request_body(request, piece_size=UPLOAD_PIECE_SIZE):
+    """
+    Yield a request body in pieces as it is received, without buffering it.
+    
+    Bodies with a Content-Length are read through the request itself. Django
+    ignores chunked bodies, so for those read the WSGI input directly when the
+    server has already de-chunked it (wsgi.input_terminated).
+    """
+    environ = getattr(request, 'environ', {})
+    if not request.META.get('CONTENT_LENGTH') and environ.get('wsgi.input_terminated'):
+        stream = environ['wsgi.input']
+    else:
+        stream = request
+    while True:
+        piece = stream.read(piece_size)
+        if not piece:
+            break
+        yield piece
+
+def resolve_upload_recording(recording_id):
+    """Get or create the recording for a complete upload; returns (recording, recording_id)."""
+    if recording_id:
+        recording, created = AudioRecording.objects.get_or_create(user_identifier=recording_id)
+        if created:
+            logger.info(f"Created new recording with user_identifier: {recording_id}")
+        else:
+            logger.info(f"Found existing recording with user_identifier: {recording_id}")
+        return recording, recording_id
+    # Generate a random identifier if none provided
+    new_id = f"recording_{uuid.uuid4().hex[:12]}"
+    logger.info(f"Created new recording with generated ID: {new_id}")
+    return AudioRecording.objects.create(user_identifier=new_id), new_id
+
+def save_complete_analysis(recording, recording_id, result):
+    """
+    Store a complete-recording analysis and build the response for it.
+    
+    Args:
+        recording: The AudioRecording analysed
+        recording_id: Client identifier returned to the caller
+        result: Successful output of analyze_audio or analyze_audio_stream
+        
+    Returns:
+        Response data for the frontend
+    """
+    # Extract transcript and metrics
+    transcript = result.get('transcript', '')
+    fluency_score = result.get('fluency_score', 0)
+    metrics = result.get('metrics', {})
+    
+    logger.info(f"Analysis successful. Transcript: {transcript[:50]}... (truncated)")
+    
+    # Update or create a final transcription
+    Transcription.objects.update_or_create(
+        recording=recording,
+        defaults={
+            'text': transcript
+        }
+    )
+    
+    # Update or create fluency score
+    FluencyScore.objects.update_or_create(
+        recording=recording,
+        defaults={
+            'overall_score': fluency_score,
+            'speech_rate': metrics.get('wpm_score', 0),
+            'rhythm_score': metrics.get('ratio_score', 0),
+            'accuracy_score': metrics.get('filler_score', 0),
+            'wpm': metrics.get('wpm', 0),
+            'speech_ratio': metrics.get('speech_ratio', 0),
+            'word_count': metrics.get('word_count', 0),
+            'filler_count': metrics.get('filler_count', 0),
+            'pause_count': metrics.get('pause_count', 0),
+            'mean_pause_seconds': metrics.get('mean_pause_seconds', 0),
+            'longest_pause_seconds': metrics.get('longest_pause_seconds', 0),
+            'transcript': transcript
+        }
+    )
+    invalidate_status(recording.user_identifier)
+    
+    # Return the complete analysis result
+    return {
+        'recording_id': recording_id,
+        'transcript': transcript,
+        'fluency_score': fluency_score,
+        'overall_score': round(fluency_score * 100),  # Scale to 0-100
+        'speech_rate': round(metrics.get('wpm_score', 0) * 100),
+        'rhythm_score': round(metrics.get('ratio_score', 0) * 100),
+        'accuracy_score': round(metrics.get('filler_score', 0) * 100),
+        'wpm': metrics.get('wpm', 0),
+        'filler_count': metrics.get('filler_count', 0),
+        'speech_ratio': metrics.get('speech_ratio', 0),
+        'word_count': metrics.get('word_count', 0)
+    }
+
+def analyze_upload_stream(pieces, recording_id, aborted=None):
+    """
+    Analyze a raw audio upload piece by piece as it arrives.
+    
+    Args:
+        pieces: Iterable of consecutive byte ranges of the encoded file
+        recording_id: Client identifier, or None to generate one
+        aborted: Returns True once the client has gone away; nothing is
+            saved for an aborted upload
+        
+    Returns:
+        (response data, HTTP status code)
+        
+    Raises:
+        QueueFullError: if a transcription pass could not be queued
+        RequestAborted: if the client disconnected
+    """
+    recording, recording_id = resolve_upload_recording(recording_id)
+    received = 0
+    
+    def counted():
+        nonlocal received
+        for piece in pieces:
+            received += len(piece)
+            yield piece
+    
+    result = analyze_audio_stream(counted())
+    logger.info(f"Streamed upload for recording {recording_id}: {received} bytes")
+    if aborted is not None and aborted():
+        raise RequestAborted(f"Client disconnected from upload for recording {recording_id}")
+    if result.get('error'):
+        logger.error(f"Error analyzing streamed audio: {result['error']}")
+        return {'error': result['error'], 'file_size': received, 'recording_id': recording_id}, status.HTTP_400_BAD_REQUEST
+    return save_complete_analysis(recording, recording_id, result), status.HTTP_200_OK
+
 class CompleteAudioUploadView(APIView):
     """
     API view for processing a complete audio recording at once for better fluency analysis.
     This gives better results than processing chunks separately.
+    
+    Besides multipart form uploads, the raw file can be sent as the request
+    body (application/octet-stream or audio/*, optionally with chunked
+    transfer encoding) with ?recording_id= in the query string. Raw bodies
+    are decoded and transcribed while they upload, in bounded memory.
     """
     parser_classes = [MultiPartParser, FormParser]
+    raw_content_types = ('application/octet-stream', 'audio/')
     
     def post(self, request, format=None):
+        if request.content_type.startswith(self.raw_content_types):
+            return self.post_raw(request)
+        
         try:
             # Get the audio file and recording ID from the request
             audio_file = request.FILES.get('audio_file')
@@ -774,126 +1118,41 @@ class CompleteAudioUploadView(APIView):
                 
             logger.info(f"Received complete audio file for recording {recording_id}, file type: {audio_file.content_type}, size: {audio_file.size}")
             
-            # Save the audio file to a temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.webm') as temp_file:
-                for chunk in audio_file.chunks():
-                    temp_file.write(chunk)
-                temp_file_path = temp_file.name
-                
-            logger.info(f"Saved audio to temporary file: {temp_file_path}")
-            
             try:
                 # Get or create the recording by user_identifier instead of ID
                 try:
-                    if recording_id:
-                        recordings = AudioRecording.objects.filter(user_identifier=recording_id)
-                        if recordings.exists():
-                            recording = recordings.first()
-                            logger.info(f"Found existing recording with user_identifier: {recording_id}")
-                        else:
-                            # Create new recording with user_identifier
-                            recording = AudioRecording.objects.create(user_identifier=recording_id)
-                            logger.info(f"Created new recording with user_identifier: {recording_id}")
-                    else:
-                        # Generate a random identifier if none provided
-                        new_id = f"recording_{random.randint(10000, 99999)}"
-                        recording = AudioRecording.objects.create(user_identifier=new_id)
-                        recording_id = new_id
-                        logger.info(f"Created new recording with generated ID: {recording_id}")
+                    recording, recording_id = resolve_upload_recording(recording_id)
                 except Exception as e:
                     logger.error(f"Error getting/creating recording: {str(e)}")
                     return Response({'error': f"Error with recording ID: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 
-                # Convert audio to WAV format if needed for better Whisper compatibility
-                wav_file_path = None
+                if audio_file.size < 1000:
+                    logger.warning(f"Audio file too small ({audio_file.size} bytes), may be empty or corrupted")
+                
+                # Decode the upload once, straight to a 16 kHz waveform (no temp files)
                 try:
-                    # Check if file needs conversion based on size and type
-                    if audio_file.size < 1000:
-                        logger.warning(f"Audio file too small ({audio_file.size} bytes), may be empty or corrupted")
-                    
-                    # Try to convert using ffmpeg if not already WAV
-                    if not temp_file_path.lower().endswith('.wav'):
-                        wav_file_path = os.path.join(settings.TEMP_DIR, f"{recording_id}_converted.wav")
-                        logger.info(f"Converting audio to WAV format: {wav_file_path}")
-                        
-                        try:
-                            ffmpeg_cmd = [
-                                'ffmpeg', '-i', temp_file_path, 
-                                '-c:a', 'pcm_s16le',  # Linear PCM format
-                                '-ar', '16000',       # 16kHz sample rate for Whisper
-                                '-ac', '1',           # Mono audio
-                                '-y',                 # Overwrite output file
-                                wav_file_path
-                            ]
-                            result = subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-                            logger.info(f"Audio conversion successful: {wav_file_path}")
-                            
-                            # Use the converted file for processing
-                            analysis_path = wav_file_path
-                        except subprocess.CalledProcessError as e:
-                            logger.error(f"FFMPEG conversion failed: {e}")
-                            logger.error(f"FFMPEG stderr: {e.stderr.decode() if e.stderr else 'No error output'}")
-                            
-                            # Fall back to original file
-                            analysis_path = temp_file_path
-                    else:
-                        # Already WAV format
-                        analysis_path = temp_file_path
-                        
-                except Exception as e:
-                    logger.error(f"Error in audio conversion: {str(e)}")
-                    # Fall back to original file
-                    analysis_path = temp_file_path
+                    audio = AudioBuffer.from_source(audio_file)
+                except AudioDecodeError as e:
+                    logger.error(f"Error decoding complete audio: {str(e)}")
+                    return Response({
+                        'error': str(e),
+                        'file_size': audio_file.size,
+                        'file_type': audio_file.content_type,
+                        'recording_id': recording_id
+                    }, status=status.HTTP_400_BAD_REQUEST)
                 
-                # Process the audio file to get transcript and fluency scores
-                logger.info(f"Analyzing audio file: {analysis_path}")
+                # Process the audio to get transcript and fluency scores
+                logger.info(f"Analyzing {audio.duration:.2f}s of audio")
                 
                 # Use whisper to transcribe the complete audio
-                from .fluency_analyzer import analyze_audio
-                result = analyze_audio(analysis_path)
+                try:
+                    result = analyze_audio(audio)
+                except QueueFullError as e:
+                    logger.warning(f"Inference queue full, rejecting upload for recording {recording_id}")
+                    return busy_response(e)
                 
                 if result and not result.get('error'):
-                    # Extract transcript and metrics
-                    transcript = result.get('transcript', '')
-                    fluency_score = result.get('fluency_score', 0)
-                    metrics = result.get('metrics', {})
-                    
-                    logger.info(f"Analysis successful. Transcript: {transcript[:50]}... (truncated)")
-                    
-                    # Update or create a final transcription
-                    transcription, created = Transcription.objects.update_or_create(
-                        recording=recording,
-                        defaults={
-                            'text': transcript
-                        }
-                    )
-                    
-                    # Update or create fluency score
-                    fluency_obj, created = FluencyScore.objects.update_or_create(
-                        recording=recording,
-                        defaults={
-                            'overall_score': fluency_score,
-                            'speech_rate': metrics.get('wpm_score', 0),
-                            'rhythm_score': metrics.get('ratio_score', 0),
-                            'accuracy_score': metrics.get('filler_score', 0)
-                        }
-                    )
-                    
-                    # Return the complete analysis result
-                    response_data = {
-                        'recording_id': recording_id,
-                        'transcript': transcript,
-                        'fluency_score': fluency_score,
-                        'overall_score': round(fluency_score * 100),  # Scale to 0-100
-                        'speech_rate': round(metrics.get('wpm_score', 0) * 100),
-                        'rhythm_score': round(metrics.get('ratio_score', 0) * 100),
-                        'accuracy_score': round(metrics.get('filler_score', 0) * 100),
-                        'wpm': metrics.get('wpm', 0),
-                        'filler_count': metrics.get('filler_count', 0),
-                        'speech_ratio': metrics.get('speech_ratio', 0),
-                        'word_count': metrics.get('word_count', 0)
-                    }
-                    
+                    response_data = save_complete_analysis(recording, recording_id, result)
                     logger.info(f"Returning successful analysis for recording {recording_id}")
                     return Response(response_data, status=status.HTTP_200_OK)
                 else:
@@ -911,20 +1170,32 @@ class CompleteAudioUploadView(APIView):
             except Exception as e:
                 logger.error(f"Error processing complete audio file: {str(e)}")
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-            finally:
-                # Clean up temporary files
-                for path in [temp_file_path, wav_file_path]:
-                    if path and os.path.exists(path):
-                        try:
-                            os.remove(path)
-                            logger.info(f"Cleaned up temp file: {path}")
-                        except Exception as e:
-                            logger.error(f"Failed to remove temp file {path}: {str(e)}")
                         
         except Exception as e:
             logger.error(f"Error in complete audio upload: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def post_raw(self, request):
+        """Handle a raw (non-multipart) upload body."""
+        recording_id = request.query_params.get('recording_id')
+        logger.info(f"Receiving raw audio upload for recording {recording_id}, type: {request.content_type}")
+        # Set when served by UploadASGIHandler, which streams the body in
+        upload_body = getattr(request._request, 'upload_body', None)
+        try:
+            data, status_code = analyze_upload_stream(
+                iter_request_body(request._request), recording_id,
+                aborted=upload_body.aborted if upload_body is not None else None
+            )
+        except RequestAborted as e:
+            logger.warning(str(e))
+            return Response({'error': 'Upload aborted'}, status=status.HTTP_400_BAD_REQUEST)
+        except QueueFullError as e:
+            logger.warning(f"Inference queue full, rejecting upload for recording {recording_id}")
+            return busy_response(e)
+        except Exception as e:
+            logger.error(f"Error in raw audio upload: {str(e)}")
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(data, status=status_code)
 
 @csrf_exempt
 def save_referer_view(request):
@@ -955,6 +1226,66 @@ def save_referer_view(request):
         'error': 'Only POST method is allowed'
     }, status=405)
 
+@csrf_exempt
+def save_referers_batch_view(request):
+    """Save a JSON list of referers to DynamoDB with batched writes"""
+    if request.method == 'POST':
+        try:
+            # Parse the JSON body
+            data = json.loads(request.body)
+            if not isinstance(data, list):
+                raise ValueError('Expected a JSON list of referers')
+            
+            # Save the referers in batches of 25
+            referer_ids, failures = save_referers_batch(data)
+            
+            # Batches that failed are reported item by item; the rest were saved
+            return JsonResponse({
+                'success': not failures,
+                'ids': referer_ids,
+                'failed': failures
+            }, status=500 if failures else 200)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only POST method is allowed'
+    }, status=405)
+
+@csrf_exempt
+def delete_referers_batch_view(request):
+    """Delete the referers listed in {"ids": [...]} from DynamoDB"""
+    if request.method == 'POST':
+        try:
+            referer_ids = json.loads(request.body).get('ids', [])
+            
+            failures = delete_referers_batch(referer_ids)
+            if not failures:
+                return JsonResponse({
+                    'success': True,
+                    'message': f'{len(referer_ids)} referers deleted successfully'
+                })
+            else:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Failed to delete {len(failures)} referers',
+                    'failed': failures
+                }, status=500)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+    
+    return JsonResponse({
+        'success': False,
+        'error': 'Only POST method is allowed'
+    }, status=405)
+
 def get_all_referers_view(request):
     """Get all referers from DynamoDB"""
     if request.method == 'GET':
@@ -151,6 +151,40 @@ class TranscriptionClient:
             print(f"Error finalizing transcription: {e}")
             return None
             
+    def upload_audio_stream(self, file_path: str, recording_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Upload a complete recording as a raw request body, streamed from disk.
+        
+        The file is never read into memory or base64-encoded; the server
+        decodes and transcribes it while the upload is in progress.
+        
+        Args:
+            file_path: Path to the audio file
+            recording_id: Optional custom recording ID
+            
+        Returns:
+            API response as dictionary
+        """
+        if recording_id is None:
+            recording_id = f"test_{int(time.time())}"
+            
+        try:
+            # requests sends an open file in blocks with a Content-Length header
+            with open(file_path, "rb") as audio_file:
+                response = requests.post(
+                    f"{self.base_url}/upload-complete/",
+                    params={"recording_id": recording_id},
+                    data=audio_file,
+                    headers={"Content-Type": "application/octet-stream"}
+                )
+            
+            response.raise_for_status()
+            return response.json()
+            
+        except requests.exceptions.RequestException as e:
+            print(f"Error uploading audio: {e}")
+            return None
+            
 # Example usage
 if __name__ == "__main__":
     import sys